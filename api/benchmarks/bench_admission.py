@@ -0,0 +1,118 @@
+"""
+Ráfaga contra un "modelo" síncrono (una ruta def que ocupa un único
+pipeline protegido por un lock, como los microservicios reales):
+
+- sin límite: todas las peticiones toman un hilo del threadpool y esperan
+  el lock; la latencia crece para todos y las últimas vencen el timeout
+- con AdmissionLimiter: turnos acotados y cola corta; lo que no entra
+  recibe 429 con Retry-After al instante y lo admitido tiene latencia
+  acotada
+- gateway con dos réplicas limitadas: los 429 de una réplica saturada se
+  reintentan en la otra
+
+    # api/
+    python benchmarks/bench_admission.py --requests 100 --delay-ms 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microservices.api_gateway import ServiceGateway  # noqa: E402
+from microservices.common.admission import AdmissionLimiter, AdmissionMiddleware  # noqa: E402
+from stub_services import StubServer  # noqa: E402
+from upstreams import UpstreamClients  # noqa: E402
+
+
+def create_model_app(delay_ms: float, limiter: AdmissionLimiter | None) -> FastAPI:
+    app = FastAPI()
+    pipeline_lock = threading.Lock()
+
+    @app.post("/summarize")
+    def summarize(body: dict):
+        with pipeline_lock:
+            time.sleep(delay_ms / 1000)
+        return {"resumen": body.get("text", "")[:50]}
+
+    if limiter is not None:
+        app.add_middleware(AdmissionMiddleware, limiters={"/summarize": limiter})
+    return app
+
+
+async def burst(client: httpx.AsyncClient, total: int, timeout: float) -> dict:
+    async def one():
+        start = time.perf_counter()
+        try:
+            resp = await client.post("/summarize", json={"text": "hola"}, timeout=timeout)
+            outcome = "ok" if resp.status_code == 200 else str(resp.status_code)
+        except httpx.TimeoutException:
+            outcome = "timeout"
+        return outcome, (time.perf_counter() - start) * 1000
+
+    results = await asyncio.gather(*(one() for _ in range(total)))
+    ok = sorted(ms for outcome, ms in results if outcome == "ok")
+    rejected = [ms for outcome, ms in results if outcome == "429"]
+    return {
+        "ok": len(ok),
+        "429": len(rejected),
+        "timeouts": sum(1 for outcome, _ in results if outcome == "timeout"),
+        "p50_ok_ms": round(statistics.median(ok), 1) if ok else None,
+        "max_ok_ms": round(ok[-1], 1) if ok else None,
+        "max_429_ms": round(max(rejected), 1) if rejected else None,
+    }
+
+
+async def single(args, limiter: AdmissionLimiter | None) -> dict:
+    server = StubServer(create_model_app(args.delay_ms, limiter)).start()
+    upstreams = UpstreamClients({"model": server.url})
+    upstreams.open()
+    try:
+        return await burst(upstreams.get("model"), args.requests, args.timeout)
+    finally:
+        await upstreams.aclose()
+        server.stop()
+
+
+async def replicated(args) -> tuple[dict, list[dict]]:
+    limiters = [AdmissionLimiter(f"r{i}", max_concurrency=1, max_queue=args.max_queue) for i in range(2)]
+    servers = [StubServer(create_model_app(args.delay_ms, limiter)).start() for limiter in limiters]
+    gateway = ServiceGateway({"model": [s.url for s in servers]})
+    upstreams = UpstreamClients({"model": "http://model"}, transports={"model": gateway.transport("model")})
+    upstreams.open()
+    try:
+        # Toda la ráfaga, con la cola de cada réplica del tamaño de la mitad
+        results = await burst(upstreams.get("model"), 2 * args.max_queue, args.timeout)
+    finally:
+        await upstreams.aclose()
+        for server in servers:
+            server.stop()
+    return results, [limiter.stats() for limiter in limiters]
+
+
+async def main(args):
+    print(f"Ráfaga de {args.requests} peticiones, {args.delay_ms:.0f} ms por petición, timeout {args.timeout}s")
+    print(f"sin límite:       {await single(args, None)}")
+    limiter = AdmissionLimiter("model", max_concurrency=1, max_queue=args.max_queue)
+    print(f"con limitador:    {await single(args, limiter)}")
+    print(f"  estado: {limiter.stats()}")
+    results, stats = await replicated(args)
+    print(f"gateway 2 réplicas ({2 * args.max_queue} peticiones): {results}")
+    print(f"  admitidas por réplica: {[s['admitted'] for s in stats]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--delay-ms", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--max-queue", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args))
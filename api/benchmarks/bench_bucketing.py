@@ -0,0 +1,161 @@
+"""
+Políticas de lotes para los prompts del generador de qgqa, con una mezcla
+de prompts cortos (respuestas) y largos (chunks de ~500 tokens):
+
+- uno por uno
+- lotes fijos de --batch-size en orden de llegada (rellenan hasta el más
+  largo del lote)
+- lotes fijos ordenados por largo (models/batching.sorted_batches)
+- lotes ordenados bajo un presupuesto de tokens con padding
+  (models/batching.token_budget_batches, lo que usa run_prompts)
+
+Después, los prompts de respuesta del perfil "quality" (contexto + pregunta,
+~400-500 tokens, --beams 5): presupuesto dividido por num_beams contra
+models/batching.beam_token_budget. Falla si con el segundo los sublotes no
+juntan al menos --min-beam-batch prompts.
+
+Modo simulado (por defecto): el costo de cada lote es base_ms por llamada
+más per_token_ms por token con padding. Modo real: --model
+google/flan-t5-small usa el pipeline de transformers (descarga el modelo).
+
+    # api/
+    python benchmarks/bench_bucketing.py --prompts 256
+    python benchmarks/bench_bucketing.py --model google/flan-t5-small --prompts 64
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microservices.models.batching import beam_token_budget, sorted_batches, token_budget_batches  # noqa: E402
+
+WORDS = ("cell energy organelle membrane protein nucleus enzyme molecule "
+         "structure function process reaction").split()
+
+
+def make_prompts(total: int, short_ratio: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    prompts = []
+    for _ in range(total):
+        words = rng.randint(40, 120) if rng.random() < short_ratio else rng.randint(350, 480)
+        prompts.append(" ".join(rng.choice(WORDS) for _ in range(words)))
+    return prompts
+
+
+class SimulatedPipeline:
+    def __init__(self, base_ms: float, per_token_ms: float):
+        self.base = base_ms / 1000
+        self.per_token = per_token_ms / 1000
+
+    def lengths(self, prompts: list[str]) -> list[int]:
+        return [len(p.split()) for p in prompts]
+
+    def __call__(self, prompts: list[str], **kwargs) -> list[str]:
+        padded = len(prompts) * max(len(p.split()) for p in prompts)
+        time.sleep(self.base + self.per_token * padded)
+        return [p[:10] for p in prompts]
+
+
+class RealPipeline:
+    def __init__(self, model: str):
+        from transformers import pipeline
+        self.pipe = pipeline("text2text-generation", model=model, device=-1)
+
+    def lengths(self, prompts: list[str]) -> list[int]:
+        return [len(ids) for ids in self.pipe.tokenizer(prompts, truncation=True)["input_ids"]]
+
+    def __call__(self, prompts: list[str], **kwargs) -> list[str]:
+        outputs = self.pipe(prompts, batch_size=len(prompts), do_sample=False, max_new_tokens=32)
+        return [out["generated_text"] for out in outputs]
+
+
+def make_answer_prompts(total: int, seed: int) -> list[str]:
+    # Contexto de un chunk más la pregunta generada
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(380, 500))) for _ in range(total)]
+
+
+def run_policy(pipe, prompts: list[str], batches: list[list[int]], lengths: list[int]) -> dict:
+    outputs: list[str] = [""] * len(prompts)
+    start = time.perf_counter()
+    for batch in batches:
+        for i, out in zip(batch, pipe([prompts[i] for i in batch])):
+            outputs[i] = out
+    elapsed = time.perf_counter() - start
+    padded = sum(len(b) * max(lengths[i] for i in b) for b in batches)
+    return {
+        "outputs": outputs,
+        "prompts_per_s": len(prompts) / elapsed,
+        "batches": len(batches),
+        "efficiency": sum(lengths) / padded,
+        # Memoria de activaciones del lote más pesado
+        "max_batch_tokens": max(len(b) * max(lengths[i] for i in b) for b in batches),
+    }
+
+
+def main(args):
+    pipe = RealPipeline(args.model) if args.model else SimulatedPipeline(args.base_ms, args.per_token_ms)
+    prompts = make_prompts(args.prompts, args.short_ratio, args.seed)
+    lengths = pipe.lengths(prompts)
+    arrival = list(range(len(prompts)))
+
+    policies = [
+        ("uno por uno", [[i] for i in arrival]),
+        (f"fijo x{args.batch_size}", [arrival[i:i + args.batch_size] for i in range(0, len(arrival), args.batch_size)]),
+        (f"fijo x{args.batch_size} ordenado", sorted_batches(lengths, args.batch_size)),
+        (f"presupuesto {args.max_tokens} tok", token_budget_batches(lengths, args.max_tokens, args.batch_size)),
+        (f"presupuesto {args.max_tokens} tok, sin tope", token_budget_batches(lengths, args.max_tokens)),
+    ]
+
+    print(f"{len(prompts)} prompts, {sum(lengths)} tokens ({args.short_ratio:.0%} cortos)")
+    print(f"{'política':<32} {'prompts/s':>10} {'lotes':>6} {'tokens útiles':>14} {'máx tokens/lote':>16}")
+    reference = None
+    for name, batches in policies:
+        result = run_policy(pipe, prompts, batches, lengths)
+        if reference is None:
+            reference = result["outputs"]
+        # Cada salida vuelve a la posición de su prompt
+        assert args.model or result["outputs"] == reference, f"{name}: orden de salida distinto"
+        print(f"{name:<32} {result['prompts_per_s']:>10.1f} {result['batches']:>6} {result['efficiency']:>13.0%} {result['max_batch_tokens']:>16}")
+
+    beam_search(pipe, args)
+
+
+def beam_search(pipe, args):
+    prompts = make_answer_prompts(args.batch_size, args.seed)
+    lengths = pipe.lengths(prompts)
+    budgets = [
+        (f"{args.max_tokens} // {args.beams} beams", max(1, args.max_tokens // args.beams)),
+        (f"beam_token_budget {args.beam_max_tokens}", beam_token_budget(args.max_tokens, args.beam_max_tokens, args.beams)),
+    ]
+
+    print(f"\n{len(prompts)} prompts de respuesta, {min(lengths)}-{max(lengths)} tokens, num_beams={args.beams}")
+    print(f"{'presupuesto':<32} {'tokens':>7} {'lotes':>6} {'prompts/lote':>13} {'máx tokens x beams':>19}")
+    for name, budget in budgets:
+        batches = token_budget_batches(lengths, budget, args.batch_size)
+        per_batch = len(prompts) / len(batches)
+        beam_tokens = max(len(b) * max(lengths[i] for i in b) for b in batches) * args.beams
+        print(f"{name:<32} {budget:>7} {len(batches):>6} {per_batch:>13.1f} {beam_tokens:>19}")
+    # El presupuesto de run_prompts debe seguir juntando prompts con beam search
+    assert per_batch >= args.min_beam_batch, (
+        f"con num_beams={args.beams} los sublotes tienen {per_batch:.1f} prompts (< {args.min_beam_batch})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=256)
+    parser.add_argument("--short-ratio", type=float, default=0.6)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, default=4096)
+    parser.add_argument("--beams", type=int, default=5)
+    parser.add_argument("--beam-max-tokens", type=int, default=16384)
+    parser.add_argument("--min-beam-batch", type=float, default=3)
+    parser.add_argument("--base-ms", type=float, default=30.0)
+    parser.add_argument("--per-token-ms", type=float, default=0.05)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,90 @@
+"""
+chunk_by_sentences: implementación anterior (re-tokeniza cada oración cada
+vez que la visita) vs. la actual (una tokenización batch + sumas prefijas),
+sobre ~100 páginas armadas repitiendo test_texts/. Verifica que los chunks
+sean idénticos byte a byte.
+
+    # api/
+    python benchmarks/bench_chunking.py --pages 100
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(API_DIR, "microservices", "qgqa"))
+
+from transformers import AutoTokenizer  # noqa: E402
+
+from chunking import TokenizerWrapper, chunk_by_sentences, split_into_sentences  # noqa: E402
+from constants import MODEL_CONFIG, MODEL_NAME  # noqa: E402
+
+CHARS_PER_PAGE = 3000
+
+
+def legacy_chunk_by_sentences(text, tokenizer, max_input_tokens, max_output_tokens=100,
+                              overlap_sentences=1, min_chunk_tokens=100):
+    # Réplica de la implementación anterior
+    sentences = split_into_sentences(text)
+    chunks = []
+    sentence_start = 0
+    max_chunk_len = max_input_tokens - max_output_tokens
+    while sentence_start < len(sentences):
+        current_chunk = []
+        token_count = 0
+        sentence_index = sentence_start
+        while sentence_index < len(sentences):
+            sentence_tokens = tokenizer.encode(sentences[sentence_index], add_special_tokens=False)
+            if token_count + len(sentence_tokens) > max_chunk_len:
+                break
+            current_chunk.append(sentences[sentence_index])
+            token_count += len(sentence_tokens)
+            sentence_index += 1
+        chunks.append(" ".join(current_chunk).strip())
+        sentence_start = max(sentence_start + 1, sentence_index - overlap_sentences)
+    return chunks
+
+
+def timed(fn, *args, **kwargs):
+    # Los chunkers imprimen una línea por chunk: no se mide la consola
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+
+def main(pages: int):
+    corpus = " ".join(open(p, encoding="utf-8").read()
+                      for p in sorted(glob.glob(os.path.join(API_DIR, "test_texts", "*"))))
+    text = (corpus * (pages * CHARS_PER_PAGE // len(corpus) + 1))[:pages * CHARS_PER_PAGE]
+
+    tokenizer = TokenizerWrapper(AutoTokenizer.from_pretrained(MODEL_NAME))
+    spec = MODEL_CONFIG[MODEL_NAME]
+    params = dict(
+        max_input_tokens=spec["max_tokens"],
+        max_output_tokens=spec["recommended_output_tokens"],
+        overlap_sentences=6,
+        min_chunk_tokens=spec["max_tokens"] - 100,
+    )
+
+    old, t_old = timed(legacy_chunk_by_sentences, text, tokenizer, **params)
+    new, t_new = timed(chunk_by_sentences, text, tokenizer, **params)
+
+    if old != new:
+        raise SystemExit("Los chunks difieren de la implementación anterior")
+
+    print(f"Texto: {len(text)} caracteres (~{pages} páginas), "
+          f"{len(split_into_sentences(text))} oraciones, {len(new)} chunks")
+    print(f"anterior  {t_old:8.3f}s")
+    print(f"actual    {t_new:8.3f}s  (x{t_old / t_new:.1f}, chunks idénticos)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+    main(args.pages)
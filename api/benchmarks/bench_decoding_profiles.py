@@ -0,0 +1,91 @@
+"""
+Perfiles de decodificación de qgqa (microservices/qgqa/decoding.py) sobre el
+modelo real: latencia por chunk y nota media de calidad (quality.py) de
+cada perfil, con párrafos de test_texts/1.md como contextos. Después, el
+pipeline completo con el perfil "quality" y un presupuesto de latencia
+(--budget-ms) para ver en qué perfil termina. Descarga el modelo y el
+tokenizer.
+
+    # api/
+    python benchmarks/bench_decoding_profiles.py --samples 8
+    python benchmarks/bench_decoding_profiles.py --model google/flan-t5-small --samples 16 --budget-ms 4000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+# Los módulos de qgqa se importan entre sí por nombre
+sys.path.insert(0, os.path.join(API_DIR, "microservices", "qgqa"))
+
+from decoding import DECODING_PROFILES, DecodingPlan, LatencyEstimator, get_profile  # noqa: E402
+from pipeline import QAPipeline  # noqa: E402
+from quality import quality_scorer  # noqa: E402
+
+TEXT_PATH = os.path.join(API_DIR, "test_texts", "1.md")
+
+
+def load_samples(path: str, samples: int, min_words: int) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        paragraphs = [p.strip() for p in f.read().split("\n\n")]
+    # Solo párrafos de texto corrido (sin títulos, enlaces ni citas)
+    paragraphs = [p for p in paragraphs if len(p.split()) >= min_words and not p.startswith(("#", ">", "["))]
+    return paragraphs[:samples]
+
+
+def run_profile(generator, contexts: list[str], profile) -> dict:
+    start = time.perf_counter()
+    questions = generator.generate_questions_batch("bench", contexts, **profile.question)
+    answers = generator.generate_answers_batch("bench", questions, contexts, **profile.answer)
+    elapsed = time.perf_counter() - start
+    return {
+        "s_per_chunk": elapsed / len(contexts),
+        "quality": statistics.mean(quality_scorer.score(questions, answers)),
+        "answer_words": statistics.mean(len(a.split()) for a in answers),
+    }
+
+
+def main(args):
+    from microservices.models.FlanT5Text2TextGenerator import FlanT5Text2TextGenerator
+
+    contexts = load_samples(args.text, args.samples, args.min_words)
+    generator = FlanT5Text2TextGenerator(args.model, args.model, uses_cuda=False, batch_size=args.batch_size)
+    print(f"{args.model}: {len(contexts)} contextos de {args.text}")
+
+    # Calentamiento (carga perezosa de pesos y del tokenizer de calidad)
+    run_profile(generator, contexts[:1], get_profile("fast"))
+
+    estimator = LatencyEstimator()
+    print(f"\n{'perfil':<10} {'s/chunk':>8} {'calidad':>8} {'palabras/resp.':>15}")
+    for name, profile in DECODING_PROFILES.items():
+        result = run_profile(generator, contexts, profile)
+        estimator.observe(profile, len(contexts), result["s_per_chunk"] * len(contexts))
+        print(f"{name:<10} {result['s_per_chunk']:8.2f} {result['quality']:8.2f} {result['answer_words']:15.1f}")
+
+    # Con las latencias medidas, el pipeline baja de perfil entre grupos
+    # si el de "quality" no alcanza el presupuesto
+    plan = DecodingPlan(get_profile("quality"), latency_budget_ms=args.budget_ms, estimator=estimator)
+    qa_pipeline = QAPipeline(generator, group_size=args.group_size, plan=plan)
+    gqas = list(qa_pipeline.stream("bench", contexts))
+    summary = plan.summary()
+    print(f"\nPresupuesto {args.budget_ms:.0f} ms con 'quality': terminó en '{summary['used']}' "
+          f"en {summary['elapsed_ms']:.0f} ms, {len(gqas)} QAs")
+    for step in summary["downgrades"]:
+        print(f"  {step['from']} -> {step['to']} con {step['pending_chunks']} chunks pendientes "
+              f"y {step['remaining_ms']:.0f} ms restantes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="google/flan-t5-large")
+    parser.add_argument("--samples", type=int, default=8)
+    parser.add_argument("--min-words", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--group-size", type=int, default=2)
+    parser.add_argument("--budget-ms", type=float, default=10000.0)
+    parser.add_argument("--text", default=TEXT_PATH)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,82 @@
+"""
+Deduplicación de QAs: bucle original (un cos_sim por par) vs. versión
+vectorizada de qgqa/similarity.py, sobre embeddings sintéticos con grupos
+de casi-duplicados. Verifica que el modo exacto conserve exactamente los
+mismos elementos y mide el recall del modo aproximado (LSH).
+
+    # api/
+    python benchmarks/bench_dedup.py --sizes 100 500 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "microservices", "qgqa"))
+
+from similarity import dedup_mask, normalize  # noqa: E402
+
+
+def legacy_keep(embeddings: np.ndarray, threshold: float) -> np.ndarray:
+    # Réplica del bucle anterior de filter_duplicate_qas
+    normed = normalize(embeddings)
+    keep = np.zeros(len(embeddings), dtype=bool)
+    seen_idx = []
+    for i, emb in enumerate(normed):
+        if any(float(emb @ normed[j]) >= threshold for j in seen_idx):
+            continue
+        keep[i] = True
+        seen_idx.append(i)
+    return keep
+
+
+def synthetic_embeddings(n: int, dim: int = 384, dup_ratio: float = 0.4, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    n_unique = max(1, int(n * (1 - dup_ratio)))
+    base = rng.standard_normal((n_unique, dim)).astype(np.float32)
+    picks = rng.integers(0, n_unique, n - n_unique)
+    noise = rng.standard_normal((len(picks), dim)).astype(np.float32)
+    dups = base[picks] + noise * rng.uniform(0.05, 0.6, (len(picks), 1)).astype(np.float32)
+    embeddings = np.concatenate([base, dups])
+    return embeddings[rng.permutation(n)]
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main(sizes: list[int], threshold: float, legacy_max: int):
+    print(f"{'n':>7} {'legacy':>10} {'exact':>10} {'ann':>10} {'iguales':>8} {'ann extra':>9}")
+    for n in sizes:
+        emb = synthetic_embeddings(n)
+        exact, t_exact = timed(dedup_mask, emb, threshold, mode="exact")
+        ann, t_ann = timed(dedup_mask, emb, threshold, mode="ann")
+
+        if n <= legacy_max:
+            legacy, t_legacy = timed(legacy_keep, emb, threshold)
+            same = bool((legacy == exact).all())
+            legacy_col = f"{t_legacy * 1000:.1f}ms"
+            if not same:
+                raise SystemExit(f"n={n}: el modo exacto difiere del bucle original")
+        else:
+            same, legacy_col = "-", "omitido"
+
+        # Elementos que el modo aproximado conserva de más (duplicados no detectados)
+        extra = int(ann.sum() - exact.sum())
+        print(f"{n:>7} {legacy_col:>10} {t_exact * 1000:>8.1f}ms {t_ann * 1000:>8.1f}ms "
+              f"{str(same):>8} {extra:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000, 10000])
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--legacy-max", type=int, default=2000,
+                        help="no ejecutar el bucle original por encima de este n")
+    args = parser.parse_args()
+    main(args.sizes, args.threshold, args.legacy_max)
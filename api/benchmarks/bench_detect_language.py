@@ -0,0 +1,80 @@
+"""
+Latencia por llamada de TranslateModel.detect_language sobre test_texts/:
+implementación anterior (set() de stopwords por idioma en cada llamada)
+vs. índice invertido precalculado, sin caché (textos distintos) y con caché.
+
+    # api/
+    python benchmarks/bench_detect_language.py --repeat 200
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from nltk.corpus import stopwords  # noqa: E402
+
+from microservices.models import translate  # noqa: E402
+from microservices.models.translate import TranslateModel  # noqa: E402
+
+
+def legacy_detect_language(text: str) -> str:
+    # Réplica de la implementación anterior
+    words = text.lower().split()
+    scores = {}
+    for lang in stopwords.fileids():
+        if lang == "hinglish":
+            continue
+        stops = set(stopwords.words(lang))
+        scores[lang] = len([w for w in words if w in stops])
+    if not scores:
+        return "unknown"
+    best_lang = max(scores, key=scores.get)
+    return "unknown" if scores[best_lang] < 3 else best_lang
+
+
+def per_call_us(fn, texts: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main(repeat: int):
+    texts = [open(p, encoding="utf-8").read()
+             for p in sorted(glob.glob(os.path.join(API_DIR, "test_texts", "*")))]
+    # Fragmentos de distintos tamaños además del documento completo
+    samples = [t[:n] for t in texts for n in (200, 2000, len(t))]
+
+    for text in samples:
+        expected = legacy_detect_language(text)
+        got = TranslateModel._detect_language(text)
+        if expected != got:
+            raise SystemExit(f"Resultado distinto ({expected} != {got}) para: {text[:40]!r}")
+
+    legacy = per_call_us(legacy_detect_language, samples, max(1, repeat // 20))
+    indexed = per_call_us(TranslateModel._detect_language, samples, repeat)
+
+    def uncached(text):
+        translate._detection_cache.clear()
+        return TranslateModel.detect_language(text)
+
+    no_cache = per_call_us(uncached, samples, repeat)
+    cached = per_call_us(TranslateModel.detect_language, samples, repeat)
+
+    print(f"Textos: {len(samples)} (tamaños: {sorted({len(s) for s in samples})})")
+    print(f"anterior          {legacy:>10.1f} µs/llamada")
+    print(f"índice            {indexed:>10.1f} µs/llamada")
+    print(f"índice + hash     {no_cache:>10.1f} µs/llamada (fallo de caché)")
+    print(f"caché             {cached:>10.1f} µs/llamada (acierto)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,190 @@
+"""
+Balanceo del api_gateway contra réplicas stub que imitan workers CPU (una
+petición a la vez por réplica):
+
+- escalado: req/s de /summarize con 1, 2, 4... réplicas
+- réplica lenta: reparto por menos peticiones en curso cuando una réplica
+  es 5 veces más lenta
+- caída: se apaga una réplica a mitad de la carga; los reintentos y la
+  expulsión deben dejar 0 errores
+- servicio colgado: acepta conexiones pero nunca responde; el chequeo de
+  salud (con plazo corto) abre el circuito y las peticiones fallan al
+  instante en vez de esperar el timeout
+
+    # api/
+    python benchmarks/bench_gateway.py --replicas 1 2 4 --requests 400
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microservices.api_gateway import CircuitOpenError, ServiceGateway  # noqa: E402
+from stub_services import StubServer, create_stub_app, free_port  # noqa: E402
+from upstreams import DEFAULT_TIMEOUT, UpstreamClients  # noqa: E402
+
+TEXT = "Lorem ipsum dolor sit amet. " * 20
+
+
+async def run_load(
+    upstreams: UpstreamClients,
+    total: int,
+    concurrency: int,
+    on_progress=None
+) -> tuple[float, int]:
+    client = upstreams.get("summarizer")
+    sem = asyncio.Semaphore(concurrency)
+    errors = 0
+    done = 0
+
+    async def one():
+        nonlocal errors, done
+        async with sem:
+            try:
+                resp = await client.post("/summarize", json={"text": TEXT})
+                resp.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+            done += 1
+            if on_progress is not None:
+                on_progress(done)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start), errors
+
+
+def make_upstreams(gateway: ServiceGateway, timeout: httpx.Timeout = DEFAULT_TIMEOUT) -> UpstreamClients:
+    upstreams = UpstreamClients(
+        {"summarizer": "http://summarizer"},
+        timeout=timeout,
+        transports={"summarizer": gateway.transport("summarizer")},
+    )
+    upstreams.open()
+    return upstreams
+
+
+def distribution(gateway: ServiceGateway) -> str:
+    return " ".join(str(r["requests"]) for r in gateway.stats()["summarizer"])
+
+
+async def scaling(replica_counts: list[int], delay_ms: float, total: int, concurrency: int):
+    print(f"Escalado ({delay_ms:.0f} ms por petición, 1 petición a la vez por réplica)")
+    baseline = None
+    for n in replica_counts:
+        stubs = [StubServer(create_stub_app("summarizer", delay_ms, max_concurrency=1)).start()
+                 for _ in range(n)]
+        gateway = ServiceGateway({"summarizer": [s.url for s in stubs]})
+        upstreams = make_upstreams(gateway)
+        try:
+            rps, errors = await run_load(upstreams, total, concurrency)
+        finally:
+            await upstreams.aclose()
+            for stub in stubs:
+                stub.stop()
+        baseline = baseline or rps
+        print(f"  {n} réplica(s): {rps:7.1f} req/s  x{rps / baseline:.2f}  "
+              f"errores={errors}  reparto=[{distribution(gateway)}]")
+
+
+async def slow_replica(delay_ms: float, total: int, concurrency: int):
+    delays = [delay_ms, delay_ms, delay_ms * 5]
+    stubs = [StubServer(create_stub_app("summarizer", d, max_concurrency=1)).start() for d in delays]
+    gateway = ServiceGateway({"summarizer": [s.url for s in stubs]})
+    upstreams = make_upstreams(gateway)
+    try:
+        rps, errors = await run_load(upstreams, total, concurrency)
+    finally:
+        await upstreams.aclose()
+        for stub in stubs:
+            stub.stop()
+    print(f"Réplica lenta (retardos {[int(d) for d in delays]} ms): {rps:.1f} req/s  "
+          f"errores={errors}  reparto=[{distribution(gateway)}]")
+
+
+async def failover(delay_ms: float, total: int, concurrency: int):
+    stubs = [StubServer(create_stub_app("summarizer", delay_ms, max_concurrency=1)).start()
+             for _ in range(3)]
+    gateway = ServiceGateway({"summarizer": [s.url for s in stubs]}, health_interval=0.2)
+    await gateway.start()
+    upstreams = make_upstreams(gateway)
+
+    def on_progress(done: int):
+        # Se apaga la última réplica a mitad de la carga
+        if done == total // 2:
+            asyncio.get_running_loop().run_in_executor(None, stubs[-1].stop)
+
+    try:
+        rps, errors = await run_load(upstreams, total, concurrency, on_progress)
+    finally:
+        await gateway.aclose()
+        await upstreams.aclose()
+        for stub in stubs[:-1]:
+            stub.stop()
+    state = ["disponible" if r["available"] else "fuera" for r in gateway.stats()["summarizer"]]
+    print(f"Caída de una réplica a mitad de carga: {rps:.1f} req/s  errores={errors}  "
+          f"reparto=[{distribution(gateway)}]  estado={state}")
+
+
+async def timed_post(client: httpx.AsyncClient) -> tuple[float, str]:
+    start = time.perf_counter()
+    try:
+        await client.post("/summarize", json={"text": TEXT})
+        outcome = "ok"
+    except CircuitOpenError:
+        outcome = "circuito abierto"
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    return (time.perf_counter() - start) * 1000, outcome
+
+
+async def hung_service(read_timeout: float):
+    # Socket que acepta conexiones (backlog) pero nunca responde
+    port = free_port()
+    hung = socket.socket()
+    hung.bind(("127.0.0.1", port))
+    hung.listen(128)
+
+    gateway = ServiceGateway(
+        {"summarizer": [f"http://127.0.0.1:{port}"]}, health_interval=0.5, health_timeout=0.5)
+    upstreams = make_upstreams(gateway, httpx.Timeout(read_timeout, connect=1.0))
+    client = upstreams.get("summarizer")
+    try:
+        before, outcome = await timed_post(client)
+        print(f"Servicio colgado, sin chequeo de salud: {before:7.1f} ms ({outcome})")
+
+        await gateway.start()
+        start = time.perf_counter()
+        await gateway.check_health()
+        check = (time.perf_counter() - start) * 1000
+        after, outcome = await timed_post(client)
+        print(f"Servicio colgado, con circuito:         {after:7.1f} ms ({outcome}); "
+              f"ronda de /health: {check:.0f} ms")
+    finally:
+        await gateway.aclose()
+        await upstreams.aclose()
+        hung.close()
+
+
+async def main(args):
+    await scaling(args.replicas, args.delay_ms, args.requests, args.concurrency)
+    await slow_replica(args.delay_ms, args.requests, args.concurrency)
+    await failover(args.delay_ms, args.requests, args.concurrency)
+    await hung_service(args.read_timeout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--delay-ms", type=float, default=10.0)
+    parser.add_argument("--read-timeout", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,133 @@
+"""
+Backends de inferencia (models/inference_backend.py) sobre los modelos
+reales: tiempo de carga, latencia por entrada y memoria de cada backend, y
+cuánto se parecen sus salidas a las de torch fp32 (coincidencia exacta y
+F1 de tokens). Descarga el modelo; onnx y onnx-int8 necesitan
+optimum[onnxruntime] y la primera vez exportan el modelo a disco.
+
+Las entradas son párrafos de test_texts/1.md. La generación es greedy
+(sin muestreo) para que las salidas sean comparables.
+
+    # api/
+    python benchmarks/bench_inference_backend.py --service translate --samples 16
+    python benchmarks/bench_inference_backend.py --service summarizer --backends torch torch-int8 --samples 4
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microservices.common.model_manager import process_rss_mb  # noqa: E402
+from microservices.models.inference_backend import BACKENDS  # noqa: E402
+
+TEXT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_texts", "1.md")
+
+QGQA_MODEL = "google/flan-t5-large"
+TRANSLATE_MODEL = "Helsinki-NLP/opus-mt-mul-en"
+SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+
+
+def load_samples(path: str, samples: int, min_words: int) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        paragraphs = [p.strip() for p in f.read().split("\n\n")]
+    # Solo párrafos de texto corrido (sin títulos, enlaces ni citas)
+    paragraphs = [p for p in paragraphs if len(p.split()) >= min_words and not p.startswith(("#", ">", "["))]
+    return paragraphs[:samples]
+
+
+def make_runner(service: str, backend: str):
+    """Carga el modelo del servicio en `backend` y devuelve una función texto -> salida."""
+    if service == "qgqa":
+        from microservices.models.FlanT5Text2TextGenerator import FlanT5Text2TextGenerator
+        generator = FlanT5Text2TextGenerator(QGQA_MODEL, QGQA_MODEL, uses_cuda=False, backend=backend)
+
+        def run(text: str) -> str:
+            prompt = f"Generate a question based on the following context.\n\nContext: {text}\n\nQuestion:"
+            return generator.run_prompts([prompt], do_sample=False, max_new_tokens=64)[0]
+        return run
+
+    if service == "translate":
+        from microservices.models.translate import TranslateModel
+        translator = TranslateModel(TRANSLATE_MODEL, uses_cuda=False, backend=backend)
+        return translator.translate
+
+    from microservices.models.summarizerModel import SummarizerModel
+    summarizer = SummarizerModel(SUMMARIZER_MODEL, uses_cuda=False, backend=backend)
+    return lambda text: summarizer.summarize(text, min_len=30, max_len=120)
+
+
+def token_f1(reference: str, candidate: str) -> float:
+    ref = Counter(re.findall(r"\w+", reference.lower()))
+    cand = Counter(re.findall(r"\w+", candidate.lower()))
+    overlap = sum((ref & cand).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(cand.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def main(args):
+    samples = load_samples(args.text, args.samples, args.min_words)
+    print(f"{args.service}: {len(samples)} entradas de {args.text}")
+
+    reference: list[str] | None = None
+    rows = []
+    for backend in args.backends:
+        rss_before = process_rss_mb()
+        start = time.perf_counter()
+        try:
+            run = make_runner(args.service, backend)
+        except Exception as e:
+            print(f"{backend:<11} no disponible: {e}")
+            continue
+        load_s = time.perf_counter() - start
+        rss_after = process_rss_mb()
+
+        run(samples[0])  # calentamiento
+        outputs, latencies = [], []
+        for text in samples:
+            t0 = time.perf_counter()
+            outputs.append(run(text))
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        if reference is None:
+            # Las salidas del primer backend (torch por defecto) son la referencia
+            reference = outputs
+        exact = sum(a == b for a, b in zip(reference, outputs)) / len(outputs)
+        f1 = statistics.mean(token_f1(a, b) for a, b in zip(reference, outputs))
+        rows.append({
+            "backend": backend,
+            "load_s": load_s,
+            "p50_ms": statistics.median(latencies),
+            "max_ms": max(latencies),
+            "rss_mb": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+            "exact": exact,
+            "f1": f1,
+        })
+        del run
+
+    if not rows:
+        return
+    base = rows[0]["p50_ms"]
+    print(f"\n{'backend':<11} {'carga':>7} {'p50':>9} {'máx':>9} {'speedup':>8} {'RSS':>8} {'exactas':>8} {'F1':>6}")
+    for row in rows:
+        rss = f"{row['rss_mb']:.0f} MB" if row["rss_mb"] is not None else "n/d"
+        print(f"{row['backend']:<11} {row['load_s']:6.1f}s {row['p50_ms']:7.0f}ms {row['max_ms']:7.0f}ms "
+              f"{base / row['p50_ms']:7.2f}x {rss:>8} {row['exact']:7.0%} {row['f1']:6.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--service", choices=("qgqa", "translate", "summarizer"), default="translate")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--samples", type=int, default=16)
+    parser.add_argument("--min-words", type=int, default=40)
+    parser.add_argument("--text", default=TEXT_PATH)
+    args = parser.parse_args()
+    main(args)
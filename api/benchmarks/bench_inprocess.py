@@ -0,0 +1,131 @@
+"""
+Modo en proceso (inprocess.py) vs. microservicios por HTTP en loopback,
+con apps stub en lugar de los modelos:
+
+- latencia por salto de /summarize y /generate_qa_pipeline
+- primer evento de /generate_qa_stream: StreamingASGITransport entrega
+  cada línea apenas se emite (httpx.ASGITransport la entregaría al final)
+- carga diferida: la app del servicio se crea en su primera petición
+
+    # api/
+    python benchmarks/bench_inprocess.py --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inprocess import InProcessServices  # noqa: E402
+from stub_services import StubServer, create_stub_app  # noqa: E402
+from upstreams import UpstreamClients  # noqa: E402
+
+TEXT = "Lorem ipsum dolor sit amet. " * 40
+
+
+def create_streaming_app(events: int, interval_ms: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/generate_qa_stream")
+    async def stream(body: dict):
+        async def lines():
+            for i in range(events):
+                await asyncio.sleep(interval_ms / 1000)
+                yield json.dumps({"type": "qa", "qa": {"question": f"q{i}"}}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+async def hops(client: httpx.AsyncClient, path: str, body: dict, total: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            (await client.post(path, json=body)).raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return (time.perf_counter() - start) / total * 1e6
+
+
+async def first_event_ms(client: httpx.AsyncClient) -> float:
+    start = time.perf_counter()
+    async with client.stream("POST", "/generate_qa_stream", json={"translated_context": TEXT}) as resp:
+        async for line in resp.aiter_lines():
+            if line.strip():
+                return (time.perf_counter() - start) * 1000
+    return float("nan")
+
+
+async def main(args):
+    stub = StubServer(create_stub_app("stub")).start()
+    stream_stub = StubServer(create_streaming_app(args.events, args.interval_ms)).start()
+    http = UpstreamClients({"stub": stub.url, "stream": stream_stub.url})
+
+    created = []
+
+    def loader(factory):
+        def load():
+            created.append(time.perf_counter())
+            return factory()
+        return load
+
+    services = InProcessServices({
+        "stub": loader(lambda: create_stub_app("stub")),
+        "stream": loader(lambda: create_streaming_app(args.events, args.interval_ms)),
+    })
+    inproc = UpstreamClients(
+        {"stub": "http://stub", "stream": "http://stream"},
+        transports={name: services.transport(name) for name in ("stub", "stream")},
+    )
+    buffered = httpx.AsyncClient(
+        base_url="http://stream", transport=httpx.ASGITransport(app=services.apps["stream"]))
+    http.open()
+    inproc.open()
+
+    try:
+        print(f"Carga diferida: apps creadas antes de la primera petición: {len(created)}; "
+              f"health: {services.health()['stub']['status']}")
+
+        cases = [
+            ("/summarize", {"text": TEXT}),
+            ("/generate_qa_pipeline", {"translated_context": TEXT}),
+        ]
+        for path, body in cases:
+            before = await hops(http.get("stub"), path, body, args.requests, args.concurrency)
+            after = await hops(inproc.get("stub"), path, body, args.requests, args.concurrency)
+            print(f"{path:<24} HTTP loopback: {before:7.1f} µs/petición   "
+                  f"en proceso: {after:7.1f} µs/petición   x{before / after:.2f}")
+        print(f"Apps creadas: {len(created)}; health: {services.health()['stub']['status']}")
+
+        total = args.events * args.interval_ms
+        print(f"Primer evento de /generate_qa_stream ({args.events} eventos cada {args.interval_ms:.0f} ms, "
+              f"{total:.0f} ms en total):")
+        print(f"  HTTP loopback:              {await first_event_ms(http.get('stream')):7.1f} ms")
+        print(f"  en proceso (streaming):     {await first_event_ms(inproc.get('stream')):7.1f} ms")
+        print(f"  httpx.ASGITransport:        {await first_event_ms(buffered):7.1f} ms")
+    finally:
+        await http.aclose()
+        await inproc.aclose()
+        await buffered.aclose()
+        await services.aclose()
+        stub.stop()
+        stream_stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--interval-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    asyncio.run(main(args))
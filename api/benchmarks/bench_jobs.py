@@ -0,0 +1,135 @@
+"""
+Ráfaga de peticiones largas contra un summarizer stub que atiende una a la
+vez:
+
+- directo: todas las peticiones abiertas a la vez con un timeout corto,
+  como /summarizer/ bajo carga (las últimas vencen el timeout)
+- cola: las mismas peticiones como trabajos de jobs.JobQueue; lo que no
+  entra se rechaza al instante con Retry-After y lo admitido termina sin
+  timeouts
+- equidad: un usuario encola muchos trabajos y otro pocos después; los del
+  segundo no esperan a que termine el primero
+
+    # api/
+    python benchmarks/bench_jobs.py --requests 100 --delay-ms 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobs import JobQueue, QueueFullError  # noqa: E402
+from stub_services import StubServer, create_stub_app  # noqa: E402
+from upstreams import UpstreamClients  # noqa: E402
+
+TEXT = "Lorem ipsum dolor sit amet. " * 20
+
+
+async def direct(client: httpx.AsyncClient, total: int, timeout: float):
+    async def one():
+        try:
+            resp = await client.post("/summarize", json={"text": TEXT}, timeout=timeout)
+            resp.raise_for_status()
+            return "ok"
+        except httpx.TimeoutException:
+            return "timeout"
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"directo: {outcomes.count('ok')} ok, {outcomes.count('timeout')} timeouts "
+          f"(timeout {timeout}s) en {elapsed:.2f}s")
+
+
+def make_queue(client: httpx.AsyncClient, workers: int, max_pending: int) -> JobQueue:
+    queue = JobQueue(workers=workers, max_pending=max_pending, max_per_user=max_pending)
+
+    async def summarize(job):
+        resp = await client.post("/summarize", json={"text": job.payload["text"]})
+        resp.raise_for_status()
+        return resp.json()
+
+    queue.register("summarizer", summarize)
+    queue.start()
+    return queue
+
+
+async def wait_all(jobs):
+    await asyncio.gather(*(_drain(job) for job in jobs))
+
+
+async def _drain(job):
+    async for _ in job.subscribe():
+        pass
+
+
+async def queued(client: httpx.AsyncClient, total: int, workers: int, max_pending: int):
+    queue = make_queue(client, workers, max_pending)
+    try:
+        start = time.perf_counter()
+        accepted, rejected, retry_after = [], 0, 0.0
+        for _ in range(total):
+            try:
+                accepted.append(await queue.submit("summarizer", {"text": TEXT}))
+            except QueueFullError as e:
+                rejected += 1
+                retry_after = e.retry_after
+        admission = (time.perf_counter() - start) * 1000
+        await wait_all(accepted)
+        elapsed = time.perf_counter() - start
+    finally:
+        await queue.aclose()
+
+    done = sum(1 for job in accepted if job.status == "done")
+    print(f"cola:    {done} ok, {len(accepted) - done} errores, {rejected} rechazados con 429 "
+          f"(Retry-After {retry_after:.0f}s) en {elapsed:.2f}s; admisión de la ráfaga: {admission:.1f} ms")
+
+
+async def fairness(client: httpx.AsyncClient, heavy: int, light: int, workers: int):
+    queue = make_queue(client, workers, heavy + light)
+    finished: list[str] = []
+    try:
+        jobs = [await queue.submit("summarizer", {"text": TEXT}, user="a") for _ in range(heavy)]
+        jobs += [await queue.submit("summarizer", {"text": TEXT}, user="b") for _ in range(light)]
+
+        async def track(job):
+            await _drain(job)
+            finished.append(job.user)
+
+        await asyncio.gather(*(track(job) for job in jobs))
+    finally:
+        await queue.aclose()
+
+    positions = [i + 1 for i, user in enumerate(finished) if user == "b"]
+    print(f"equidad: usuario 'a' encoló {heavy} trabajos y luego 'b' encoló {light}; "
+          f"los de 'b' terminaron en las posiciones {positions} de {len(finished)}")
+
+
+async def main(args):
+    stub = StubServer(create_stub_app("summarizer", args.delay_ms, max_concurrency=1)).start()
+    upstreams = UpstreamClients({"summarizer": stub.url})
+    upstreams.open()
+    client = upstreams.get("summarizer")
+    try:
+        await direct(client, args.requests, args.timeout)
+        await queued(client, args.requests, args.workers, args.max_pending)
+        await fairness(client, args.requests // 2, 5, args.workers)
+    finally:
+        await upstreams.aclose()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--delay-ms", type=float, default=50.0)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=60)
+    args = parser.parse_args()
+    asyncio.run(main(args))
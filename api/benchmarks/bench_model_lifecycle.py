@@ -0,0 +1,114 @@
+"""
+ModelManager (microservices/common/model_manager.py) con modelos simulados
+(una espera de carga y un bloque de memoria del tamaño indicado):
+
+- arranque: cargar todo en el lifespan (antes) vs. carga diferida
+- primeras peticiones concurrentes a un modelo sin cargar: una sola carga
+- presupuesto de memoria: usar los modelos en rotación con un presupuesto
+  para dos; los menos usados se descargan y la memoria residente queda
+  acotada
+- descarga por inactividad
+
+    # api/
+    python benchmarks/bench_model_lifecycle.py --models 3 --size-mb 200
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from microservices.common.model_manager import ModelManager, process_rss_mb  # noqa: E402
+
+
+class SimulatedModel:
+    def __init__(self, size_mb: float, load_s: float):
+        time.sleep(load_s)
+        # np.ones toca todas las páginas: cuenta en la memoria residente
+        self.weights = np.ones(int(size_mb * 1024 * 1024), dtype=np.uint8)
+
+
+def make_manager(args, budget_mb: float = 0.0, idle_timeout_s: float = 0.0) -> tuple[ModelManager, list[str]]:
+    manager = ModelManager(idle_timeout_s=idle_timeout_s, memory_budget_mb=budget_mb)
+    loads: list[str] = []
+    for i in range(args.models):
+        name = f"model_{i}"
+
+        def loader(name=name):
+            loads.append(name)
+            return SimulatedModel(args.size_mb, args.load_ms / 1000)
+
+        manager.register(name, loader, size_mb=args.size_mb)
+    return manager, loads
+
+
+def rss() -> str:
+    value = process_rss_mb()
+    return f"{value:.0f} MB" if value is not None else "n/d"
+
+
+def main(args):
+    names = [f"model_{i}" for i in range(args.models)]
+
+    manager, _ = make_manager(args)
+    start = time.perf_counter()
+    manager.preload(*names)
+    print(f"Arranque con carga anticipada: {time.perf_counter() - start:.2f}s, RSS {rss()}")
+    manager.unload()
+
+    manager, loads = make_manager(args)
+    start = time.perf_counter()
+    print(f"Arranque con carga diferida:   {time.perf_counter() - start:.2f}s, RSS {rss()}")
+
+    latencies: list[float] = []
+
+    def first_request():
+        t0 = time.perf_counter()
+        with manager.use("model_0"):
+            pass
+        latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=first_request) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"{args.concurrency} primeras peticiones concurrentes: {len(loads)} carga(s), "
+          f"latencia máx. {max(latencies):.2f}s")
+    manager.unload()
+
+    budget = 2 * args.size_mb + args.size_mb / 2
+    manager, loads = make_manager(args, budget_mb=budget)
+    peak = 0.0
+    for i in range(args.rounds * args.models):
+        with manager.use(names[i % args.models]):
+            peak = max(peak, manager.stats()["resident_mb"])
+    stats = manager.stats()
+    print(f"Presupuesto {budget:.0f} MB, {args.rounds} vueltas sobre {args.models} modelos: "
+          f"{len(loads)} cargas, {sum(m['evictions'] for m in stats['models'].values())} descargas, "
+          f"máximo cargado {peak:.0f} MB, RSS {rss()}")
+    manager.unload()
+
+    manager, _ = make_manager(args, idle_timeout_s=args.idle_s)
+    manager.start()
+    manager.preload(*names)
+    print(f"Todos cargados: {manager.stats()['resident_mb']:.0f} MB, RSS {rss()}")
+    time.sleep(args.idle_s * 2 + 1)
+    print(f"Tras {args.idle_s * 2 + 1:.0f}s sin uso: {manager.stats()['resident_mb']:.0f} MB, RSS {rss()}")
+    manager.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=3)
+    parser.add_argument("--size-mb", type=float, default=200.0)
+    parser.add_argument("--load-ms", type=float, default=500.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--idle-s", type=float, default=1.0)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,156 @@
+"""
+Banco semántico de QAs de qgqa (microservices/qgqa/qa_bank.py):
+
+- aciertos con material casi idéntico: párrafos de test_texts/ guardados en
+  el banco y consultados con otra "extracción del PDF" (guiones de corte de
+  línea, saltos y espacios distintos, ligaduras) y reescritos (palabras
+  cambiadas de lugar o quitadas). Compara la caché exacta (hash del texto
+  normalizado, como ResponseCache) con el banco a distintos umbrales, y
+  cuenta las reutilizaciones falsas con párrafos que no están en el banco.
+  Usa el modelo de embeddings real (lo descarga).
+- escala del índice con vectores aleatorios: latencia de búsqueda de un
+  lote de chunks, inserciones por segundo y desalojo.
+
+    # api/
+    python benchmarks/bench_qa_bank.py --paragraphs 200
+    python benchmarks/bench_qa_bank.py --skip-model --sizes 1000 10000 50000
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+sys.path.insert(0, os.path.join(API_DIR, "microservices", "qgqa"))
+
+from microservices.common.response_cache import normalize_text  # noqa: E402
+from qa_bank import QABank  # noqa: E402
+
+SCOPE = "bench"
+
+
+def load_paragraphs(limit: int, min_words: int) -> list[str]:
+    paragraphs = []
+    for path in sorted(glob.glob(os.path.join(API_DIR, "test_texts", "*.md"))):
+        with open(path, encoding="utf-8") as f:
+            paragraphs += [p.strip() for p in f.read().split("\n\n")]
+    paragraphs = [p for p in paragraphs if len(p.split()) >= min_words and not p.startswith(("#", ">", "["))]
+    return paragraphs[:limit]
+
+
+def pdf_variant(text: str, rng: random.Random) -> str:
+    # Otra extracción del mismo PDF: cortes de línea con guion, espacios
+    # dobles y ligaduras
+    words = text.split()
+    out = []
+    for word in words:
+        if len(word) > 7 and rng.random() < 0.15:
+            cut = rng.randint(3, len(word) - 3)
+            word = f"{word[:cut]}-\n{word[cut:]}"
+        out.append(word)
+    text = " ".join(w + ("\n" if rng.random() < 0.08 else "") for w in out)
+    return text.replace("fi", "ﬁ").replace("  ", " ")
+
+
+def reworded_variant(text: str, rng: random.Random, ratio: float) -> str:
+    # Párrafo reescrito: se quitan y se cambian de lugar algunas palabras
+    words = text.split()
+    words = [w for w in words if rng.random() >= ratio / 2]
+    for _ in range(int(len(words) * ratio / 2)):
+        i, j = rng.randrange(len(words)), rng.randrange(len(words))
+        words[i], words[j] = words[j], words[i]
+    return " ".join(words)
+
+
+def hit_rates(args):
+    paragraphs = load_paragraphs(args.paragraphs, args.min_words)
+    half = len(paragraphs) // 2
+    stored, unseen = paragraphs[:half], paragraphs[half:]
+    rng = random.Random(args.seed)
+    queries = {
+        "extracción PDF": [pdf_variant(p, rng) for p in stored],
+        f"reescrito {args.reword:.0%}": [reworded_variant(p, rng, args.reword) for p in stored],
+        "no guardado": unseen,
+    }
+
+    print(f"{len(stored)} párrafos en el banco, {len(unseen)} fuera")
+    with tempfile.TemporaryDirectory() as tmp:
+        bank = QABank("bench_qa_bank", tmp)
+        start = time.perf_counter()
+        bank.add(bank.embed(stored), [{"i": i} for i in range(len(stored))], SCOPE)
+        print(f"Inserción con embeddings: {(time.perf_counter() - start) / len(stored) * 1000:.1f} ms/chunk")
+
+        exact_keys = {normalize_text(p) for p in stored}
+        print(f"\n{'consulta':<16} {'exacta':>8}" + "".join(f" {f'umbral {t}':>12}" for t in args.thresholds))
+        for name, texts in queries.items():
+            exact = sum(normalize_text(t) in exact_keys for t in texts) / len(texts)
+            embeddings = bank.embed(texts)
+            row = f"{name:<16} {exact:8.0%}"
+            for threshold in args.thresholds:
+                bank.threshold = threshold
+                found = bank.lookup(embeddings, SCOPE)
+                if name == "no guardado":
+                    # Cualquier acierto es una reutilización falsa
+                    rate = sum(v is not None for v in found) / len(texts)
+                else:
+                    # Solo cuenta si reutiliza la QA de su propio párrafo
+                    rate = sum(v is not None and v["i"] == i for i, v in enumerate(found)) / len(texts)
+                row += f" {rate:12.0%}"
+            print(row)
+
+
+def index_scaling(args):
+    rng = np.random.default_rng(args.seed)
+    print(f"\n{'entradas':>9} {'inserción':>14} {'búsqueda x' + str(args.batch):>16} {'desalojo':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            bank = QABank("bench_qa_bank", tmp, max_items=size)
+            vectors = rng.standard_normal((size, args.dim)).astype(np.float32)
+            start = time.perf_counter()
+            for i in range(0, size, args.insert_batch):
+                chunk = vectors[i:i + args.insert_batch]
+                bank.add(chunk, [{"i": i + k} for k in range(len(chunk))], SCOPE)
+            insert_rate = size / (time.perf_counter() - start)
+
+            latencies = []
+            for _ in range(args.repeat):
+                queries = vectors[rng.integers(0, size, args.batch)] + 0.01 * rng.standard_normal((args.batch, args.dim))
+                t0 = time.perf_counter()
+                bank.lookup(queries, SCOPE)
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+            # Una inserción más allá del máximo desaloja el 10% menos usado
+            start = time.perf_counter()
+            bank.add(rng.standard_normal((1, args.dim)), [{"i": -1}], SCOPE)
+            evict_ms = (time.perf_counter() - start) * 1000
+            print(f"{size:>9} {insert_rate:10.0f}/s {statistics.median(latencies):14.2f}ms {evict_ms:8.1f}ms")
+
+
+def main(args):
+    if not args.skip_model:
+        hit_rates(args)
+    index_scaling(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paragraphs", type=int, default=200)
+    parser.add_argument("--min-words", type=int, default=40)
+    parser.add_argument("--reword", type=float, default=0.1)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.9, 0.95, 0.98])
+    parser.add_argument("--skip-model", action="store_true")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--insert-batch", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,110 @@
+"""
+Evaluación de calidad de qgqa: la función anterior, una QA por llamada
+(dos tokenizaciones por QA y conjuntos de Python), vs. la evaluación por
+lotes de microservices/qgqa/quality.py (una tokenización para todo el lote
+y criterios como operaciones sobre arreglos). Verifica que las notas sean
+idénticas. Descarga el tokenizer de flan-t5.
+
+Las QAs se arman con oraciones de test_texts/: preguntas, respuestas que
+repiten la pregunta, respuestas cortas, sin punto final e inválidas.
+
+    # api/
+    python benchmarks/bench_quality.py --sizes 16 256 4096
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(API_DIR, "microservices", "qgqa"))
+
+from chunking import split_into_sentences  # noqa: E402
+from quality import HEURISTIC_CRITERIA, QualityScorer  # noqa: E402
+from resources import resources  # noqa: E402
+from validation import is_valid_answer  # noqa: E402
+
+
+def legacy_evaluar_calidad_qa(answer: str, question: str) -> float:
+    # Réplica de la función anterior (con los argumentos en el orden correcto)
+    score = 0
+    total = 4
+    tokenizer = resources.get("tokenizer")
+    if is_valid_answer(answer):
+        score += 1
+    answer_tokens = tokenizer.encode(answer, add_special_tokens=False)
+    if 3 <= len(answer_tokens) <= 40:
+        score += 1
+    question_tokens = tokenizer.encode(question, add_special_tokens=False)
+    shared_tokens = set(answer_tokens) & set(question_tokens)
+    if len(shared_tokens) / max(1, len(answer_tokens)) < 0.5:
+        score += 1
+    if answer[0].isupper() and answer[-1] in ".!?":
+        score += 1
+    return round(score / total, 2)
+
+
+def legacy_score(questions: list[str], answers: list[str]) -> list[float]:
+    # Como se llamaba en /generate_qa y en el pipeline: una QA a la vez y 0
+    # para las respuestas inválidas
+    return [legacy_evaluar_calidad_qa(a, q) if is_valid_answer(a) else 0 for q, a in zip(questions, answers)]
+
+
+def make_qas(total: int, seed: int) -> tuple[list[str], list[str]]:
+    sentences = []
+    for path in sorted(glob.glob(os.path.join(API_DIR, "test_texts", "*.md"))):
+        with open(path, encoding="utf-8") as f:
+            sentences += [s for s in split_into_sentences(f.read()) if len(s.split()) >= 4]
+    rng = random.Random(seed)
+    questions, answers = [], []
+    for _ in range(total):
+        question = rng.choice(sentences).rstrip(".!?") + "?"
+        kind = rng.random()
+        if kind < 0.5:
+            answer = rng.choice(sentences)
+        elif kind < 0.65:
+            answer = question.rstrip("?") + "."
+        elif kind < 0.8:
+            answer = " ".join(rng.choice(sentences).split()[:2])
+        elif kind < 0.9:
+            answer = rng.choice(sentences).rstrip(".!?").lower()
+        else:
+            answer = rng.choice(["", "none", "n/a", "..."])
+        questions.append(question)
+        answers.append(answer)
+    return questions, answers
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args):
+    scorer = QualityScorer(dict(HEURISTIC_CRITERIA))
+    resources.get("tokenizer")
+
+    print(f"{'QAs':>6} {'anterior':>12} {'por lotes':>12} {'speedup':>8}")
+    for size in args.sizes:
+        questions, answers = make_qas(size, args.seed)
+        expected = legacy_score(questions, answers)
+        assert scorer.score(questions, answers) == expected, f"{size}: notas distintas"
+
+        legacy_s = best_of(lambda: legacy_score(questions, answers), args.repeat)
+        batch_s = best_of(lambda: scorer.score(questions, answers), args.repeat)
+        print(f"{size:>6} {legacy_s * 1000:10.2f}ms {batch_s * 1000:10.2f}ms {legacy_s / batch_s:7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 256, 4096])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,87 @@
+"""
+/summarizer/traducir/: flujo secuencial anterior (detectar -> traducir ->
+resumir -> traducir de vuelta, con el texto completo) vs. summary_pipeline
+(detección única, traducción y resumen solapados por chunks, vuelta al
+español en lotes paralelos).
+
+Los microservicios son stubs que tardan ms_per_word por palabra y atienden
+una petición a la vez, como un worker CPU.
+
+    # api/
+    python benchmarks/bench_summary_pipeline.py --words 3000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_services import StubServer, create_stub_app  # noqa: E402
+from summary_pipeline import LANGUAGE_MAP, summarize_translate  # noqa: E402
+from upstreams import UpstreamClients  # noqa: E402
+
+SENTENCE = "El modelo de la universidad resume los textos que los estudiantes suben a la plataforma."
+
+
+async def legacy_summarize_translation(translator, summarizer, text: str) -> str:
+    # Flujo anterior de router.summarize_translation
+    resp = await translator.post("/detectar_idioma", json={"text": text})
+    language_name = resp.json().get("language", "en").lower()
+    language = LANGUAGE_MAP.get(language_name, language_name)
+
+    translated = text
+    if language != "en":
+        resp = await translator.post("/traducir_a_ingles", json={"text": text})
+        translated = resp.json()["translation"]
+
+    resp = await summarizer.post("/summarize", json={"text": translated})
+    summary = resp.json()["resumen"]
+
+    if language != "en":
+        resp = await translator.post("/traducir_a_espanol", json={"text": summary})
+        summary = resp.json()["translation"]
+    return summary
+
+
+async def main(words: int, translate_ms: float, summarize_ms: float, repeat: int):
+    sentence_words = len(SENTENCE.split())
+    text = " ".join([SENTENCE] * max(1, words // sentence_words))
+
+    translator_stub = StubServer(create_stub_app("translate", max_concurrency=1, ms_per_word=translate_ms)).start()
+    summarizer_stub = StubServer(create_stub_app("summarizer", max_concurrency=1, ms_per_word=summarize_ms)).start()
+    upstreams = UpstreamClients({"translator": translator_stub.url, "summarizer": summarizer_stub.url})
+    upstreams.open()
+    translator, summarizer = upstreams.get("translator"), upstreams.get("summarizer")
+
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await legacy_summarize_translation(translator, summarizer, text)
+        before = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = await summarize_translate(translator, summarizer, text)
+        after = (time.perf_counter() - start) / repeat * 1000
+    finally:
+        await upstreams.aclose()
+        translator_stub.stop()
+        summarizer_stub.stop()
+
+    print(f"Texto: {len(text.split())} palabras, {result['chunks']} chunks "
+          f"(traducción {translate_ms} ms/palabra, resumen {summarize_ms} ms/palabra)")
+    print(f"secuencial: {before:8.1f} ms")
+    print(f"pipeline:   {after:8.1f} ms  x{before / after:.2f}")
+    print(f"etapas (último pipeline, ms): {result['timings_ms']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=3000)
+    parser.add_argument("--translate-ms", type=float, default=0.5)
+    parser.add_argument("--summarize-ms", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.words, args.translate_ms, args.summarize_ms, args.repeat))
@@ -0,0 +1,91 @@
+"""
+Compara peticiones/segundo del router contra microservicios stub:
+
+- "por petición": un httpx.AsyncClient nuevo por cada salto (comportamiento
+  anterior de router.py).
+- "pool": los clientes compartidos de upstreams.UpstreamClients.
+
+Cada iteración imita /generator/ (tres saltos al servicio qgqa).
+
+    # api/
+    python benchmarks/bench_upstream_pool.py --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_services import StubServer, create_stub_app  # noqa: E402
+from upstreams import DEFAULT_TIMEOUT, UpstreamClients  # noqa: E402
+
+CONTEXT = "Lorem ipsum dolor sit amet. " * 40
+
+
+async def _generator_hops(post):
+    resp = await post("/preprocess-and-chunk", {"translated_context": CONTEXT})
+    chunks = resp.json()["response"]
+    resp = await post("/generate_qa", {"context": chunks})
+    qas = resp.json()["response"]
+    resp = await post("/validate_and_deduplicate", {"gqas": qas})
+    resp.raise_for_status()
+
+
+def per_request_post(url: str):
+    # Un cliente (y conexión) nuevo por salto, como hacía router.py
+    async def post(path: str, body: dict) -> httpx.Response:
+        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+            return await client.post(f"{url}{path}", json=body)
+    return post
+
+
+def pooled_post(client: httpx.AsyncClient):
+    async def post(path: str, body: dict) -> httpx.Response:
+        return await client.post(path, json=body)
+    return post
+
+
+async def run(label: str, fn, total: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await fn()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    rps = total / elapsed
+    print(f"{label:<14} {total} peticiones en {elapsed:.2f}s -> {rps:.1f} req/s")
+    return rps
+
+
+async def main(total: int, concurrency: int):
+    stub = StubServer(create_stub_app("qgqa")).start()
+    try:
+        post = per_request_post(stub.url)
+        before = await run("por petición", lambda: _generator_hops(post), total, concurrency)
+
+        upstreams = UpstreamClients({"text2text": stub.url})
+        upstreams.open()
+        try:
+            post = pooled_post(upstreams.get("text2text"))
+            after = await run("pool", lambda: _generator_hops(post), total, concurrency)
+        finally:
+            await upstreams.aclose()
+
+        print(f"Mejora: x{after / before:.2f}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
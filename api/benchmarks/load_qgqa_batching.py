@@ -0,0 +1,103 @@
+"""
+Prueba de carga del micro-batching de qgqa: throughput vs. concurrencia.
+
+Modo simulado (por defecto): un modelo falso cuyo costo por lote es
+base_ms + per_item_ms * tamaño (como una GPU/CPU que amortiza el lote), con
+un único modelo compartido. Compara llamadas serializadas por petición
+contra qgqa/batching.MicroBatcher.
+
+Modo real: --url http://localhost:8001 envía /generate_qa concurrentes al
+microservicio en ejecución.
+
+    # api/
+    python benchmarks/load_qgqa_batching.py --concurrency 1 4 16 32
+    python benchmarks/load_qgqa_batching.py --url http://localhost:8001 --concurrency 1 4 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "microservices", "qgqa"))
+
+from batching import MicroBatcher  # noqa: E402
+
+CONTEXT = ("The mitochondrion is an organelle found in most eukaryotic cells. "
+           "It generates most of the chemical energy needed by the cell. ") * 4
+
+
+class FakeModel:
+    def __init__(self, base_ms: float, per_item_ms: float):
+        self.base = base_ms / 1000
+        self.per_item = per_item_ms / 1000
+        self.lock = threading.Lock()  # un solo modelo para todos los hilos
+
+    def run(self, prompts: list[str], **kwargs) -> list[str]:
+        with self.lock:
+            time.sleep(self.base + self.per_item * len(prompts))
+        return [p[:10] for p in prompts]
+
+
+def measure(call, concurrency: int, requests_per_worker: int, prompts_per_request: int):
+    prompts = [CONTEXT] * prompts_per_request
+
+    def worker():
+        for _ in range(requests_per_worker):
+            call(prompts)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for f in [pool.submit(worker) for _ in range(concurrency)]:
+            f.result()
+    elapsed = time.perf_counter() - start
+    total = concurrency * requests_per_worker * prompts_per_request
+    return total / elapsed
+
+
+def simulated(args):
+    model = FakeModel(args.base_ms, args.per_item_ms)
+    batcher = MicroBatcher(model.run, args.max_batch_size, args.max_wait_ms)
+    batcher.start()
+    print(f"{'concurrencia':>12} {'serial p/s':>11} {'batched p/s':>12} {'mejora':>7}")
+    try:
+        for c in args.concurrency:
+            serial = measure(lambda p: model.run(p, do_sample=True),
+                             c, args.requests, args.prompts)
+            batched = measure(lambda p: batcher.submit(p, do_sample=True),
+                              c, args.requests, args.prompts)
+            print(f"{c:>12} {serial:>11.1f} {batched:>12.1f} {batched / serial:>6.2f}x")
+    finally:
+        batcher.stop()
+    print(f"Lotes: {batcher.metrics()}")
+
+
+def real(args):
+    import httpx
+
+    client = httpx.Client(base_url=args.url, timeout=600)
+
+    def call(prompts):
+        resp = client.post("/generate_qa", json={"context": prompts})
+        resp.raise_for_status()
+
+    print(f"{'concurrencia':>12} {'prompts/s':>10}")
+    for c in args.concurrency:
+        print(f"{c:>12} {measure(call, c, args.requests, args.prompts):>10.2f}")
+    print(f"Lotes: {client.get('/health').json().get('batching')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="microservicio qgqa real en vez del modelo simulado")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=5, help="peticiones por cliente")
+    parser.add_argument("--prompts", type=int, default=2, help="prompts por petición")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=15)
+    parser.add_argument("--base-ms", type=float, default=80)
+    parser.add_argument("--per-item-ms", type=float, default=6)
+    args = parser.parse_args()
+    real(args) if args.url else simulated(args)
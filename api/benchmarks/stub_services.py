@@ -0,0 +1,156 @@
+"""
+Microservicios falsos (stubs) para benchmarks y pruebas locales del router.
+
+Imitan las rutas de qgqa, translate y summarizer con respuestas fijas y un
+retardo configurable, sin cargar ningún modelo.
+
+    python benchmarks/stub_services.py --port 9001 --delay-ms 5
+"""
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+
+_SPANISH_WORDS = {"el", "la", "de", "que", "y", "los", "las", "en", "un", "una"}
+
+
+def create_stub_app(
+    name: str = "stub",
+    delay_ms: float = 0.0,
+    max_concurrency: int = 0,
+    ms_per_word: float = 0.0
+) -> FastAPI:
+    app = FastAPI()
+    delay = delay_ms / 1000
+    # max_concurrency > 0 imita un worker CPU: atiende esa cantidad de
+    # peticiones a la vez y el resto espera
+    slots = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+
+    async def _wait(words: int = 0):
+        # ms_per_word: las rutas de traducción y resumen tardan según el
+        # largo del texto, como los modelos
+        total = delay + ms_per_word * words / 1000
+        if not total:
+            return
+        if slots is None:
+            await asyncio.sleep(total)
+            return
+        async with slots:
+            await asyncio.sleep(total)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "service": name}
+
+    @app.post("/preprocess-and-chunk")
+    async def chunk(body: dict):
+        await _wait()
+        text = body.get("translated_context", "")
+        return {"response": [text[i:i + 200] for i in range(0, len(text), 200)] or [""]}
+
+    @app.post("/generate_qa")
+    async def generate_qa(body: dict):
+        await _wait()
+        return {"response": [
+            {"context": c, "question": "Why?", "answer": "Because.", "quality": 1.0}
+            for c in body.get("context", [])
+        ]}
+
+    @app.post("/generate_qa_pipeline")
+    async def generate_qa_pipeline(body: dict):
+        await _wait()
+        text = body.get("translated_context", "")
+        return {"response": [
+            {"context": text[i:i + 200], "question": "Why?", "answer": "Because.", "quality": 1.0}
+            for i in range(0, len(text), 200)
+        ]}
+
+    @app.post("/generate_qa_stream")
+    async def generate_qa_stream(body: dict):
+        qas = (await generate_qa_pipeline(body))["response"]
+
+        async def events():
+            for qa in qas:
+                yield json.dumps({"type": "qa", "qa": qa}) + "\n"
+            yield json.dumps({"type": "done", "total": len(qas)}) + "\n"
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    @app.post("/validate_and_deduplicate")
+    async def validate(body: dict):
+        await _wait()
+        return {"response": body.get("gqas", [])}
+
+    @app.post("/detectar_idioma")
+    async def detect(body: dict):
+        await _wait()
+        words = set(body.get("text", "").lower().split())
+        return {"language": "spanish" if len(words & _SPANISH_WORDS) >= 3 else "english"}
+
+    @app.post("/traducir_a_ingles")
+    async def to_en(body: dict):
+        text = body.get("text", "")
+        await _wait(len(text.split()))
+        return {"translation": text}
+
+    @app.post("/traducir_a_espanol")
+    async def to_es(body: dict):
+        text = body.get("text", "")
+        await _wait(len(text.split()))
+        return {"translation": text}
+
+    @app.post("/summarize")
+    async def summarize(body: dict):
+        # Resumen del 30% de las palabras, como mínimo una oración
+        words = body.get("text", "").split()
+        await _wait(len(words))
+        return {"resumen": " ".join(words[:max(10, len(words) * 3 // 10)])}
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class StubServer:
+    """Levanta un stub con uvicorn en un hilo aparte (para usar desde scripts)."""
+
+    def __init__(self, app: FastAPI, port: int | None = None):
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port,
+                                log_level="warning", access_log=False)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self) -> "StubServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--name", default="stub")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--ms-per-word", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.name, args.delay_ms, args.max_concurrency, args.ms_per_word),
+                host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,226 @@
+import asyncio
+import importlib
+import os
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import Callable
+from urllib.parse import unquote
+
+import httpx
+
+
+# =========================================================
+#           MODO EN PROCESO (UN SOLO NODO)
+#
+# EN VEZ DE UN uvicorn POR MICROSERVICIO, EL ROUTER MONTA
+# LAS APPS FastAPI DE qgqa, translate Y summarizer EN SU
+# PROPIO PROCESO: UN SOLO RUNTIME DE PYTHON/TORCH Y SIN
+# SALTO HTTP POR LOOPBACK. LAS RUTAS LLAMAN A LOS MISMOS
+# ENDPOINTS (MISMA INTERFAZ), SOLO CAMBIA EL TRANSPORT DE
+# httpx. CADA MODELO SE CARGA RECIÉN EN SU PRIMER USO.
+# =========================================================
+
+
+MICROSERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "microservices")
+
+
+def import_service_app(module_path: str, extra_path: str | None = None):
+    # qgqa importa sus módulos hermanos como absolutos (from validation
+    # import ...), por lo que su directorio tiene que estar en sys.path
+    if extra_path and extra_path not in sys.path:
+        sys.path.insert(0, extra_path)
+    return importlib.import_module(module_path).app
+
+
+# Upstream del router -> cargador de la app del microservicio
+SERVICE_LOADERS: dict[str, Callable] = {
+    "text2text": lambda: import_service_app(
+        "microservices.qgqa.microservice", os.path.join(MICROSERVICES_DIR, "qgqa")),
+    "translator": lambda: import_service_app("microservices.translate.microservice"),
+    "summarizer": lambda: import_service_app("microservices.summarizer.microservice"),
+}
+
+
+class LazyServiceApp:
+    """
+    App ASGI que importa el microservicio y ejecuta su lifespan al recibir
+    la primera petición. El import pesado (torch, transformers) corre en un
+    hilo; el lifespan corre en el event loop del router, así que las cargas
+    bloqueantes que hace (MODEL_PRELOAD=1) las manda a un hilo con
+    asyncio.to_thread. Sin MODEL_PRELOAD el modelo se carga en la primera
+    petición que lo usa, dentro del threadpool de la ruta.
+    """
+
+    def __init__(self, name: str, loader: Callable):
+        self.name = name
+        self.loader = loader
+        self.app = None
+        self.load_s: float | None = None
+        self.error: str | None = None
+        self._lock = asyncio.Lock()
+        self._stack = AsyncExitStack()
+
+    async def _ensure_loaded(self):
+        if self.app is not None:
+            return self.app
+        async with self._lock:
+            if self.app is not None:
+                return self.app
+            print(f"[ INPROCESS] Cargando '{self.name}'...")
+            start = time.perf_counter()
+            try:
+                app = await asyncio.to_thread(self.loader)
+                await self._stack.enter_async_context(app.router.lifespan_context(app))
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+                raise
+            self.load_s = time.perf_counter() - start
+            self.error = None
+            self.app = app
+            print(f"[ INPROCESS] '{self.name}' listo en {self.load_s:.1f}s")
+        return self.app
+
+    async def __call__(self, scope, receive, send):
+        app = await self._ensure_loaded()
+        await app(scope, receive, send)
+
+    async def aclose(self):
+        # Ejecuta el cierre del lifespan (libera el modelo)
+        await self._stack.aclose()
+        self._stack = AsyncExitStack()
+        self.app = None
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.app is not None,
+            "load_s": round(self.load_s, 2) if self.load_s is not None else None,
+            "error": self.error
+        }
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    def __init__(self, queue: asyncio.Queue, task: asyncio.Task, disconnected: asyncio.Event):
+        self._queue = queue
+        self._task = task
+        self._disconnected = disconnected
+
+    async def __aiter__(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    async def aclose(self):
+        self._disconnected.set()
+        if not self._task.done():
+            self._task.cancel()
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """
+    Como httpx.ASGITransport, pero entrega el cuerpo de la respuesta a
+    medida que la app lo envía (httpx.ASGITransport lo junta entero antes
+    de devolverlo), para que /generator/stream siga emitiendo QA por QA.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = b"".join([chunk async for chunk in request.stream])
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(k.lower(), v) for k, v in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": unquote(request.url.path),
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "server": (request.url.host, request.url.port),
+            "client": ("127.0.0.1", 0),
+        }
+
+        loop = asyncio.get_running_loop()
+        started: asyncio.Future = loop.create_future()
+        chunks: asyncio.Queue = asyncio.Queue()
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if request_sent:
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                started.set_result(message)
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    await chunks.put(message["body"])
+                if not message.get("more_body", False):
+                    await chunks.put(None)
+
+        async def run():
+            try:
+                await self.app(scope, receive, send)
+            except Exception as e:
+                if not started.done():
+                    started.set_exception(e)
+                else:
+                    await chunks.put(e)
+            finally:
+                if not started.done():
+                    started.set_exception(RuntimeError("La app terminó sin responder"))
+                await chunks.put(None)
+
+        task = asyncio.create_task(run())
+        message = await started
+        return httpx.Response(
+            status_code=message["status"],
+            headers=message.get("headers", []),
+            stream=_QueueStream(chunks, task, disconnected)
+        )
+
+
+class InProcessServices:
+    """
+    Reemplazo de ServiceGateway para el modo en proceso: misma interfaz
+    (transport, start, aclose, health), pero cada upstream es la app del
+    microservicio montada en este proceso.
+    """
+
+    def __init__(self, loaders: dict[str, Callable] = SERVICE_LOADERS):
+        self.apps = {name: LazyServiceApp(name, loader) for name, loader in loaders.items()}
+
+    def transport(self, name: str, limits: httpx.Limits | None = None, http2: bool = False) -> httpx.AsyncBaseTransport:
+        # limits/http2 no aplican: no hay conexiones
+        return StreamingASGITransport(self.apps[name])
+
+    async def start(self):
+        pass
+
+    async def aclose(self):
+        for app in self.apps.values():
+            await app.aclose()
+
+    def health(self) -> dict[str, dict]:
+        results = {}
+        for name, app in self.apps.items():
+            stats = app.stats()
+            if stats["error"]:
+                status = "error"
+            else:
+                # Un modelo aún no usado está "idle": se carga en su primera petición
+                status = "active" if stats["loaded"] else "idle"
+            results[name] = {"status": status, "mode": "inprocess", **stats}
+        return results
@@ -0,0 +1,336 @@
+import asyncio
+import math
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+
+# =========================================================
+#                 COLA DE TRABAJOS ASÍNCRONA
+#
+# LAS PETICIONES LARGAS (GENERAR QAs O RESUMIR DOCUMENTOS
+# COMPLETOS) SE ENCOLAN Y DEVUELVEN UN job_id AL INSTANTE.
+# UN POOL ACOTADO DE WORKERS LAS PROCESA POR PRIORIDAD Y,
+# DENTRO DE CADA PRIORIDAD, TURNÁNDOSE ENTRE USUARIOS. EL
+# CLIENTE CONSULTA EL ESTADO O SE SUSCRIBE A LOS EVENTOS.
+# =========================================================
+
+
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "4"))
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", "200"))
+JOBS_MAX_PER_USER = int(os.getenv("JOBS_MAX_PER_USER", "20"))
+JOBS_RESULT_TTL_S = float(os.getenv("JOBS_RESULT_TTL_S", "3600"))
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+TERMINAL_STATES = {"done", "error", "cancelled"}
+
+
+class QueueFullError(Exception):
+    """Admisión rechazada: la cola (o la cuota del usuario) está llena."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(self, kind: str, payload: dict, user: str, priority: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.user = user
+        self.priority = priority
+        self.status = "queued"
+        self.progress: dict = {}
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        # Eventos de progreso para los suscriptores (SSE)
+        self.events: list[dict] = []
+        self._changed = asyncio.Condition()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    async def report(self, event: dict, **progress):
+        """Publica un evento de progreso; progress actualiza el resumen del estado."""
+        self.progress.update(progress)
+        await self._publish(event)
+
+    async def _publish(self, event: dict):
+        async with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    async def _set_status(self, status: str, **fields):
+        self.status = status
+        event = {"type": "status", "status": status}
+        event.update(fields)
+        await self._publish(event)
+
+    async def subscribe(self, start: int = 0):
+        """Itera los eventos desde la posición start hasta que el trabajo termina."""
+        position = start
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.events) > position or self.finished)
+                pending = self.events[position:]
+                done = self.finished
+            for event in pending:
+                yield event
+            position += len(pending)
+            if done and position >= len(self.events):
+                return
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "user": self.user,
+            "priority": self.priority,
+            "status": self.status,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        if include_result and self.status == "done":
+            data["result"] = self.result
+        return data
+
+
+class FairQueue:
+    """
+    Cola por prioridad con turnos entre usuarios: dentro de una prioridad
+    se atiende un trabajo de cada usuario por vuelta, así un usuario con
+    muchos trabajos no deja esperando a los demás.
+    """
+
+    def __init__(self):
+        # prioridad -> (turnos de usuarios, trabajos por usuario)
+        self._levels: dict[int, tuple[deque[str], dict[str, deque[Job]]]] = {
+            level: (deque(), {}) for level in sorted(PRIORITIES.values())
+        }
+        self.size = 0
+
+    def push(self, job: Job):
+        turns, per_user = self._levels[PRIORITIES[job.priority]]
+        if job.user not in per_user:
+            per_user[job.user] = deque()
+            turns.append(job.user)
+        per_user[job.user].append(job)
+        self.size += 1
+
+    def pop(self) -> Job | None:
+        for turns, per_user in self._levels.values():
+            if not turns:
+                continue
+            user = turns.popleft()
+            jobs = per_user[user]
+            job = jobs.popleft()
+            if jobs:
+                turns.append(user)
+            else:
+                del per_user[user]
+            self.size -= 1
+            return job
+        return None
+
+    def remove(self, job: Job) -> bool:
+        turns, per_user = self._levels[PRIORITIES[job.priority]]
+        jobs = per_user.get(job.user)
+        if jobs is None or job not in jobs:
+            return False
+        jobs.remove(job)
+        if not jobs:
+            del per_user[job.user]
+            turns.remove(job.user)
+        self.size -= 1
+        return True
+
+    def position(self, job: Job) -> int | None:
+        # Posición aproximada: trabajos de prioridad mayor o igual por delante
+        ahead = 0
+        for level, (_, per_user) in self._levels.items():
+            if level < PRIORITIES[job.priority]:
+                ahead += sum(len(jobs) for jobs in per_user.values())
+                continue
+            if level == PRIORITIES[job.priority]:
+                jobs = per_user.get(job.user)
+                if jobs is None or job not in jobs:
+                    return None
+                turn = jobs.index(job)
+                # En cada vuelta pasa un trabajo por usuario
+                ahead += sum(min(len(other), turn + 1) for other in per_user.values()) - 1
+                return ahead
+        return None
+
+
+JobHandler = Callable[[Job], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    Trabajos en memoria del proceso del router, procesados por un pool de
+    `workers` tareas asyncio. Admite hasta max_pending trabajos en espera
+    (y max_per_user por usuario); por encima rechaza con QueueFullError
+    e indica cuándo reintentar. Los resultados se guardan result_ttl_s
+    segundos.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOBS_WORKERS,
+        max_pending: int = JOBS_MAX_PENDING,
+        max_per_user: int = JOBS_MAX_PER_USER,
+        result_ttl_s: float = JOBS_RESULT_TTL_S
+    ):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.max_per_user = max_per_user
+        self.result_ttl_s = result_ttl_s
+        self.handlers: dict[str, JobHandler] = {}
+        self.jobs: dict[str, Job] = {}
+        self._queue = FairQueue()
+        self._ready: asyncio.Condition | None = None
+        self._workers: list[asyncio.Task] = []
+        self._running = 0
+        # Media móvil de la duración de los trabajos, para estimar Retry-After
+        self._avg_duration_s = 2.0
+        self.counters = {"submitted": 0, "rejected": 0, "done": 0, "error": 0, "cancelled": 0}
+
+    def register(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+
+    def start(self):
+        if self._workers:
+            return
+        self._ready = asyncio.Condition()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def aclose(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def retry_after(self) -> float:
+        waves = (self._queue.size + self._running) / self.workers
+        return max(1.0, math.ceil(waves * self._avg_duration_s))
+
+    async def submit(self, kind: str, payload: dict, user: str = "anonymous", priority: str = "normal") -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Tipo de trabajo desconocido: '{kind}'")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Prioridad desconocida: '{priority}' (usar {', '.join(PRIORITIES)})")
+
+        self._evict_expired()
+        if self._queue.size >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise QueueFullError("Cola de trabajos llena", self.retry_after())
+        pending_user = sum(1 for j in self.jobs.values() if j.user == user and not j.finished)
+        if pending_user >= self.max_per_user:
+            self.counters["rejected"] += 1
+            raise QueueFullError(
+                f"Demasiados trabajos pendientes para el usuario '{user}'", self.retry_after())
+
+        job = Job(kind, payload, user, priority)
+        self.jobs[job.id] = job
+        self.counters["submitted"] += 1
+        async with self._ready:
+            self._queue.push(job)
+            self._ready.notify()
+        await job._set_status("queued")
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def position(self, job: Job) -> int | None:
+        return self._queue.position(job) if job.status == "queued" else None
+
+    async def cancel(self, job: Job) -> bool:
+        if job.finished:
+            return False
+        if job.status == "queued":
+            self._queue.remove(job)
+        elif job._task is not None:
+            job._task.cancel()
+            return True
+        await self._finish(job, "cancelled")
+        return True
+
+    async def _worker(self):
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: self._queue.size > 0)
+                job = self._queue.pop()
+            await self._run(job)
+
+    async def _run(self, job: Job):
+        handler = self.handlers[job.kind]
+        job.started_at = time.time()
+        self._running += 1
+        await job._set_status("running")
+        job._task = asyncio.create_task(handler(job))
+        try:
+            # shield: cancelar el worker no debe cancelar el handler por su
+            # cuenta, para distinguirlo abajo de un trabajo cancelado
+            job.result = await asyncio.shield(job._task)
+            await self._finish(job, "done")
+        except asyncio.CancelledError:
+            if not job._task.cancelled():
+                # Se canceló el worker (cierre del router), no el trabajo:
+                # el handler se cancela también para que no siga suelto
+                job._task.cancel()
+                await asyncio.gather(job._task, return_exceptions=True)
+                await self._finish(job, "cancelled")
+                raise
+            await self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            print(f"[      JOBS] [{job.id[:8]}] Error en '{job.kind}': {job.error}")
+            await self._finish(job, "error")
+        finally:
+            self._running -= 1
+            job._task = None
+
+    async def _finish(self, job: Job, status: str):
+        job.finished_at = time.time()
+        if status == "done" and job.started_at is not None:
+            duration = job.finished_at - job.started_at
+            self._avg_duration_s = 0.8 * self._avg_duration_s + 0.2 * duration
+        self.counters[status] += 1
+        fields = {"error": job.error} if job.error else {}
+        await job._set_status(status, **fields)
+
+    def _evict_expired(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and now - job.finished_at > self.result_ttl_s
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.size,
+            "running": self._running,
+            "max_pending": self.max_pending,
+            "avg_duration_s": round(self._avg_duration_s, 2),
+            "stored": len(self.jobs),
+            **self.counters
+        }
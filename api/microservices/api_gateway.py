@@ -1 +1,490 @@
-# implementar logica de replicas y balanceo de carga
\ No newline at end of file
+import asyncio
+import glob
+import json
+import os
+import time
+
+import httpx
+
+
+# =========================================================
+#                  API GATEWAY (BALANCEO)
+#
+# CADA MICROSERVICIO PUEDE TENER VARIAS RÉPLICAS (p. ej.
+# VARIOS WORKERS CPU DEL SUMMARIZER). EL ROUTER NO HABLA
+# CON UN PUERTO FIJO: SUS CLIENTES httpx USAN UN TRANSPORT
+# QUE ELIGE LA RÉPLICA CON MENOS PETICIONES EN CURSO,
+# REINTENTA EN OTRA SI LA CONEXIÓN FALLA Y SACA DE ROTACIÓN
+# A LAS QUE FALLAN SEGUIDO O NO RESPONDEN A /health.
+#
+# SI UN SERVICIO ENTERO ESTÁ CAÍDO, SU CIRCUIT BREAKER SE
+# ABRE Y LAS PETICIONES FALLAN AL INSTANTE (503 EN EL
+# ROUTER) EN VEZ DE ESPERAR EL TIMEOUT DE CONEXIÓN.
+# =========================================================
+
+
+# Parámetros por defecto del balanceo
+HEALTH_INTERVAL_S = float(os.getenv("GATEWAY_HEALTH_INTERVAL_S", "5"))
+HEALTH_TIMEOUT_S = float(os.getenv("GATEWAY_HEALTH_TIMEOUT_S", "2"))
+MAX_FAILURES = int(os.getenv("GATEWAY_MAX_FAILURES", "3"))
+EJECTION_S = float(os.getenv("GATEWAY_EJECTION_S", "30"))
+MAX_ATTEMPTS = int(os.getenv("GATEWAY_MAX_ATTEMPTS", "3"))
+BREAKER_FAILURES = int(os.getenv("GATEWAY_BREAKER_FAILURES", "5"))
+BREAKER_RESET_S = float(os.getenv("GATEWAY_BREAKER_RESET_S", "10"))
+
+# Respuestas que indican una réplica caída: se reintenta en otra
+RETRY_STATUS_CODES = {502, 503, 504}
+# Réplica sana pero saturada (limitador de admisión): se reintenta en otra
+# sin contarlo como fallo
+SHED_STATUS_CODES = {429}
+
+
+def _replica_url(ip: str, port: int | str) -> str:
+    # Los servicios escuchan en 0.0.0.0, pero hay que conectarse a una IP concreta
+    if ip in ("0.0.0.0", "::", ""):
+        ip = "127.0.0.1"
+    return f"http://{ip}:{port}"
+
+
+def load_registry(microservices_dir: str) -> dict[str, list[str]]:
+    """
+    Lee los register.json de cada microservicio (los mismos que usa
+    run_microservices.sh) y devuelve {microservicio: [url de cada réplica]}.
+
+    Un register.json puede declarar varias réplicas con la lista opcional
+    "replicas": [{"port": 8012}, {"ip": "10.0.0.5", "port": 8002}, ...];
+    sin ella, el servicio tiene una sola réplica en ip:port.
+    """
+    services: dict[str, list[str]] = {}
+    for path in sorted(glob.glob(os.path.join(microservices_dir, "*", "register.json"))):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        replicas = data.get("replicas") or [{"ip": data["ip"], "port": data["port"]}]
+        services[data["microservice"]] = [
+            _replica_url(r.get("ip", data.get("ip", "127.0.0.1")), r["port"])
+            for r in replicas
+        ]
+    return services
+
+
+class CircuitOpenError(httpx.TransportError):
+    """El servicio está marcado como caído: la petición no se envía."""
+
+    def __init__(self, message: str, *, request: httpx.Request, retry_after: float):
+        super().__init__(message, request=request)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de un servicio completo.
+
+    closed: las peticiones pasan. Tras failure_threshold peticiones fallidas
+    seguidas (ya agotados los reintentos entre réplicas), o si el chequeo de
+    salud no encuentra ninguna réplica viva, pasa a open: todo falla al
+    instante durante reset_timeout segundos. Luego half_open deja pasar una
+    sola petición de prueba; si sale bien se cierra, si no se vuelve a abrir.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET_S):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.trip()
+
+    def record_neutral(self):
+        # Petición cortada sin veredicto (timeout de lectura, cancelación):
+        # libera el turno de prueba para que otra petición lo intente
+        self._probing = False
+
+    def trip(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self._probing = False
+
+    def retry_after(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "retry_after_s": round(self.retry_after(), 1)
+        }
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = httpx.URL(url)
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        # Último chequeo de /health
+        self.status_code: int | None = None
+        self.latency_ms: float | None = None
+        self.checked_at: float | None = None
+        self.error: str | None = None
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+    def stats(self, now: float) -> dict:
+        return {
+            "url": str(self.url),
+            "available": self.available(now),
+            "healthy": self.healthy,
+            "ejected": now < self.ejected_until,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "status_code": self.status_code,
+            "latency_ms": self.latency_ms,
+            "checked_at": self.checked_at,
+            "error": self.error
+        }
+
+
+class ReplicaPool:
+    """
+    Réplicas de un microservicio con balanceo por menos peticiones en curso
+    (least outstanding requests).
+
+    Una réplica con max_failures fallos seguidos queda expulsada ejection_s
+    segundos; una que no responde a /health queda fuera hasta que vuelva a
+    responder. Si ninguna está disponible se intenta igual con todas
+    (la petición de prueba del circuit breaker llega aquí en ese caso).
+    """
+
+    def __init__(
+        self,
+        service: str,
+        urls: list[str],
+        max_failures: int = MAX_FAILURES,
+        ejection_s: float = EJECTION_S,
+        breaker: CircuitBreaker | None = None
+    ):
+        if not urls:
+            raise ValueError(f"El servicio '{service}' no tiene réplicas")
+        self.service = service
+        self.replicas = [Replica(url) for url in urls]
+        self.max_failures = max_failures
+        self.ejection_s = ejection_s
+        self.breaker = breaker or CircuitBreaker()
+
+    def acquire(self, exclude: set[Replica] = frozenset()) -> Replica | None:
+        now = time.monotonic()
+        candidates = [r for r in self.replicas if r not in exclude]
+        available = [r for r in candidates if r.available(now)]
+        if not available and not candidates:
+            return None
+        # A igual carga gana la que atendió menos peticiones (reparto circular)
+        replica = min(available or candidates, key=lambda r: (r.outstanding, r.requests))
+        replica.outstanding += 1
+        replica.requests += 1
+        return replica
+
+    def release(self, replica: Replica, ok: bool | None):
+        """ok=None: la petición terminó sin decir nada sobre la réplica."""
+        replica.outstanding -= 1
+        if ok is None:
+            return
+        if ok:
+            replica.consecutive_failures = 0
+            return
+
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.max_failures:
+            replica.consecutive_failures = 0
+            replica.ejected_until = time.monotonic() + self.ejection_s
+            print(f"[  GATEWAY] Réplica {replica.url} de '{self.service}' "
+                  f"expulsada por {self.ejection_s:.0f}s")
+
+    def set_health(self, replica: Replica, healthy: bool):
+        if replica.healthy != healthy:
+            state = "disponible" if healthy else "sin respuesta en /health"
+            print(f"[  GATEWAY] Réplica {replica.url} de '{self.service}': {state}")
+        replica.healthy = healthy
+
+    def update_circuit(self):
+        # El chequeo de salud abre el circuito si no queda ninguna réplica
+        # viva, y lo cierra en cuanto alguna vuelve
+        alive = any(r.healthy for r in self.replicas)
+        if not alive and self.breaker.state == "closed":
+            print(f"[  GATEWAY] Circuito de '{self.service}' abierto: ninguna réplica responde")
+            self.breaker.trip()
+        elif alive and self.breaker.state != "closed":
+            print(f"[  GATEWAY] Circuito de '{self.service}' cerrado")
+            self.breaker.record_success()
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [r.stats(now) for r in self.replicas]
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    # Mantiene la réplica "en curso" hasta que se termina de leer la respuesta
+    # (importante en streaming, donde el cuerpo llega mucho después)
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._on_close is not None:
+                self._on_close()
+                self._on_close = None
+
+
+class LoadBalancingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport de httpx que reparte las peticiones entre las réplicas de un
+    ReplicaPool. Los clientes usan una base_url simbólica (http://translator)
+    y el transport reescribe host y puerto en cada petición.
+
+    Solo se reintenta cuando la petición no llegó a procesarse (error de
+    conexión) o la réplica respondió 502/503/504 o 429, hasta max_attempts
+    réplicas distintas. Con el circuito abierto lanza CircuitOpenError sin
+    tocar la red.
+    """
+
+    def __init__(
+        self,
+        pool: ReplicaPool,
+        limits: httpx.Limits | None = None,
+        http2: bool = False,
+        max_attempts: int = MAX_ATTEMPTS
+    ):
+        self.pool = pool
+        self.max_attempts = max(1, max_attempts)
+        # Un solo pool de conexiones (por host) para todas las réplicas
+        self._transport = httpx.AsyncHTTPTransport(
+            limits=limits or httpx.Limits(), http2=http2)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = self.pool.breaker
+        if not breaker.allow():
+            retry_after = breaker.retry_after()
+            raise CircuitOpenError(
+                f"Servicio '{self.pool.service}' no disponible (circuito abierto, "
+                f"reintentar en {retry_after:.0f}s)", request=request, retry_after=retry_after)
+
+        tried: set[Replica] = set()
+        while True:
+            replica = self.pool.acquire(exclude=tried)
+            if replica is None:
+                breaker.record_failure()
+                raise httpx.ConnectError(
+                    f"Sin réplicas disponibles para '{self.pool.service}'", request=request)
+            tried.add(replica)
+            retry_left = len(tried) < min(self.max_attempts, len(self.pool.replicas))
+
+            request.url = request.url.copy_with(
+                scheme=replica.url.scheme, host=replica.url.host, port=replica.url.port)
+            request.headers["Host"] = replica.url.netloc.decode("ascii")
+
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                self.pool.release(replica, ok=False)
+                if not retry_left:
+                    breaker.record_failure()
+                    raise
+                print(f"[  GATEWAY] Sin conexión con {replica.url}, reintentando en otra réplica")
+                continue
+            except BaseException:
+                # Timeout de lectura, cancelación...: la réplica puede estar
+                # sana pero lenta, no cuenta como fallo
+                self.pool.release(replica, ok=None)
+                breaker.record_neutral()
+                raise
+
+            if response.status_code in RETRY_STATUS_CODES and retry_left:
+                await response.aclose()
+                self.pool.release(replica, ok=False)
+                print(f"[  GATEWAY] {replica.url} respondió {response.status_code}, "
+                      f"reintentando en otra réplica")
+                continue
+
+            if response.status_code in SHED_STATUS_CODES and retry_left:
+                await response.aclose()
+                self.pool.release(replica, ok=None)
+                print(f"[  GATEWAY] {replica.url} saturada (429), reintentando en otra réplica")
+                continue
+
+            if response.status_code in SHED_STATUS_CODES:
+                # Todas saturadas: el 429 (con su Retry-After) llega al router
+                ok = None
+                breaker.record_neutral()
+            elif response.status_code in RETRY_STATUS_CODES:
+                ok = False
+                breaker.record_failure()
+            else:
+                ok = True
+                breaker.record_success()
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_ReleasingStream(
+                    response.stream, lambda: self.pool.release(replica, ok)),
+                extensions=response.extensions
+            )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ServiceGateway:
+    """
+    Conjunto de ReplicaPool (uno por servicio) más el chequeo activo de
+    salud: cada health_interval segundos consulta /health en todas las
+    réplicas a la vez, cada consulta con un plazo de health_timeout
+    segundos. El resultado queda guardado para el /health del router.
+    """
+
+    def __init__(
+        self,
+        services: dict[str, list[str]],
+        health_interval: float = HEALTH_INTERVAL_S,
+        health_timeout: float = HEALTH_TIMEOUT_S,
+        max_failures: int = MAX_FAILURES,
+        ejection_s: float = EJECTION_S,
+        max_attempts: int = MAX_ATTEMPTS,
+        breaker_failures: int = BREAKER_FAILURES,
+        breaker_reset_s: float = BREAKER_RESET_S
+    ):
+        self.pools = {
+            name: ReplicaPool(
+                name, urls, max_failures=max_failures, ejection_s=ejection_s,
+                breaker=CircuitBreaker(breaker_failures, breaker_reset_s))
+            for name, urls in services.items()
+        }
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.max_attempts = max_attempts
+        self._health_client: httpx.AsyncClient | None = None
+        self._health_task: asyncio.Task | None = None
+        self.last_check: float | None = None
+
+    def transport(
+        self,
+        name: str,
+        limits: httpx.Limits | None = None,
+        http2: bool = False
+    ) -> LoadBalancingTransport:
+        return LoadBalancingTransport(
+            self.pools[name], limits=limits, http2=http2, max_attempts=self.max_attempts)
+
+    async def start(self):
+        if self._health_task is not None:
+            return
+        self._health_client = httpx.AsyncClient(timeout=self.health_timeout)
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def aclose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._health_client is not None:
+            await self._health_client.aclose()
+            self._health_client = None
+
+    async def _check(self, pool: ReplicaPool, replica: Replica):
+        start = time.perf_counter()
+        try:
+            # Plazo total de la consulta (el timeout de httpx es por fase)
+            response = await asyncio.wait_for(
+                self._health_client.get(replica.url.join("/health")), self.health_timeout)
+            replica.status_code = response.status_code
+            replica.error = None
+            healthy = response.status_code == 200
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            replica.status_code = None
+            replica.error = str(e) or type(e).__name__
+            healthy = False
+        replica.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        replica.checked_at = time.time()
+        pool.set_health(replica, healthy)
+
+    async def check_health(self):
+        """Una ronda de chequeos sobre todas las réplicas, en paralelo."""
+        if self._health_client is None:
+            raise RuntimeError("Gateway no iniciado (¿se ejecutó start()?)")
+        await asyncio.gather(*(
+            self._check(pool, replica)
+            for pool in self.pools.values()
+            for replica in pool.replicas
+        ))
+        for pool in self.pools.values():
+            pool.update_circuit()
+        self.last_check = time.time()
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    def stats(self) -> dict[str, list[dict]]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def health(self) -> dict[str, dict]:
+        """Estado de cada servicio según el último chequeo (no consulta la red)."""
+        results = {}
+        for name, pool in self.pools.items():
+            replicas = pool.stats()
+            checked = [r for r in replicas if r["checked_at"] is not None]
+            if not checked:
+                status = "unknown"
+            elif any(r["healthy"] for r in checked):
+                status = "active"
+            elif any(r["status_code"] is not None for r in checked):
+                status = "inactive"
+            else:
+                status = "error"
+            results[name] = {
+                "status": status,
+                "circuit": pool.breaker.stats(),
+                "replicas": replicas
+            }
+        return results
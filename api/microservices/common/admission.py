@@ -0,0 +1,161 @@
+import asyncio
+import math
+import os
+import time
+
+from starlette.responses import JSONResponse
+
+
+# Valores por defecto de la cola de espera de cada modelo
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_MAX_WAIT_S = float(os.getenv("ADMISSION_MAX_WAIT_S", "30"))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Limitador de peticiones en curso para un modelo.
+
+    Deja pasar max_concurrency peticiones a la vez; las siguientes esperan
+    en una cola de a lo sumo max_queue, y como mucho max_wait_s segundos.
+    Con la cola llena (o vencida la espera) la petición se rechaza con
+    AdmissionRejected, que el middleware convierte en 429 con Retry-After.
+    Así una ráfaga no apila hilos peleando por el mismo pipeline.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 1,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_wait_s: float = ADMISSION_MAX_WAIT_S
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        # Medias móviles de espera en cola y de duración de cada petición
+        self._avg_wait_s = 0.0
+        self._avg_service_s: float | None = None
+        self.max_wait_seen_s = 0.0
+        self.counters = {"admitted": 0, "rejected": 0, "timeouts": 0}
+
+    def retry_after(self) -> float:
+        # Tiempo hasta que se vacíe la cola actual, a la velocidad media
+        waves = (self.queued + self.in_flight + 1) / self.max_concurrency
+        return max(1.0, math.ceil(waves * (self._avg_service_s or 1.0)))
+
+    def _reject(self, reason: str, counter: str):
+        self.counters[counter] += 1
+        raise AdmissionRejected(f"Modelo '{self.name}' saturado: {reason}", self.retry_after())
+
+    async def acquire(self) -> float:
+        """Espera un turno y devuelve los segundos esperados."""
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self._reject("cola de espera llena", "rejected")
+
+        start = time.perf_counter()
+        self.queued += 1
+        # La espera se sigue a mano en vez de con wait_for: antes de Python
+        # 3.12 wait_for puede perder un turno ya obtenido si vence o se
+        # cancela justo entonces, y la concurrencia del modelo se achica
+        waiter = asyncio.ensure_future(self._slots.acquire())
+        try:
+            await asyncio.wait((waiter,), timeout=self.max_wait_s)
+        except BaseException:
+            # Cancelada desde afuera (p. ej. el cliente se desconectó)
+            self._abandon(waiter)
+            raise
+        finally:
+            self.queued -= 1
+        if not waiter.done():
+            self._abandon(waiter)
+            self._reject(f"sin turno tras {self.max_wait_s:.0f}s", "timeouts")
+
+        waited = time.perf_counter() - start
+        self.in_flight += 1
+        self.counters["admitted"] += 1
+        self._avg_wait_s = 0.9 * self._avg_wait_s + 0.1 * waited
+        self.max_wait_seen_s = max(self.max_wait_seen_s, waited)
+        return waited
+
+    def _abandon(self, waiter: asyncio.Future):
+        # Si el turno llegó a darse se devuelve; si no, se deja de esperar
+        if waiter.done() and not waiter.cancelled():
+            self._slots.release()
+        else:
+            waiter.cancel()
+
+    def release(self, service_s: float):
+        self.in_flight -= 1
+        if self._avg_service_s is None:
+            self._avg_service_s = service_s
+        else:
+            self._avg_service_s = 0.9 * self._avg_service_s + 0.1 * service_s
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "avg_wait_ms": round(self._avg_wait_s * 1000, 1),
+            "max_wait_ms": round(self.max_wait_seen_s * 1000, 1),
+            "avg_service_ms": round((self._avg_service_s or 0.0) * 1000, 1),
+            **self.counters
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI que pasa cada ruta de `limiters` por su AdmissionLimiter
+    antes de llegar al endpoint (y antes de ocupar un hilo del threadpool).
+    El turno se libera al terminar de enviar la respuesta, así que las
+    respuestas en streaming lo mantienen mientras generan.
+
+        app.add_middleware(AdmissionMiddleware, limiters={"/summarize": limiter})
+    """
+
+    def __init__(self, app, limiters: dict[str, AdmissionLimiter]):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        limiter = self.limiters.get(scope.get("path")) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            waited = await limiter.acquire()
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": str(e)},
+                status_code=429,
+                headers={"Retry-After": str(int(e.retry_after))}
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_wait(message):
+            # Tiempo en cola visible para el cliente (y para el gateway)
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-queue-wait-ms", f"{waited * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_wait)
+        finally:
+            limiter.release(time.perf_counter() - start)
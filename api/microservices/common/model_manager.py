@@ -0,0 +1,335 @@
+import gc
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable
+
+
+# Segundos sin uso tras los que se descarga un modelo (0 = nunca)
+MODEL_IDLE_TIMEOUT_S = float(os.getenv("MODEL_IDLE_TIMEOUT_S", "900"))
+# Memoria máxima para los modelos cargados del proceso, en MB (0 = sin límite)
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+# MODEL_PRELOAD=1 carga los modelos en el lifespan, como antes
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "0") == "1"
+
+
+def process_rss_mb() -> float | None:
+    """Memoria residente del proceso (solo Linux; None si no se puede leer)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def estimate_size_mb(obj: Any, depth: int = 3) -> float | None:
+    """
+    Suma parámetros y buffers de los módulos torch alcanzables desde obj
+    (p. ej. TranslateModel -> pipeline -> modelo). None si no encuentra
+    ninguno.
+    """
+    seen_tensors: set[int] = set()
+    seen_objects: set[int] = set()
+    total = 0
+    found = False
+
+    def visit(value: Any, level: int):
+        nonlocal total, found
+        if id(value) in seen_objects or isinstance(value, (str, bytes, int, float, bool, type(None))):
+            return
+        seen_objects.add(id(value))
+        if callable(getattr(value, "parameters", None)) and callable(getattr(value, "buffers", None)):
+            found = True
+            for tensor in (*value.parameters(), *value.buffers()):
+                if tensor.data_ptr() not in seen_tensors:
+                    seen_tensors.add(tensor.data_ptr())
+                    total += tensor.numel() * tensor.element_size()
+            return
+        if level >= depth:
+            return
+        if isinstance(value, dict):
+            children = value.values()
+        elif isinstance(value, (list, tuple)):
+            children = value
+        else:
+            children = getattr(value, "__dict__", {}).values()
+        for child in children:
+            visit(child, level + 1)
+
+    visit(obj, 0)
+    return total / (1024 * 1024) if found else None
+
+
+def _empty_cuda_cache():
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class _ManagedModel:
+    def __init__(self, name: str, loader: Callable[[], Any], unloader: Callable[[Any], None] | None,
+                 size_mb: float | None, idle_timeout_s: float | None):
+        self.name = name
+        self.loader = loader
+        self.unloader = unloader
+        self.idle_timeout_s = idle_timeout_s
+        self.model: Any = None
+        # Tamaño medido en la última carga (o el declarado al registrar)
+        self.size_mb = size_mb
+        self.in_use = 0
+        self.last_used = 0.0
+        self.load_s: float | None = None
+        self.loads = 0
+        self.evictions = 0
+        self.error: str | None = None
+        # Las primeras peticiones concurrentes esperan una sola carga
+        self.load_lock = threading.Lock()
+
+
+class ModelManager:
+    """
+    Ciclo de vida de los modelos de un proceso.
+
+    Cada modelo se registra con su función de carga y se carga en su primer
+    uso; las peticiones que llegan mientras carga esperan esa misma carga.
+    Un hilo en segundo plano descarga los que llevan idle_timeout_s sin
+    usarse, y si la suma de los cargados pasa memory_budget_mb se descargan
+    primero los usados hace más tiempo (nunca uno en uso).
+
+        models.register("to_en", lambda: TranslateModel(...))
+        with models.use("to_en") as translator:
+            translator.translate(text)
+    """
+
+    def __init__(
+        self,
+        idle_timeout_s: float = MODEL_IDLE_TIMEOUT_S,
+        memory_budget_mb: float = MODEL_MEMORY_BUDGET_MB,
+        max_events: int = 50
+    ):
+        self.idle_timeout_s = idle_timeout_s
+        self.memory_budget_mb = memory_budget_mb
+        self._models: dict[str, _ManagedModel] = {}
+        self._lock = threading.Lock()
+        self.events: deque[dict] = deque(maxlen=max_events)
+        self._sweeper: threading.Thread | None = None
+        self._stop = threading.Event()
+        # Servicios que usan el hilo de limpieza (en modo en proceso son varios)
+        self._users = 0
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        unloader: Callable[[Any], None] | None = None,
+        size_mb: float | None = None,
+        idle_timeout_s: float | None = None
+    ):
+        if name in self._models:
+            raise ValueError(f"Modelo ya registrado: '{name}'")
+        self._models[name] = _ManagedModel(name, loader, unloader, size_mb, idle_timeout_s)
+
+    # ---------------- USO ----------------
+
+    def acquire(self, name: str) -> Any:
+        """Devuelve el modelo (cargándolo si hace falta) y lo marca en uso."""
+        entry = self._models[name]
+        with self._lock:
+            entry.in_use += 1
+            entry.last_used = time.monotonic()
+            if entry.model is not None:
+                return entry.model
+        try:
+            with entry.load_lock:
+                if entry.model is None:
+                    self._load(entry)
+        except BaseException:
+            with self._lock:
+                entry.in_use -= 1
+            raise
+        return entry.model
+
+    def release(self, name: str):
+        entry = self._models[name]
+        with self._lock:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+
+    @contextmanager
+    def use(self, name: str):
+        model = self.acquire(name)
+        try:
+            yield model
+        finally:
+            self.release(name)
+
+    def peek(self, name: str) -> Any | None:
+        """El modelo si ya está cargado, sin cargarlo ni marcarlo en uso."""
+        return self._models[name].model
+
+    def preload(self, *names: str):
+        for name in names:
+            with self.use(name):
+                pass
+
+    # ---------------- CARGA Y DESCARGA ----------------
+
+    def _record(self, event: str, entry: _ManagedModel, **fields):
+        record = {"time": time.time(), "event": event, "model": entry.name, **fields}
+        self.events.append(record)
+        details = ", ".join(f"{k}={v}" for k, v in fields.items())
+        print(f"[    MODELS] {event} '{entry.name}'" + (f" ({details})" if details else ""))
+
+    def _load(self, entry: _ManagedModel):
+        # Con el tamaño conocido de una carga anterior se hace lugar antes
+        self._make_room(keep=entry, incoming_mb=entry.size_mb or 0.0)
+
+        rss_before = process_rss_mb()
+        start = time.perf_counter()
+        try:
+            model = entry.loader()
+        except Exception as e:
+            entry.error = str(e) or type(e).__name__
+            self._record("load_error", entry, error=entry.error)
+            raise
+        load_s = time.perf_counter() - start
+
+        # Pesos de torch; si no hay, el tamaño declarado al registrar y en
+        # último caso lo que creció la memoria del proceso durante la carga
+        size_mb = estimate_size_mb(model) or entry.size_mb
+        if size_mb is None:
+            rss_after = process_rss_mb()
+            if rss_before is not None and rss_after is not None:
+                size_mb = max(0.0, rss_after - rss_before)
+
+        with self._lock:
+            entry.model = model
+            entry.size_mb = size_mb
+            entry.load_s = load_s
+            entry.loads += 1
+            entry.error = None
+            entry.last_used = time.monotonic()
+        self._record("load", entry, load_s=round(load_s, 2),
+                     size_mb=round(entry.size_mb, 1) if entry.size_mb is not None else None)
+
+        # Con el tamaño real ya medido
+        self._make_room(keep=entry, incoming_mb=0.0)
+
+    def _resident_mb(self) -> float:
+        return sum((e.size_mb or 0.0 for e in self._models.values() if e.model is not None), 0.0)
+
+    def _make_room(self, keep: _ManagedModel, incoming_mb: float):
+        if self.memory_budget_mb <= 0:
+            return
+        while True:
+            with self._lock:
+                if self._resident_mb() + incoming_mb <= self.memory_budget_mb:
+                    return
+                candidates = [
+                    e for e in self._models.values()
+                    if e is not keep and e.model is not None and e.in_use == 0
+                ]
+                if not candidates:
+                    print(f"[    MODELS] Presupuesto de {self.memory_budget_mb:.0f} MB excedido: "
+                          f"todos los modelos cargados están en uso")
+                    return
+                victim = min(candidates, key=lambda e: e.last_used)
+            self._unload(victim, reason="memory")
+
+    def _unload(self, entry: _ManagedModel, reason: str, force: bool = False) -> bool:
+        with self._lock:
+            if entry.model is None or (entry.in_use and not force):
+                return False
+            model = entry.model
+            entry.model = None
+            entry.evictions += 1
+        if entry.unloader is not None:
+            entry.unloader(model)
+        del model
+        gc.collect()
+        _empty_cuda_cache()
+        self._record("evict", entry, reason=reason)
+        return True
+
+    def unload(self, *names: str):
+        """Descarga los modelos indicados (todos si no se indica ninguno)."""
+        for name in names or list(self._models):
+            self._unload(self._models[name], reason="shutdown", force=True)
+
+    def sweep(self) -> list[str]:
+        """Descarga los modelos que superaron su tiempo sin uso."""
+        now = time.monotonic()
+        evicted = []
+        for entry in list(self._models.values()):
+            timeout = entry.idle_timeout_s if entry.idle_timeout_s is not None else self.idle_timeout_s
+            if timeout <= 0 or entry.model is None or entry.in_use:
+                continue
+            if now - entry.last_used >= timeout and self._unload(entry, reason="idle"):
+                evicted.append(entry.name)
+        return evicted
+
+    # ---------------- HILO DE LIMPIEZA ----------------
+
+    def start(self):
+        with self._lock:
+            self._users += 1
+            if self._sweeper is not None:
+                return
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="model-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop(self):
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users or self._sweeper is None:
+                return
+            sweeper, self._sweeper = self._sweeper, None
+        self._stop.set()
+        sweeper.join()
+
+    def _sweep_loop(self):
+        timeouts = [self.idle_timeout_s] + [
+            e.idle_timeout_s for e in self._models.values() if e.idle_timeout_s is not None]
+        active = [t for t in timeouts if t > 0]
+        interval = min(30.0, max(0.5, min(active) / 4)) if active else 30.0
+        while not self._stop.wait(interval):
+            self.sweep()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = {
+                e.name: {
+                    "loaded": e.model is not None,
+                    "in_use": e.in_use,
+                    "size_mb": round(e.size_mb, 1) if e.size_mb is not None else None,
+                    "idle_s": round(now - e.last_used, 1) if e.model is not None else None,
+                    "load_s": round(e.load_s, 2) if e.load_s is not None else None,
+                    "loads": e.loads,
+                    "evictions": e.evictions,
+                    "error": e.error
+                }
+                for e in self._models.values()
+            }
+            resident = self._resident_mb()
+        rss = process_rss_mb()
+        return {
+            "models": models,
+            "resident_mb": round(resident, 1),
+            "budget_mb": self.memory_budget_mb or None,
+            "idle_timeout_s": self.idle_timeout_s or None,
+            "process_rss_mb": round(rss, 1) if rss is not None else None,
+            "events": list(self.events)[-10:]
+        }
+
+
+# Un gestor por proceso: en el modo en proceso del router todos los
+# microservicios comparten el mismo presupuesto de memoria
+model_manager = ModelManager()
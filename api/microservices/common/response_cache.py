@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+# Directorio del nivel en disco ("" lo desactiva) y límites por defecto
+CACHE_DIR = os.getenv(
+    "RESPONSE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "herramienta-estudio-ia")
+)
+CACHE_MEMORY_ITEMS = int(os.getenv("RESPONSE_CACHE_MEMORY_ITEMS", "256"))
+CACHE_DISK_MB = float(os.getenv("RESPONSE_CACHE_DISK_MB", "512"))
+# Un acierto en disco solo actualiza last_access si el valor guardado es
+# más viejo que esto (evita una escritura por lectura)
+CACHE_TOUCH_S = 60.0
+# Cada cuánto se vuelve a leer el tamaño real del archivo (otras réplicas
+# también escriben); entre lecturas se lleva la cuenta en este proceso
+CACHE_RESYNC_S = 60.0
+
+
+def normalize_text(text: str) -> str:
+    # Mismo contenido con distinto espaciado produce la misma clave; los
+    # saltos de línea se conservan porque cambian la salida de la traducción
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+class ResponseCache:
+    """
+    Caché de salidas de modelos direccionada por contenido.
+
+    La clave es un sha256 del texto normalizado, el nombre del modelo y los
+    parámetros de generación. Tiene dos niveles: un LRU en memoria y un
+    SQLite en disco con desalojo por tamaño (se borran primero las entradas
+    usadas hace más tiempo). Los valores deben ser serializables a JSON.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        memory_items: int = CACHE_MEMORY_ITEMS,
+        disk_dir: str | None = CACHE_DIR,
+        disk_max_mb: float = CACHE_DISK_MB,
+    ):
+        self.namespace = namespace
+        self.memory_items = memory_items
+        self.disk_max_bytes = int(disk_max_mb * 1024 * 1024)
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._db: sqlite3.Connection | None = None
+        self._disk_bytes = 0
+        self._disk_synced_at = 0.0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(disk_dir, f"{namespace}.sqlite3"), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)")
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+            self._db.commit()
+            self._sync_disk_bytes()
+
+    def make_key(self, text: str, model: str, params: dict | None = None) -> str:
+        payload = json.dumps(
+            [self.namespace, model, params or {}, normalize_text(text)],
+            sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, last_access FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    now = time.time()
+                    if now - row[1] > CACHE_TOUCH_S:
+                        self._db.execute(
+                            "UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.counters["disk_hits"] += 1
+                    return value
+
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is None:
+                return
+
+            encoded = json.dumps(value, ensure_ascii=False)
+            size = len(encoded.encode("utf-8"))
+            previous = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, encoded, size, time.time()))
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            # Varias réplicas pueden compartir el archivo: cada tanto (y antes
+            # de desalojar) se relee el tamaño real en vez de la cuenta propia
+            if time.monotonic() - self._disk_synced_at > CACHE_RESYNC_S:
+                self._sync_disk_bytes()
+            self._evict_disk()
+            self._db.commit()
+
+    def get_or_compute(self, text: str, model: str, params: dict | None, compute: Callable[[], Any]) -> Any:
+        key = self.make_key(text, model, params)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = sum(v for k, v in self.counters.items() if k != "evictions")
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            return {
+                **self.counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes if self._db is not None else None,
+            }
+
+    def _remember(self, key: str, value: Any):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _sync_disk_bytes(self):
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._disk_synced_at = time.monotonic()
+
+    def _evict_disk(self):
+        if self._disk_bytes <= self.disk_max_bytes:
+            return
+        # Otra réplica pudo haber desalojado ya
+        self._sync_disk_bytes()
+        if self._disk_bytes <= self.disk_max_bytes:
+            return
+        # Se libera hasta el 90% del límite para no desalojar en cada escritura
+        target = int(self.disk_max_bytes * 0.9)
+        rows = self._db.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            # Otra réplica pudo haberla borrado ya
+            if self._db.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount:
+                self._disk_bytes -= size
+                self.counters["evictions"] += 1
@@ -1,19 +1,96 @@
-from transformers.pipelines import pipeline
+from .batching import beam_token_budget, token_budget_batches
+from .inference_backend import build_pipeline
+from typing import Callable
+import threading
+import time
 import unicodedata
 import re
 
 class FlanT5Text2TextGenerator:
 
-    def __init__(self, model: str, tokenizer: str, uses_cuda: bool):
+    def __init__(
+        self,
+        model: str,
+        tokenizer: str,
+        uses_cuda: bool,
+        batch_size: int = 16,
+        backend: str = "torch",
+        max_batch_tokens: int = 4096,
+        max_beam_tokens: int = 16384
+    ):
         print("Initializating generator")
-        print(f"Pipeline\ntask: text2text-generation\nmodel: {model}\ntokenizer: {tokenizer}\nuses_cuda: {uses_cuda}")
+        print(f"Pipeline\ntask: text2text-generation\nmodel: {model}\ntokenizer: {tokenizer}\nuses_cuda: {uses_cuda}\nbackend: {backend}")
 
-        self.generator = pipeline(
+        self.generator = build_pipeline(
             "text2text-generation",
-            model=model,
-            tokenizer=tokenizer,
-            device=0 if uses_cuda else -1
+            model,
+            tokenizer,
+            uses_cuda=uses_cuda,
+            backend=backend
         )
+        self.backend = backend
+        self.batch_size = batch_size
+        # Tokens por lote contando el padding (prompts x largo del mayor)
+        self.max_batch_tokens = max_batch_tokens
+        # Con beam search: tokens x num_beams por lote (ver beam_token_budget)
+        self.max_beam_tokens = max_beam_tokens
+        self.stats = {"batches": 0, "prompts": 0, "tokens": 0, "padded_tokens": 0, "seconds": 0.0}
+        self._stats_lock = threading.Lock()
+        # Por defecto los lotes van directo al pipeline; el microservicio
+        # puede reemplazarlo por un planificador que junte varias peticiones
+        self.dispatch: Callable[..., list[str]] = self.run_prompts
+
+    def set_dispatcher(self, dispatch: Callable[..., list[str]]):
+        self.dispatch = dispatch
+
+    def _prompt_lengths(self, prompts: list[str]) -> list[int]:
+        encoded = self.generator.tokenizer(prompts, truncation=True)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    def run_prompts(self, prompts: list[str], **gen_kwargs) -> list[str]:
+        """
+        Ejecuta los prompts en lotes reales: ordenados por largo y agrupados
+        bajo max_batch_tokens (con padding), para que un prompt largo no
+        obligue a rellenar a todos los cortos. Devuelve las salidas en el
+        orden de entrada.
+        """
+        if not prompts:
+            return []
+        lengths = self._prompt_lengths(prompts)
+        # Con beam search cada prompt ocupa num_beams secuencias del lote
+        budget = beam_token_budget(self.max_batch_tokens, self.max_beam_tokens, gen_kwargs.get("num_beams", 1))
+        batches = token_budget_batches(lengths, budget, self.batch_size)
+
+        start = time.perf_counter()
+        outputs: list[str] = [""] * len(prompts)
+        for batch in batches:
+            results = self.generator([prompts[i] for i in batch], batch_size=len(batch), **gen_kwargs)
+            for i, out in zip(batch, results):
+                outputs[i] = out["generated_text"].strip()
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.stats["batches"] += len(batches)
+            self.stats["prompts"] += len(prompts)
+            self.stats["tokens"] += sum(lengths)
+            self.stats["padded_tokens"] += sum(len(b) * max(lengths[i] for i in b) for b in batches)
+            self.stats["seconds"] += elapsed
+        return outputs
+
+    def metrics(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            "batch_size": self.batch_size,
+            "max_batch_tokens": self.max_batch_tokens,
+            "max_beam_tokens": self.max_beam_tokens,
+            "batches": stats["batches"],
+            "prompts": stats["prompts"],
+            "avg_batch": round(stats["prompts"] / stats["batches"], 2) if stats["batches"] else 0,
+            # Fracción de tokens útiles (el resto es padding)
+            "padding_efficiency": round(stats["tokens"] / stats["padded_tokens"], 3) if stats["padded_tokens"] else None,
+            "prompts_per_s": round(stats["prompts"] / stats["seconds"], 2) if stats["seconds"] else 0.0,
+        }
 
     def generate_question(self, id: str, context: str) -> str:
         print(f"[QG] [{id}] Contexto {context[:20]}..., lenght: {len(context)}")
@@ -67,7 +144,7 @@ class FlanT5Text2TextGenerator:
         print(f"[AG] [{id}] Respuesta generada: {a_text[:20]}..., lenght: {len(a_text)}")
         return a_text
 
-    def generate_questions_batch(self, id: str, contexts: list[str]) -> list[str]:
+    def generate_questions_batch(self, id: str, contexts: list[str], **gen_kwargs) -> list[str]:
         prompts = [
             f"Generate a question based on the following context."
             "Don't make a multiple answer question. Only open-ended questions\n\n"
@@ -76,10 +153,11 @@ class FlanT5Text2TextGenerator:
             for ctx in contexts
         ]
         print(f"[BATCH-QG] [{id}] Procesando {len(prompts)} contextos...")
-        outputs = self.generator(prompts, do_sample=True)
-        return [out["generated_text"].strip() for out in outputs]
+        # Sin parámetros (p. ej. un perfil de decodificación) se muestrea
+        # con los largos por defecto del modelo
+        return self.dispatch(prompts, **(gen_kwargs or {"do_sample": True}))
 
-    def generate_answers_batch(self, id: str, questions: list[str], contexts: list[str]) -> list[str]:
+    def generate_answers_batch(self, id: str, questions: list[str], contexts: list[str], **gen_kwargs) -> list[str]:
         assert len(questions) == len(contexts), "questions y contexts deben tener la misma longitud"
         prompts = [
             "You are teacher making a test. "
@@ -90,17 +168,15 @@ class FlanT5Text2TextGenerator:
             for q, ctx in zip(questions, contexts)
         ]
         print(f"[BATCH-AG] [{id}] Procesando {len(prompts)} preguntas-contextos...")
-        outputs = self.generator(
-            prompts,
-            num_beams=5,
-            early_stopping=True,
-            length_penalty=1.2,
-            do_sample=True,
-            temperature=0.7,
-            top_k=50,
-            top_p=0.9,
-        )
-        return [out["generated_text"].strip() for out in outputs]
+        return self.dispatch(prompts, **(gen_kwargs or {
+            "num_beams": 5,
+            "early_stopping": True,
+            "length_penalty": 1.2,
+            "do_sample": True,
+            "temperature": 0.7,
+            "top_k": 50,
+            "top_p": 0.9,
+        }))
 
     def proccess_input(self, id: str, plain_text: str) -> str:
         text = unicodedata.normalize("NFKC", plain_text)
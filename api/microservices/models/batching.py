@@ -0,0 +1,46 @@
+def sorted_batches(lengths: list[int], batch_size: int) -> list[list[int]]:
+    """
+    Índices agrupados en lotes de hasta batch_size, ordenados por largo
+    para que cada lote rellene (padding) lo mínimo posible. El llamador
+    debe devolver los resultados a su posición original.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batch_size = max(1, batch_size)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def token_budget_batches(lengths: list[int], max_tokens: int, max_batch_size: int = 0) -> list[list[int]]:
+    """
+    Índices ordenados por largo y agrupados en lotes cuyo costo con padding
+    (elementos del lote x largo del mayor) no supera max_tokens: muchos
+    elementos cortos por lote y pocos largos. max_batch_size > 0 limita
+    además la cantidad por lote. Un elemento que por sí solo supera el
+    presupuesto queda en su propio lote. El llamador debe devolver los
+    resultados a su posición original.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches: list[list[int]] = []
+    current: list[int] = []
+    for i in order:
+        # De menor a mayor: el que entra es el más largo del lote
+        full = max_batch_size > 0 and len(current) >= max_batch_size
+        if current and (full or (len(current) + 1) * lengths[i] > max_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def beam_token_budget(max_tokens: int, max_beam_tokens: int, num_beams: int = 1) -> int:
+    """
+    Presupuesto de token_budget_batches para una generación con num_beams:
+    cada prompt ocupa num_beams secuencias del lote, que se miden contra
+    max_beam_tokens (mayor que max_tokens, que sigue siendo el tope del
+    encoder). Sin beam search es max_tokens.
+    """
+    num_beams = max(1, num_beams)
+    if num_beams == 1:
+        return max(1, max_tokens)
+    return max(1, min(max_tokens, max_beam_tokens // num_beams))
@@ -0,0 +1,162 @@
+import os
+import shutil
+
+from transformers import AutoTokenizer
+from transformers.pipelines import Pipeline, pipeline
+
+
+# =========================================================
+#              BACKENDS DE INFERENCIA (CPU)
+#
+# LOS TRES MODELOS (flan-t5, Marian, BART) SON SEQ2SEQ Y SE
+# USAN A TRAVÉS DE UN PIPELINE DE transformers. ESTE MÓDULO
+# ARMA ESE PIPELINE SOBRE EL BACKEND ELEGIDO:
+#
+#   torch       pytorch fp32 (el comportamiento de siempre)
+#   torch-int8  pytorch con cuantización dinámica int8 de las
+#               capas Linear (solo CPU)
+#   onnx        ONNX Runtime: encoder y decoder exportados,
+#               con decoder que reutiliza past key values
+#   onnx-int8   lo anterior con cuantización dinámica int8
+#
+# onnx y onnx-int8 necesitan optimum[onnxruntime]. La
+# exportación se hace una vez y se guarda en disco.
+# =========================================================
+
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Backend por defecto de todos los servicios; cada uno se puede cambiar
+# con <SERVICIO>_BACKEND (QGQA_BACKEND, TRANSLATE_BACKEND, SUMMARIZER_BACKEND)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+
+# Modelos exportados (y cuantizados) a ONNX
+ONNX_CACHE_DIR = os.getenv(
+    "INFERENCE_ONNX_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "herramienta-estudio-ia", "onnx")
+)
+
+_ONNX_FILES = ("encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx")
+
+
+def backend_for(service: str) -> str:
+    backend = os.getenv(f"{service.upper()}_BACKEND", INFERENCE_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Backend de inferencia desconocido para '{service}': '{backend}' (usar {', '.join(BACKENDS)})")
+    return backend
+
+
+def cache_model_id(model_name: str, backend: str) -> str:
+    """
+    Nombre del modelo para las claves de caché: las salidas cuantizadas
+    difieren un poco de las fp32, así que cada backend tiene las suyas.
+    Con torch se conserva el nombre de siempre (la caché existente sigue
+    valiendo).
+    """
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def build_pipeline(
+    task: str,
+    model_name: str,
+    tokenizer_name: str | None = None,
+    uses_cuda: bool = False,
+    backend: str = "torch"
+) -> Pipeline:
+    """Pipeline de transformers para `task` con el modelo cargado en `backend`."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de inferencia desconocido: '{backend}' (usar {', '.join(BACKENDS)})")
+    tokenizer_name = tokenizer_name or model_name
+
+    if backend == "torch" or (uses_cuda and backend == "torch-int8"):
+        if backend != "torch":
+            print(f"[   BACKEND] [{model_name}] int8 dinámico es solo para CPU: se usa torch con CUDA")
+        return pipeline(
+            task,
+            model=model_name,
+            tokenizer=tokenizer_name,
+            device=0 if uses_cuda else -1
+        )
+
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    if backend == "torch-int8":
+        model = _load_torch_int8(model_name)
+        return pipeline(task, model=model, tokenizer=tokenizer, device=-1)
+
+    model = _load_onnx(model_name, quantized=backend == "onnx-int8", uses_cuda=uses_cuda)
+    return pipeline(task, model=model, tokenizer=tokenizer)
+
+
+def _load_torch_int8(model_name: str):
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.eval()
+    # Pesos de las capas Linear en int8; las activaciones se cuantizan al
+    # vuelo en cada llamada
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _onnx_dir(model_name: str, suffix: str = "") -> str:
+    return os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "--") + suffix)
+
+
+def _load_onnx(model_name: str, quantized: bool, uses_cuda: bool):
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise RuntimeError(
+            "El backend onnx necesita optimum con onnxruntime: "
+            "pip install \"optimum[onnxruntime]\"") from e
+
+    provider = "CUDAExecutionProvider" if uses_cuda else "CPUExecutionProvider"
+    export_dir = _onnx_dir(model_name)
+
+    if not all(os.path.exists(os.path.join(export_dir, f)) for f in _ONNX_FILES):
+        print(f"[   BACKEND] [{model_name}] Exportando a ONNX en {export_dir} (solo la primera vez)...")
+        # use_cache: el decoder reutiliza las claves/valores de los pasos
+        # anteriores en vez de recalcular toda la secuencia en cada token
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            model_name, export=True, use_cache=True, use_merged=False)
+        model.save_pretrained(export_dir)
+
+    if not quantized:
+        return ORTModelForSeq2SeqLM.from_pretrained(
+            export_dir, use_cache=True, use_merged=False, provider=provider)
+
+    quantized_dir = _onnx_dir(model_name, "-int8")
+    quantized_files = [f.replace(".onnx", "_quantized.onnx") for f in _ONNX_FILES]
+    if not all(os.path.exists(os.path.join(quantized_dir, f)) for f in quantized_files):
+        _quantize_onnx(model_name, export_dir, quantized_dir)
+
+    encoder, decoder, decoder_with_past = quantized_files
+    return ORTModelForSeq2SeqLM.from_pretrained(
+        quantized_dir,
+        encoder_file_name=encoder,
+        decoder_file_name=decoder,
+        decoder_with_past_file_name=decoder_with_past,
+        use_cache=True,
+        use_merged=False,
+        provider=provider
+    )
+
+
+def _quantize_onnx(model_name: str, export_dir: str, quantized_dir: str):
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    print(f"[   BACKEND] [{model_name}] Cuantizando a int8 en {quantized_dir}...")
+    # Cuantización dinámica (sin datos de calibración), por canal
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=True)
+    for file_name in _ONNX_FILES:
+        quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=file_name)
+        quantizer.quantize(save_dir=quantized_dir, quantization_config=config)
+    # Config y tokenizer junto a los .onnx cuantizados
+    for name in os.listdir(export_dir):
+        if not name.endswith(".onnx"):
+            source = os.path.join(export_dir, name)
+            target = os.path.join(quantized_dir, name)
+            if os.path.isfile(source) and not os.path.exists(target):
+                shutil.copyfile(source, target)
@@ -1,20 +1,68 @@
-from transformers import pipeline
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
 import transformers
 
+from .batching import sorted_batches
+from .inference_backend import build_pipeline
+from .text_splitting import chunk_by_token_budget
+
+
+# Pipeline propio de cada proceso del pool (modo CPU multiproceso)
+_worker_model = None
+
+
+def _init_worker(model_name: str, num_threads: int, backend: str):
+    global _worker_model
+    import torch
+    torch.set_num_threads(num_threads)
+    _worker_model = build_pipeline("summarization", model_name, backend=backend)
+
+
+def _worker_summarize(texts: list[str], kwargs: dict) -> list[str]:
+    results = _worker_model(texts, batch_size=len(texts), **kwargs)
+    return [r["summary_text"] for r in results]
+
+
 class SummarizerModel:
-    def __init__(self, model_name: str, uses_cuda: bool = False):
-        self.model = pipeline(
-            "summarization",
-            model=model_name,
-            device=0 if uses_cuda else -1
-        )
-
-    def _split_text(self, text: str, max_words: int = 800):
-        words = text.split()
-        chunks = [words[i:i+max_words] for i in range(0, len(words), max_words)]
-        return [" ".join(chunk) for chunk in chunks]
+    def __init__(
+        self,
+        model_name: str,
+        uses_cuda: bool = False,
+        batch_size: int = 4,
+        num_workers: int = 0,
+        max_depth: int = 4,
+        max_chunk_tokens: int | None = None,
+        backend: str = "torch"
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.model = build_pipeline("summarization", model_name, uses_cuda=uses_cuda, backend=backend)
+        self.tokenizer = self.model.tokenizer
+        # Ventana del modelo (1024 en BART) menos tokens especiales y un
+        # pequeño margen por el primer token de cada chunk
+        window = self.tokenizer.model_max_length - self.tokenizer.num_special_tokens_to_add()
+        self.max_chunk_tokens = min(max_chunk_tokens or window, window - 8)
+        self.batch_size = batch_size
+        # Solo en CPU tiene sentido repartir la fase map entre procesos:
+        # cada proceso carga su propia copia del modelo
+        self.num_workers = num_workers if not uses_cuda else 0
+        self.max_depth = max_depth
+        self._pool: ProcessPoolExecutor | None = None
 
-    def summarize(self, text: str, min_len: int = 30, max_len: int = 150) -> str:
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def _split_text(self, text: str) -> tuple[list[str], list[int]]:
+        # Chunks de oraciones completas que entran en la ventana del modelo
+        return chunk_by_token_budget(text, self.tokenizer, self.max_chunk_tokens)
+
+    def _generation_kwargs(self, min_len: int, max_len: int) -> dict:
         kwargs = {"do_sample": False}
         version = tuple(map(int, transformers.__version__.split(".")[:2]))
 
@@ -24,25 +72,72 @@ class SummarizerModel:
         else:
             kwargs["min_length"] = min_len
             kwargs["max_length"] = max_len
+        return kwargs
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, threads, self.backend)
+            )
+        return self._pool
+
+    def _summarize_many(self, chunks: list[str], lengths: list[int], kwargs: dict) -> list[str]:
+        """
+        Fase map: resume todos los chunks en lotes agrupados por largo
+        (mínimo padding), en este proceso o repartidos en el pool.
+        """
+        batches = sorted_batches(lengths, self.batch_size)
+        summaries: list[str] = [""] * len(chunks)
+
+        if self.num_workers > 1 and len(batches) > 1:
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_worker_summarize, [chunks[i] for i in batch], kwargs)
+                for batch in batches
+            ]
+            for batch, future in zip(batches, futures):
+                for i, summary in zip(batch, future.result()):
+                    summaries[i] = summary
+            return summaries
 
-        if len(text.split()) <= 800:
+        for batch in batches:
+            results = self.model([chunks[i] for i in batch], batch_size=len(batch), **kwargs)
+            for i, result in zip(batch, results):
+                summaries[i] = result["summary_text"]
+        return summaries
+
+    def summarize(self, text: str, min_len: int = 30, max_len: int = 150) -> str:
+        kwargs = self._generation_kwargs(min_len, max_len)
+        chunks, lengths = self._split_text(text)
+
+        if len(chunks) <= 1:
             result = self.model(text, **kwargs)
             return result[0]["summary_text"]
-        
-        chunks = self._split_text(text)
-        partial_summaries = []
 
-        for chunk in chunks:
-            chunk_summary = self.model(chunk, **kwargs)[0]["summary_text"]
-            partial_summaries.append(chunk_summary)
+        return self._map_reduce(chunks, lengths, kwargs, depth=0)
 
+    def _map_reduce(self, chunks: list[str], lengths: list[int], kwargs: dict, depth: int) -> str:
+        partial_summaries = self._summarize_many(chunks, lengths, kwargs)
         combined_summary = " ".join(partial_summaries)
 
-        if len(combined_summary.split()) > 1000:
-            final_kwargs = kwargs.copy()
-            final_kwargs["min_new_tokens"] = 50
-            final_kwargs["max_new_tokens"] = 200
+        # Reduce jerárquico: mientras la combinación no entre en una sola
+        # ventana del modelo se vuelve a aplicar map-reduce sobre ella; la
+        # que entra se resume una última vez
+        next_chunks, next_lengths = self._split_text(combined_summary)
+        final_kwargs = self._generation_kwargs(50, 200)
+
+        if len(next_chunks) <= 1:
             result = self.model(combined_summary, **final_kwargs)
             return result[0]["summary_text"]
 
-        return combined_summary
+        shrinking = sum(next_lengths) < sum(lengths)
+        if shrinking and depth < self.max_depth:
+            return self._map_reduce(next_chunks, next_lengths, kwargs, depth + 1)
+
+        # Sin progreso: último recurso, truncar a la ventana del modelo
+        result = self.model(combined_summary, truncation=True, **final_kwargs)
+        return result[0]["summary_text"]
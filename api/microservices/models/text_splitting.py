@@ -0,0 +1,83 @@
+import re
+
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+_LINE_BREAKS = re.compile(r'(\s*\n\s*)')
+
+
+def split_into_sentences(text: str) -> list[str]:
+    # Separación básica por oraciones usando puntuación
+    return [s for s in _SENTENCE_BOUNDARY.split(text.strip()) if s]
+
+
+def split_paragraphs(text: str) -> tuple[list[str], list[str]]:
+    """
+    Separa el texto en párrafos (por saltos de línea) y devuelve también los
+    separadores originales, para poder reconstruir el texto con
+    "".join(p + sep for p, sep in zip(paragraphs, separators)).
+    """
+    parts = _LINE_BREAKS.split(text)
+    paragraphs = parts[0::2]
+    separators = parts[1::2] + [""]
+    return paragraphs, separators
+
+
+def split_by_token_budget(sentences: list[str], tokenizer, max_tokens: int) -> tuple[list[str], list[int]]:
+    """
+    Tokeniza todas las oraciones de una vez y corta las que superan
+    max_tokens en ventanas de max_tokens tokens, para que el modelo nunca
+    trunque la entrada. Devuelve los segmentos y su largo en tokens.
+    """
+    if not sentences:
+        return [], []
+
+    token_ids = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+    segments, lengths = [], []
+    for sentence, ids in zip(sentences, token_ids):
+        if len(ids) <= max_tokens:
+            segments.append(sentence)
+            lengths.append(len(ids))
+            continue
+        for start in range(0, len(ids), max_tokens):
+            window = ids[start:start + max_tokens]
+            segments.append(tokenizer.decode(window, skip_special_tokens=True))
+            lengths.append(len(window))
+    return segments, lengths
+
+
+def group_by_token_budget(lengths: list[int], max_tokens: int) -> list[tuple[int, int]]:
+    """
+    Agrupa elementos consecutivos sin superar max_tokens por grupo.
+    Devuelve rangos [inicio, fin). Un elemento que por sí solo supera el
+    presupuesto queda en su propio grupo.
+    """
+    groups = []
+    start, total = 0, 0
+    for i, length in enumerate(lengths):
+        if i > start and total + length > max_tokens:
+            groups.append((start, i))
+            start, total = i, 0
+        total += length
+    if start < len(lengths):
+        groups.append((start, len(lengths)))
+    return groups
+
+
+def chunk_by_token_budget(text: str, tokenizer, max_tokens: int) -> tuple[list[str], list[int]]:
+    """
+    Chunks de oraciones completas con a lo sumo max_tokens tokens cada uno
+    (sin contar tokens especiales), y su cantidad de tokens.
+
+    Cada oración se tokeniza con el espacio que la precede dentro del texto
+    unido, así la suma por oración coincide con la del chunk (salvo el
+    primer token, que puede variar en uno).
+    """
+    sentences = split_into_sentences(text)
+    pieces, lengths = split_by_token_budget(
+        [" " + s for s in sentences], tokenizer, max_tokens)
+
+    chunks, counts = [], []
+    for start, end in group_by_token_budget(lengths, max_tokens):
+        chunks.append(" ".join(p.strip() for p in pieces[start:end]))
+        counts.append(sum(lengths[start:end]))
+    return chunks, counts
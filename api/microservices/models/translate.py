@@ -1,39 +1,154 @@
-from transformers.pipelines import pipeline
 from nltk.corpus import stopwords
+from collections import Counter, OrderedDict
+import hashlib
+import threading
+import time
 import nltk
 
+from .batching import sorted_batches
+from .inference_backend import build_pipeline
+from .text_splitting import group_by_token_budget, split_by_token_budget, split_into_sentences, split_paragraphs
+
 nltk.download('stopwords', quiet=True)
 
+
+def _build_stopword_index() -> tuple[list[str], dict[str, tuple[int, ...]]]:
+    """
+    Índice invertido palabra -> idiomas en cuya lista de stopwords aparece.
+    Se construye una sola vez al importar el módulo.
+    """
+    languages = [lang for lang in stopwords.fileids() if lang != "hinglish"]
+    index: dict[str, list[int]] = {}
+    for lang_id, lang in enumerate(languages):
+        for word in set(stopwords.words(lang)):
+            index.setdefault(word, []).append(lang_id)
+    return languages, {word: tuple(ids) for word, ids in index.items()}
+
+
+_LANGUAGES, _STOPWORD_INDEX = _build_stopword_index()
+
+# Resultados memoizados por hash del texto (LRU)
+_DETECTION_CACHE_SIZE = 4096
+_detection_cache: OrderedDict[bytes, str] = OrderedDict()
+_detection_lock = threading.Lock()
+
+
 class TranslateModel:
-    def __init__(self, model_name: str, uses_cuda: bool = False):
-        self.model = pipeline(
-            "translation",
-            model=model_name,
-            device=0 if uses_cuda else -1
-        )
+    def __init__(
+        self,
+        model_name: str,
+        uses_cuda: bool = False,
+        batch_size: int = 8,
+        max_tokens: int = 256,
+        backend: str = "torch"
+    ):
+        self.model = build_pipeline("translation", model_name, uses_cuda=uses_cuda, backend=backend)
+        self.model_name = model_name
+        self.backend = backend
+        self.tokenizer = self.model.tokenizer
+        self.batch_size = batch_size
+        # Los modelos Marian truncan pasados ~512 tokens; se traducen grupos
+        # de oraciones bajo este presupuesto
+        model_limit = self.tokenizer.model_max_length - self.tokenizer.num_special_tokens_to_add()
+        self.max_tokens = min(max_tokens, model_limit)
+        self.stats = {"segments": 0, "tokens": 0, "seconds": 0.0}
+        self._stats_lock = threading.Lock()
 
     def translate(self, text: str) -> str:
-        result = self.model(text)
-        return result[0]["translation_text"]
+        """
+        Traduce textos de cualquier largo: separa en párrafos y oraciones,
+        junta oraciones consecutivas sin pasar max_tokens, traduce los grupos
+        en lotes y reconstruye el texto en el orden original.
+        """
+        paragraphs, separators = split_paragraphs(text)
+
+        segments: list[str] = []
+        lengths: list[int] = []
+        # Rango de segmentos [inicio, fin) de cada párrafo
+        spans: list[tuple[int, int]] = []
+        for paragraph in paragraphs:
+            start = len(segments)
+            pieces, piece_lengths = split_by_token_budget(
+                split_into_sentences(paragraph), self.tokenizer, self.max_tokens)
+            for group_start, group_end in group_by_token_budget(piece_lengths, self.max_tokens):
+                segments.append(" ".join(pieces[group_start:group_end]))
+                lengths.append(sum(piece_lengths[group_start:group_end]))
+            spans.append((start, len(segments)))
+
+        translations = self.translate_batch(segments, lengths)
+
+        return "".join(
+            " ".join(translations[start:end]) + sep
+            for (start, end), sep in zip(spans, separators)
+        ).strip()
+
+    def translate_batch(self, texts: list[str], lengths: list[int] | None = None) -> list[str]:
+        """Traduce una lista de segmentos en lotes ordenados por largo."""
+        if not texts:
+            return []
+        if lengths is None:
+            lengths = [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+        start = time.perf_counter()
+        outputs: list[str] = [""] * len(texts)
+        for batch in sorted_batches(lengths, self.batch_size):
+            results = self.model([texts[i] for i in batch], batch_size=len(batch))
+            for i, result in zip(batch, results):
+                outputs[i] = result["translation_text"]
+        elapsed = time.perf_counter() - start
+
+        tokens = sum(lengths)
+        with self._stats_lock:
+            self.stats["segments"] += len(texts)
+            self.stats["tokens"] += tokens
+            self.stats["seconds"] += elapsed
+        print(f"[TRANSLATE] [{self.model_name}] {len(texts)} segmentos, {tokens} tokens, "
+              f"{tokens / max(elapsed, 1e-9):.1f} tokens/s")
+        return outputs
+
+    def metrics(self) -> dict:
+        with self._stats_lock:
+            seconds = self.stats["seconds"]
+            return {
+                "batch_size": self.batch_size,
+                "max_tokens": self.max_tokens,
+                "segments": self.stats["segments"],
+                "tokens": self.stats["tokens"],
+                "tokens_per_s": round(self.stats["tokens"] / seconds, 1) if seconds else 0.0,
+            }
 
     @staticmethod
     def detect_language(text: str) -> str:
-        text_lower = text.lower()
-        words = text_lower.split()
-        scores = {}
-
-        for lang in stopwords.fileids():
-            if lang == "hinglish":
-                continue  # saltar hinglish siempre
-            stops = set(stopwords.words(lang))
-            common = [w for w in words if w in stops]
-            scores[lang] = len(common)
-
-        if not scores:
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with _detection_lock:
+            cached = _detection_cache.get(key)
+            if cached is not None:
+                _detection_cache.move_to_end(key)
+                return cached
+
+        result = TranslateModel._detect_language(text)
+
+        with _detection_lock:
+            _detection_cache[key] = result
+            if len(_detection_cache) > _DETECTION_CACHE_SIZE:
+                _detection_cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _detect_language(text: str) -> str:
+        if not _LANGUAGES:
             return "unknown"
 
-        best_lang = max(scores, key=scores.get)
-        if scores[best_lang] < 3:
+        # Una sola pasada: cada palabra distinta suma sus apariciones a
+        # todos los idiomas que la tienen como stopword
+        scores = [0] * len(_LANGUAGES)
+        for word, count in Counter(text.lower().split()).items():
+            for lang_id in _STOPWORD_INDEX.get(word, ()):
+                scores[lang_id] += count
+
+        # En empate gana el primer idioma, igual que max() sobre fileids()
+        best = max(range(len(scores)), key=scores.__getitem__)
+        if scores[best] < 3:
             return "unknown"
 
-        return best_lang
+        return _LANGUAGES[best]
@@ -3,10 +3,15 @@ from pydantic import BaseModel
 
 class PreprocessAndChunkingRequest(BaseModel):
     translated_context: str
+    # Perfil de decodificación (fast, balanced, quality) y presupuesto de
+    # latencia opcional (ver decoding.py)
+    profile: str | None = None
+    latency_budget_ms: float | None = None
 
 
 class QAGenerationRequest(BaseModel):
     context: list[str]  # antes era str
+    profile: str | None = None
 
 
 class GQA(BaseModel):
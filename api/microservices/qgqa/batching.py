@@ -0,0 +1,134 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+class _PendingPrompt:
+    __slots__ = ("prompt", "key", "kwargs", "future", "enqueued_at")
+
+    def __init__(self, prompt: str, key: tuple, kwargs: dict):
+        self.prompt = prompt
+        self.key = key
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Agrupa prompts de peticiones concurrentes en lotes para el pipeline.
+
+    Las rutas síncronas de FastAPI corren en el threadpool: cada hilo llama
+    a submit(), que encola sus prompts y se bloquea hasta tener los
+    resultados. Un hilo despachador junta prompts con los mismos parámetros
+    de generación hasta llenar max_batch_size o agotar max_wait_ms desde el
+    prompt más antiguo, ejecuta el lote y devuelve cada salida a quien la
+    pidió.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[..., list[str]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._pending: list[_PendingPrompt] = []
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self.stats = {"batches": 0, "prompts": 0, "max_batch": 0}
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._loop, name="qgqa-microbatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, prompts: list[str], **gen_kwargs: Any) -> list[str]:
+        if not prompts:
+            return []
+        if not self._running:
+            # Sin despachador (p. ej. fuera del lifespan) se ejecuta directo
+            return self.run_batch(prompts, **gen_kwargs)
+
+        key = tuple(sorted(gen_kwargs.items()))
+        items = [_PendingPrompt(p, key, gen_kwargs) for p in prompts]
+        with self._cond:
+            self._pending.extend(items)
+            self._cond.notify_all()
+        return [item.future.result() for item in items]
+
+    def metrics(self) -> dict:
+        with self._cond:
+            batches = self.stats["batches"]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queued": len(self._pending),
+                "batches": batches,
+                "prompts": self.stats["prompts"],
+                "avg_batch": round(self.stats["prompts"] / batches, 2) if batches else 0,
+                "max_batch": self.stats["max_batch"],
+            }
+
+    def _take_batch(self) -> list[_PendingPrompt]:
+        # Se llama con el lock tomado
+        first = self._pending[0]
+        deadline = first.enqueued_at + self.max_wait
+
+        while self._running:
+            same_key = sum(1 for item in self._pending if item.key == first.key)
+            remaining = deadline - time.monotonic()
+            if same_key >= self.max_batch_size or remaining <= 0:
+                break
+            self._cond.wait(remaining)
+
+        batch, rest = [], []
+        for item in self._pending:
+            if item.key == first.key and len(batch) < self.max_batch_size:
+                batch.append(item)
+            else:
+                rest.append(item)
+        self._pending = rest
+        return batch
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                batch = self._take_batch()
+                self.stats["batches"] += 1
+                self.stats["prompts"] += len(batch)
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+
+            try:
+                outputs = self.run_batch(
+                    [item.prompt for item in batch], **batch[0].kwargs)
+                if len(outputs) != len(batch):
+                    raise RuntimeError(
+                        f"El lote devolvió {len(outputs)} salidas para {len(batch)} prompts")
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+
+            for item, output in zip(batch, outputs):
+                item.future.set_result(output)
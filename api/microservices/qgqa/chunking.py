@@ -1,4 +1,6 @@
 import re
+from bisect import bisect_right
+from itertools import accumulate
 from constants import DEFAULT_CHUNK_SIZE, DEFAULT_OVERLAP_PERCENTAGE
 
 
@@ -14,6 +16,13 @@ class TokenizerWrapper:
     def _decode(self, tokens: list[int], *args, **kwargs):
         return self.tokenizer.decode(tokens, *args, **kwargs)
 
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        # Una sola llamada al tokenizer (rápido/batch) para todos los textos
+        if not texts:
+            return []
+        encoded = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
 
 # Chunkeo por caracteres
 
@@ -65,9 +74,7 @@ def chunk_by_tokens(
 
 def split_into_sentences(text: str) -> list[str]:
     # Separación básica por oraciones usando puntuación
-    splitted_text = re.split(r'(?<=[.!?])\s+', text.strip())
-    print(splitted_text)
-    return splitted_text
+    return re.split(r'(?<=[.!?])\s+', text.strip())
 
 
 def chunk_by_sentences(
@@ -82,32 +89,24 @@ def chunk_by_sentences(
     chunks = []
     sentence_start = 0
     max_chunk_len = max_input_tokens - max_output_tokens
-    chunk_count = 0
+
+    # Cada oración se tokeniza una sola vez; prefix[i] = tokens de las
+    # oraciones [0, i). Los tokens de [a, b) son prefix[b] - prefix[a]
+    prefix = [0, *accumulate(tokenizer.token_lengths(sentences))]
 
     while sentence_start < len(sentences):
-        current_chunk = []
-        token_count = 0
-        sentence_count = 0
-        sentence_index = sentence_start
-
-        # Agregar oraciones mientras no se pase del límite de tokens
-        while sentence_index < len(sentences):
-            sentence = sentences[sentence_index]
-            sentence_tokens = tokenizer.encode(
-                sentence, add_special_tokens=False)
-            if token_count + len(sentence_tokens) > max_chunk_len:
-                break
-            current_chunk.append(sentence)
-            token_count += len(sentence_tokens)
-            sentence_count += 1
-            sentence_index += 1
-
-        stripped_chunk = " ".join(current_chunk).strip()
+        # Última oración que entra sin pasar max_chunk_len (prefix es no
+        # decreciente, así que equivale a agregar oraciones una por una)
+        sentence_index = bisect_right(
+            prefix, prefix[sentence_start] + max_chunk_len, lo=sentence_start) - 1
+        token_count = prefix[sentence_index] - prefix[sentence_start]
+        sentence_count = sentence_index - sentence_start
+
+        stripped_chunk = " ".join(sentences[sentence_start:sentence_index]).strip()
         print(
-            f"[CHNKNG] ({chunk_count}): {stripped_chunk[:20]}... [SC: {sentence_count}] [TC: {token_count}] [len: {len(stripped_chunk)}]")
+            f"[CHNKNG] ({len(chunks)}): {stripped_chunk[:20]}... [SC: {sentence_count}] [TC: {token_count}] [len: {len(stripped_chunk)}]")
         chunks.append(stripped_chunk)
 
-        chunk_count += 1
         sentence_start = max(sentence_start + 1,
                              sentence_index - overlap_sentences)
 
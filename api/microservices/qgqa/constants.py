@@ -1,3 +1,4 @@
+import os
 from enum import Enum
 
 
@@ -38,3 +39,31 @@ MODEL_NAME = FlanT5Model.LARGE.value
 
 DEFAULT_CHUNK_SIZE = MODEL_CONFIG[MODEL_NAME]["max_tokens"]
 DEFAULT_OVERLAP_PERCENTAGE = 1/4
+
+# Modelo de embeddings para deduplicar preguntas
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Micro-batching entre peticiones concurrentes (ver batching.py)
+MICROBATCH_MAX_SIZE = int(os.getenv("QGQA_MICROBATCH_MAX_SIZE", "16"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("QGQA_MICROBATCH_MAX_WAIT_MS", "15"))
+
+# Tokens por lote del pipeline contando el padding: los prompts se ordenan
+# por largo y se agrupan bajo este presupuesto (ver FlanT5Text2TextGenerator.run_prompts)
+QGQA_BATCH_MAX_TOKENS = int(os.getenv("QGQA_BATCH_MAX_TOKENS", "4096"))
+# Con beam search cada prompt cuenta num_beams veces contra este presupuesto
+# (sin pasar de QGQA_BATCH_MAX_TOKENS): ~6 prompts de respuesta con 5 beams
+QGQA_BEAM_MAX_TOKENS = int(os.getenv("QGQA_BEAM_MAX_TOKENS", "16384"))
+
+# Chunks por grupo en el pipeline pregunta -> respuesta (ver pipeline.py)
+PIPELINE_GROUP_SIZE = int(os.getenv("QGQA_PIPELINE_GROUP_SIZE", str(MICROBATCH_MAX_SIZE)))
+
+# Peticiones de generación procesándose a la vez; el resto espera en la
+# cola del limitador de admisión (429 si se llena)
+QGQA_MAX_CONCURRENCY = int(os.getenv("QGQA_MAX_CONCURRENCY", "4"))
+
+# Banco semántico de QAs (ver qa_bank.py): un chunk cuyo vecino más cercano
+# ya generado supera el umbral de similitud coseno reutiliza su QA
+QA_BANK_ENABLED = os.getenv("QGQA_QA_BANK", "0").lower() in ("1", "true", "yes")
+QA_BANK_THRESHOLD = float(os.getenv("QGQA_QA_BANK_THRESHOLD", "0.95"))
+# Entradas máximas; pasado el máximo se desalojan las usadas hace más tiempo
+QA_BANK_MAX_ITEMS = int(os.getenv("QGQA_QA_BANK_MAX_ITEMS", "50000"))
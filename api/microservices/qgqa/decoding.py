@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+
+
+# =========================================================
+#                PERFILES DE DECODIFICACIÓN
+#
+# CADA PERFIL FIJA CÓMO SE GENERAN LAS PREGUNTAS Y LAS
+# RESPUESTAS (TOKENS MÁXIMOS, BEAMS, MUESTREO). CON UN
+# PRESUPUESTO DE LATENCIA POR PETICIÓN SE ELIGE EL PERFIL
+# PEDIDO O UNO MÁS BARATO SI NO ALCANZARÍA EL TIEMPO, Y SE
+# VUELVE A REVISAR ENTRE GRUPOS DE CHUNKS.
+# =========================================================
+
+
+class DecodingProfile:
+    def __init__(self, name: str, question: dict, answer: dict, seed_s_per_chunk: float = 1.0):
+        self.name = name
+        # Parámetros de generación de preguntas y de respuestas
+        self.question = question
+        self.answer = answer
+        # Segundos por chunk estimados antes de tener mediciones
+        self.seed_s_per_chunk = seed_s_per_chunk
+
+    def to_dict(self) -> dict:
+        return {"question": self.question, "answer": self.answer}
+
+
+# De más caro a más barato: el orden en que se degrada
+DECODING_PROFILES: dict[str, DecodingProfile] = {
+    "quality": DecodingProfile(
+        name="quality",
+        question={"do_sample": True, "top_k": 50, "top_p": 0.95, "max_new_tokens": 64},
+        # La configuración original de las respuestas, con largo acotado
+        answer={
+            "num_beams": 5,
+            "early_stopping": True,
+            "length_penalty": 1.2,
+            "do_sample": True,
+            "temperature": 0.7,
+            "top_k": 50,
+            "top_p": 0.9,
+            "max_new_tokens": 64,
+        },
+        seed_s_per_chunk=3.0
+    ),
+    "balanced": DecodingProfile(
+        name="balanced",
+        question={"do_sample": True, "top_p": 0.9, "temperature": 0.8, "max_new_tokens": 48},
+        answer={"num_beams": 2, "early_stopping": True, "do_sample": False, "max_new_tokens": 48},
+        seed_s_per_chunk=1.2
+    ),
+    "fast": DecodingProfile(
+        name="fast",
+        question={"do_sample": False, "num_beams": 1, "max_new_tokens": 32},
+        answer={"do_sample": False, "num_beams": 1, "max_new_tokens": 32},
+        seed_s_per_chunk=0.5
+    ),
+}
+
+DEFAULT_PROFILE = os.getenv("QGQA_DECODING_PROFILE", "quality")
+if DEFAULT_PROFILE not in DECODING_PROFILES:
+    raise ValueError(
+        f"QGQA_DECODING_PROFILE desconocido: '{DEFAULT_PROFILE}' (usar {', '.join(DECODING_PROFILES)})")
+
+
+def get_profile(name: str | None) -> DecodingProfile:
+    name = name or DEFAULT_PROFILE
+    if name not in DECODING_PROFILES:
+        raise ValueError(f"Perfil de decodificación desconocido: '{name}' (usar {', '.join(DECODING_PROFILES)})")
+    return DECODING_PROFILES[name]
+
+
+def cheaper_profile(profile: DecodingProfile) -> DecodingProfile | None:
+    names = list(DECODING_PROFILES)
+    index = names.index(profile.name)
+    return DECODING_PROFILES[names[index + 1]] if index + 1 < len(names) else None
+
+
+class LatencyEstimator:
+    """
+    Segundos por chunk de cada perfil, como media móvil de lo medido en
+    el pipeline (parte de seed_s_per_chunk hasta la primera medición).
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self._s_per_chunk = {name: p.seed_s_per_chunk for name, p in DECODING_PROFILES.items()}
+        self._samples = {name: 0 for name in DECODING_PROFILES}
+        self._lock = threading.Lock()
+
+    def estimate(self, profile: DecodingProfile, chunks: int) -> float:
+        with self._lock:
+            return self._s_per_chunk[profile.name] * chunks
+
+    def observe(self, profile: DecodingProfile, chunks: int, seconds: float):
+        if chunks <= 0:
+            return
+        per_chunk = seconds / chunks
+        with self._lock:
+            if self._samples[profile.name] == 0:
+                self._s_per_chunk[profile.name] = per_chunk
+            else:
+                current = self._s_per_chunk[profile.name]
+                self._s_per_chunk[profile.name] = (1 - self.alpha) * current + self.alpha * per_chunk
+            self._samples[profile.name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {"s_per_chunk": round(s, 3), "samples": self._samples[name]}
+                for name, s in self._s_per_chunk.items()
+            }
+
+
+latency_estimator = LatencyEstimator()
+
+
+class DecodingPlan:
+    """
+    Perfil de una petición con presupuesto de latencia opcional.
+
+    choose() arranca del perfil pedido y baja mientras la estimación para
+    los chunks pendientes no entre en el tiempo restante; el pipeline lo
+    llama antes de cada grupo de chunks. Con el perfil más barato se sigue
+    aunque no alcance.
+    """
+
+    def __init__(
+        self,
+        requested: DecodingProfile,
+        latency_budget_ms: float | None = None,
+        estimator: LatencyEstimator = latency_estimator
+    ):
+        self.requested = requested
+        self.profile = requested
+        self.estimator = estimator
+        self.started = time.monotonic()
+        self.deadline = self.started + latency_budget_ms / 1000 if latency_budget_ms else None
+        self.downgrades: list[dict] = []
+
+    def remaining_s(self) -> float | None:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def choose(self, pending_chunks: int) -> DecodingProfile:
+        remaining = self.remaining_s()
+        if remaining is None or pending_chunks <= 0:
+            return self.profile
+        while self.estimator.estimate(self.profile, pending_chunks) > remaining:
+            cheaper = cheaper_profile(self.profile)
+            if cheaper is None:
+                break
+            self.downgrades.append({
+                "from": self.profile.name,
+                "to": cheaper.name,
+                "pending_chunks": pending_chunks,
+                "remaining_ms": round(remaining * 1000, 1)
+            })
+            self.profile = cheaper
+        return self.profile
+
+    @property
+    def downgraded(self) -> bool:
+        return bool(self.downgrades)
+
+    def summary(self) -> dict:
+        return {
+            "requested": self.requested.name,
+            "used": self.profile.name,
+            "downgrades": self.downgrades,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1),
+        }
@@ -1,56 +1,310 @@
+import asyncio
+import json
+import threading
 import uuid
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from contextlib import asynccontextmanager
 from ..models.FlanT5Text2TextGenerator import FlanT5Text2TextGenerator
-from validation import filter_duplicate_qas, is_valid_answer, evaluar_calidad_qa
+from ..models.inference_backend import backend_for, cache_model_id
+from validation import filter_duplicate_qas, is_valid_answer
+from quality import quality_scorer
 from chunking import TokenizerWrapper, chunk_by_sentences
 from api_types import GQA, PreprocessAndChunkingRequest, QAGenerationRequest, QAValidationRequest
-from constants import MODEL_CONFIG, MODEL_NAME
+from constants import MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS, MODEL_CONFIG, MODEL_NAME, PIPELINE_GROUP_SIZE, QGQA_BATCH_MAX_TOKENS, QGQA_BEAM_MAX_TOKENS, QGQA_MAX_CONCURRENCY
+from constants import QA_BANK_ENABLED, QA_BANK_MAX_ITEMS, QA_BANK_THRESHOLD
+from resources import resources
+from batching import MicroBatcher
+from pipeline import QAPipeline
+from qa_bank import QABank
+from decoding import DECODING_PROFILES, DecodingPlan, DecodingProfile, get_profile, latency_estimator
+from ..common.admission import AdmissionLimiter, AdmissionMiddleware
+from ..common.model_manager import MODEL_PRELOAD, model_manager
+from ..common.response_cache import CACHE_DIR, ResponseCache
 import torch
-from transformers import AutoTokenizer
 
 
-model: dict[str, FlanT5Text2TextGenerator | None] = {
+# torch, torch-int8, onnx u onnx-int8 (QGQA_BACKEND o INFERENCE_BACKEND)
+GENERATOR_BACKEND = backend_for("qgqa")
+# Las salidas de cada backend se guardan por separado en la caché
+CACHE_MODEL = cache_model_id(MODEL_NAME, GENERATOR_BACKEND)
+
+batcher: dict[str, MicroBatcher | None] = {
     "generator": None
 }
 
+# QAs ya generadas, por texto normalizado + modelo + endpoint
+cache = ResponseCache("qgqa")
+# Pregunta/respuesta/calidad por chunk: un documento editado solo paga
+# por los chunks que cambiaron
+chunk_cache = ResponseCache("qgqa_chunks")
+# QAs por similitud de chunk: material casi idéntico (otra extracción del
+# PDF, un párrafo reescrito) no vuelve a pasar por el modelo
+qa_bank = QABank(
+    "qgqa_bank", CACHE_DIR, threshold=QA_BANK_THRESHOLD, max_items=QA_BANK_MAX_ITEMS
+) if QA_BANK_ENABLED else None
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    model["generator"] = FlanT5Text2TextGenerator(
+# Las rutas de generación comparten el generador: turnos acotados y 429
+# cuando la cola se llena
+generator_limiter = AdmissionLimiter("generator", max_concurrency=QGQA_MAX_CONCURRENCY)
+
+
+def _make_pipeline(generator: FlanT5Text2TextGenerator, plan: DecodingPlan, ramp_up: bool = False) -> QAPipeline:
+    return QAPipeline(
+        generator,
+        group_size=PIPELINE_GROUP_SIZE,
+        ramp_up=ramp_up,
+        chunk_cache=chunk_cache,
+        cache_params={"model": CACHE_MODEL},
+        plan=plan,
+        qa_bank=qa_bank
+    )
+
+
+def _make_plan(request: PreprocessAndChunkingRequest) -> DecodingPlan:
+    try:
+        profile = get_profile(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return DecodingPlan(profile, latency_budget_ms=request.latency_budget_ms)
+
+
+def _pipeline_cache_key(request: PreprocessAndChunkingRequest, plan: DecodingPlan) -> str:
+    return cache.make_key(request.translated_context, CACHE_MODEL, {
+        "endpoint": "pipeline",
+        "profile": plan.requested.name,
+        "quality": quality_scorer.cache_tag
+    })
+
+
+def _load_generator() -> FlanT5Text2TextGenerator:
+    generator = FlanT5Text2TextGenerator(
         model=MODEL_NAME,
         tokenizer=MODEL_NAME,
-        uses_cuda=torch.cuda.is_available()
+        uses_cuda=torch.cuda.is_available(),
+        batch_size=MICROBATCH_MAX_SIZE,
+        backend=GENERATOR_BACKEND,
+        max_batch_tokens=QGQA_BATCH_MAX_TOKENS,
+        max_beam_tokens=QGQA_BEAM_MAX_TOKENS
+    )
+    # Junta los prompts de peticiones concurrentes en lotes para el pipeline
+    generator_batcher = MicroBatcher(
+        generator.run_prompts,
+        max_batch_size=MICROBATCH_MAX_SIZE,
+        max_wait_ms=MICROBATCH_MAX_WAIT_MS
     )
+    generator_batcher.start()
+    generator.set_dispatcher(generator_batcher.submit)
+    batcher["generator"] = generator_batcher
+    return generator
+
+
+def _unload_generator(generator: FlanT5Text2TextGenerator):
+    generator_batcher = batcher["generator"]
+    if generator_batcher is not None:
+        generator_batcher.stop()
+    batcher["generator"] = None
+
+
+# flan-t5 se carga en la primera generación y se descarga tras un tiempo
+# sin uso (ver common/model_manager.py)
+model_manager.register("generator", _load_generator, unloader=_unload_generator)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_manager.start()
+    if MODEL_PRELOAD:
+        # Las cargas corren en un hilo: en el modo en proceso este lifespan
+        # se ejecuta en el event loop del router
+        await asyncio.to_thread(model_manager.preload, "generator")
+        # Tokenizer y modelo de embeddings compartidos por chunking,
+        # evaluación de calidad y deduplicación (si no, en su primer uso)
+        await asyncio.to_thread(resources.load_all)
     yield
-    model["generator"] = None
+    await asyncio.to_thread(model_manager.unload, "generator")
+    model_manager.stop()
+    resources.clear()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware, limiters={
+    "/generate_qa_pipeline": generator_limiter,
+    "/generate_qa_stream": generator_limiter,
+    "/generate_qa": generator_limiter,
+})
+
+
+@app.get("/health")
+def health():
+    generator = model_manager.peek("generator")
+    return {
+        "status": "ok",
+        "backend": GENERATOR_BACKEND,
+        "lifecycle": model_manager.stats(),
+        "resources": resources.metrics(),
+        "quality": {"criteria": list(quality_scorer.criteria)},
+        "batching": batcher["generator"].metrics() if batcher["generator"] else None,
+        "generator": generator.metrics() if generator is not None else None,
+        "cache": cache.stats(),
+        "chunk_cache": chunk_cache.stats(),
+        "qa_bank": qa_bank.stats() if qa_bank is not None else None,
+        "admission": {"generator": generator_limiter.stats()},
+        "decoding": {
+            "profiles": {name: p.to_dict() for name, p in DECODING_PROFILES.items()},
+            "latency": latency_estimator.stats()
+        }
+    }
+
+
+def _prepare_contexts(generator: FlanT5Text2TextGenerator, process_code: str, text: str) -> list[str]:
+    chunks = _chunk_text(text)
+    contexts = [generator.proccess_input(process_code, c) for c in chunks]
+    return [c for c in contexts if c]
+
+
+def _chunk_text(text: str) -> list[str]:
+    model_spec = MODEL_CONFIG[MODEL_NAME]
+    tokenizer_hf = TokenizerWrapper(resources.get("tokenizer"))
+    with resources.track("chunking"):
+        return chunk_by_sentences(
+            text=text,
+            tokenizer=tokenizer_hf,
+            max_input_tokens=model_spec["max_tokens"],
+            max_output_tokens=model_spec["recommended_output_tokens"],
+            overlap_sentences=6,
+            min_chunk_tokens=model_spec["max_tokens"]-100
+        )
 
 
 @app.post("/preprocess-and-chunk")
 def preprocess_and_chunk_text(request: PreprocessAndChunkingRequest):
-    model_spec = MODEL_CONFIG[MODEL_NAME]
-    tokenizer_hf = TokenizerWrapper(AutoTokenizer.from_pretrained(MODEL_NAME))
-    chunks = chunk_by_sentences(
-        text=request.translated_context,
-        tokenizer=tokenizer_hf,
-        max_input_tokens=model_spec["max_tokens"],
-        max_output_tokens=model_spec["recommended_output_tokens"],
-        overlap_sentences=6,
-        min_chunk_tokens=model_spec["max_tokens"]-100
-    )
-    return {"response": chunks}
+    return {"response": _chunk_text(request.translated_context)}
+
+
+@app.post("/generate_qa_pipeline")
+def generate_qa_pipeline(request: PreprocessAndChunkingRequest):
+    """
+    Chunking, generación, evaluación y deduplicación en una sola llamada.
+    Equivale a /preprocess-and-chunk + /generate_qa + /validate_and_deduplicate.
+    """
+    process_code = uuid.uuid4().hex[:5]
+    plan = _make_plan(request)
+
+    # La caché se consulta antes de pedir el modelo: un acierto no lo carga
+    cache_key = _pipeline_cache_key(request, plan)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print(f"[  PIPELINE] [{process_code}] Respuesta en caché: {len(cached)} QAs")
+        gqas = [GQA(**qa) for qa in cached]
+    else:
+        with model_manager.use("generator") as generator:
+            contexts = _prepare_contexts(generator, process_code, request.translated_context)
+            if not contexts:
+                raise HTTPException(
+                    status_code=410, detail="Todos los contextos están vacíos")
+
+            print(f"[  PIPELINE] [{process_code}] Chunks: {len(contexts)}")
+            qa_pipeline = _make_pipeline(generator, plan)
+            try:
+                gqas = list(qa_pipeline.stream(process_code, contexts))
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500, detail=f"Error en el pipeline de QAs: {str(e)}")
+        # Se guarda en orden de emisión (el mismo que usa /generate_qa_stream).
+        # Si se bajó de perfil por el presupuesto no: la respuesta no es la
+        # del perfil pedido (los chunks sí quedan en caché con su perfil)
+        if not plan.downgraded:
+            cache.set(cache_key, [gqa.model_dump(mode="json") for gqa in gqas])
+
+    if not gqas:
+        raise HTTPException(
+            status_code=410, detail="No se generaron QAs válidos")
+
+    gqas.sort(key=lambda x: x.quality if x.quality is not None else 0, reverse=True)
+    print(f"[  PIPELINE] [{process_code}] QAs únicas: {len(gqas)} ({plan.profile.name})")
+    return {"response": gqas, "decoding": plan.summary()}
+
+
+@app.post("/generate_qa_stream")
+def generate_qa_stream(request: PreprocessAndChunkingRequest):
+    """
+    Igual que /generate_qa_pipeline, pero emite cada QA validada y
+    deduplicada apenas está lista, como NDJSON (una línea JSON por evento):
+
+        {"type": "qa", "qa": {...}}
+        {"type": "done", "total": n, "decoding": {...}}
+        {"type": "error", "detail": "..."}
+    """
+    process_code = uuid.uuid4().hex[:5]
+    plan = _make_plan(request)
+    cache_key = _pipeline_cache_key(request, plan)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print(f"[    STREAM] [{process_code}] Respuesta en caché: {len(cached)} QAs")
+
+        def cached_events():
+            for qa in cached:
+                yield json.dumps({"type": "qa", "qa": qa}) + "\n"
+            yield json.dumps({"type": "done", "total": len(cached), "decoding": plan.summary()}) + "\n"
+
+        return StreamingResponse(cached_events(), media_type="application/x-ndjson")
+
+    # El modelo queda en uso (no se descarga) hasta terminar el streaming
+    generator = model_manager.acquire("generator")
+    try:
+        contexts = _prepare_contexts(generator, process_code, request.translated_context)
+        if not contexts:
+            raise HTTPException(
+                status_code=410, detail="Todos los contextos están vacíos")
+    except BaseException:
+        model_manager.release("generator")
+        raise
+
+    print(f"[    STREAM] [{process_code}] Chunks: {len(contexts)}")
+    qa_pipeline = _make_pipeline(generator, plan, ramp_up=True)
+    released = threading.Event()
+
+    def release_generator():
+        # Desde el generador o, si el cliente se fue antes de empezar a
+        # iterarlo, desde la tarea de fondo de la respuesta
+        if not released.is_set():
+            released.set()
+            model_manager.release("generator")
+
+    def events():
+        emitted = []
+        try:
+            for gqa in qa_pipeline.stream(process_code, contexts):
+                emitted.append(gqa.model_dump(mode="json"))
+                yield json.dumps({"type": "qa", "qa": emitted[-1]}) + "\n"
+        except Exception as e:
+            # El status 200 ya se envió: el error viaja como evento
+            yield json.dumps({"type": "error", "detail": f"Error en el pipeline de QAs: {str(e)}"}) + "\n"
+            return
+        finally:
+            release_generator()
+        # Solo se guarda la respuesta completa y del perfil pedido
+        if not plan.downgraded:
+            cache.set(cache_key, emitted)
+        yield json.dumps({"type": "done", "total": len(emitted), "decoding": plan.summary()}) + "\n"
+
+    return StreamingResponse(
+        events(), media_type="application/x-ndjson", background=BackgroundTask(release_generator))
 
 
 @app.post("/generate_qa")
 def generate_text(request: QAGenerationRequest):
-    process_code = uuid.uuid4().hex[:5]
-    generator = model.get("generator")
+    try:
+        profile = get_profile(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with model_manager.use("generator") as generator:
+        return _generate_text(generator, request, profile)
 
-    if generator is None:
-        return {"error": "Model not loaded"}
 
+def _generate_text(generator: FlanT5Text2TextGenerator, request: QAGenerationRequest, profile: DecodingProfile):
+    process_code = uuid.uuid4().hex[:5]
     contexts = [generator.proccess_input(
         process_code, c) for c in request.context]
     contexts = [c for c in contexts if c]
@@ -59,35 +313,42 @@ def generate_text(request: QAGenerationRequest):
         raise HTTPException(
             status_code=410, detail="Todos los contextos están vacíos")
 
+    cache_key = cache.make_key(json.dumps(contexts), CACHE_MODEL, {
+        "endpoint": "generate_qa",
+        "profile": profile.name,
+        "quality": quality_scorer.cache_tag
+    })
+    cached = cache.get(cache_key)
+    if cached is not None:
+        print(f"[GENERATE-QA] [{process_code}] Respuesta en caché: {len(cached)} QAs")
+        return {"response": [GQA(**qa) for qa in cached]}
+
     try:
-        questions = generator.generate_questions_batch(process_code, contexts)
+        questions = generator.generate_questions_batch(process_code, contexts, **profile.question)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error generando preguntas: {str(e)}")
 
     try:
         answers = generator.generate_answers_batch(
-            process_code, questions, contexts)
+            process_code, questions, contexts, **profile.answer)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error generando respuestas: {str(e)}")
 
+    # Una sola pasada de evaluación para todas las QAs (0 si la respuesta es inválida)
+    with resources.track("quality"):
+        scores = quality_scorer.score(questions, answers)
+
     gqas = []
-    for ctx, q, a in zip(contexts, questions, answers):
-        if not a:
-            gqas.append(GQA(context=ctx, question=q, answer=a, quality=0))
-            continue
-        quality = evaluar_calidad_qa(process_code, q, a)
-        gqa = GQA(
-            context=ctx,
-            question=q,
-            answer=a,
-            quality=quality if quality else 0
-        )
+    for ctx, q, a, quality in zip(contexts, questions, answers, scores):
+        gqa = GQA(context=ctx, question=q, answer=a, quality=quality)
         gqas.append(gqa)
-        print(
-            f"[✅] Generated QA: {gqa.quality} ({gqa.context[:10]}) ({gqa.question[:10]}) ({gqa.answer[:10]})")
+        if a:
+            print(
+                f"[✅] Generated QA: {gqa.quality} ({gqa.context[:10]}) ({gqa.question[:10]}) ({gqa.answer[:10]})")
 
+    cache.set(cache_key, [gqa.model_dump(mode="json") for gqa in gqas])
     return {"response": gqas}
 
 
@@ -108,7 +369,8 @@ def validate_and_deduplicate_gqa(request: QAValidationRequest):
 
     print(f"[VALIDATING] [{process_code}] QAs válidas: {len(valid_qas)}")
 
-    filtered_qas = filter_duplicate_qas(valid_qas)
+    with resources.track("deduplication"):
+        filtered_qas = filter_duplicate_qas(valid_qas)
     if not filtered_qas:
         raise HTTPException(
             status_code=410, detail="Se eliminaron todas las QAs al deduplicar")
@@ -0,0 +1,223 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import numpy as np
+
+from api_types import GQA
+from constants import EMBEDDING_MODEL_NAME
+from decoding import DecodingPlan, DecodingProfile, get_profile
+from quality import quality_scorer
+from resources import resources
+from similarity import IncrementalDeduplicator
+from validation import is_valid_answer
+
+
+class QAPipeline:
+    """
+    Pipeline de una sola pasada: chunk -> pregunta -> respuesta -> calidad
+    -> deduplicación, por grupos de chunks.
+
+    Mientras se generan las respuestas del grupo k ya se encolan las
+    preguntas del grupo k+1, y la evaluación/deduplicación del grupo k
+    corre en paralelo con el modelo. Las QAs válidas y no duplicadas se
+    entregan grupo a grupo a medida que están listas.
+
+    El perfil de decodificación de cada grupo lo decide `plan` (ver
+    decoding.py): con presupuesto de latencia puede bajar a un perfil más
+    barato entre un grupo y el siguiente.
+    """
+
+    def __init__(
+        self,
+        generator,
+        group_size: int = 16,
+        threshold: float = 0.85,
+        ramp_up: bool = False,
+        chunk_cache=None,
+        cache_params: dict | None = None,
+        plan: DecodingPlan | None = None,
+        qa_bank=None
+    ):
+        self.generator = generator
+        self.plan = plan or DecodingPlan(get_profile(None))
+        self.group_size = max(1, group_size)
+        self.threshold = threshold
+        # Con ramp_up los grupos crecen 1, 2, 4... hasta group_size, para que
+        # el primer resultado llegue tras procesar un solo chunk
+        self.ramp_up = ramp_up
+        # Memo por chunk (ResponseCache): la pregunta, respuesta y calidad
+        # de cada chunk ya procesado, por hash de su contenido
+        self.chunk_cache = chunk_cache
+        self.cache_params = cache_params or {}
+        # Banco semántico (QABank): reutiliza la QA de un chunk ya generado
+        # muy parecido aunque el texto no sea idéntico
+        self.qa_bank = qa_bank
+
+    def _make_groups(self, items: list) -> list[list]:
+        groups = []
+        size = 1 if self.ramp_up else self.group_size
+        start = 0
+        while start < len(items):
+            groups.append(items[start:start + size])
+            start += size
+            size = min(size * 2, self.group_size)
+        return groups
+
+    def _chunk_key(self, context: str, profile: DecodingProfile) -> str:
+        return self.chunk_cache.make_key(
+            context, "chunk", {**self.cache_params, "profile": profile.name, "quality": quality_scorer.cache_tag})
+
+    def _cached_chunk(self, context: str) -> GQA | None:
+        if self.chunk_cache is None:
+            return None
+        # Solo sirve lo generado con el perfil pedido
+        cached = self.chunk_cache.get(self._chunk_key(context, self.plan.requested))
+        return GQA(context=context, **cached) if cached is not None else None
+
+    def _bank_scope(self, profile: DecodingProfile) -> str:
+        return json.dumps({
+            **self.cache_params,
+            "profile": profile.name,
+            "quality": quality_scorer.cache_tag,
+            "embedder": EMBEDDING_MODEL_NAME
+        }, sort_keys=True)
+
+    def _resolve_chunk(
+        self,
+        context: str,
+        question: str,
+        answer: str,
+        quality: float,
+        profile: DecodingProfile
+    ) -> GQA:
+        gqa = GQA(context=context, question=question, answer=answer, quality=quality)
+        if self.chunk_cache is not None:
+            self.chunk_cache.set(
+                self._chunk_key(context, profile),
+                {"question": gqa.question, "answer": gqa.answer, "quality": gqa.quality})
+        return gqa
+
+    def stream(self, process_code: str, contexts: list[str]) -> Iterator[GQA]:
+        if not contexts:
+            return
+
+        # Solo los chunks nunca vistos pasan por el modelo
+        resolved: list[GQA | None] = [self._cached_chunk(ctx) for ctx in contexts]
+        missing = [i for i, gqa in enumerate(resolved) if gqa is None]
+        cached = len(contexts) - len(missing)
+
+        # Los que no están en caché se buscan por similitud en el banco; los
+        # embeddings de los que siguen faltando se guardan para insertarlos
+        chunk_embeddings: dict[int, np.ndarray] = {}
+        if self.qa_bank is not None and missing:
+            with resources.track("qa_bank"):
+                embedded = self.qa_bank.embed([contexts[i] for i in missing])
+                reused = self.qa_bank.lookup(embedded, self._bank_scope(self.plan.requested))
+            for i, embedding, value in zip(missing, embedded, reused):
+                if value is not None:
+                    resolved[i] = GQA(context=contexts[i], **value)
+                else:
+                    chunk_embeddings[i] = embedding
+            missing = [i for i in missing if resolved[i] is None]
+
+        print(f"[  PIPELINE] [{process_code}] Chunks en caché: {cached}/{len(contexts)}, "
+              f"reutilizados del banco: {len(contexts) - cached - len(missing)}")
+
+        groups = self._make_groups(missing)
+        deduplicator = IncrementalDeduplicator(self.threshold)
+        # Embeddings de las preguntas por texto: los usa la deduplicación y,
+        # si está activa, la relevancia de la evaluación de calidad
+        embeddings: dict[str, np.ndarray] = {}
+        # Las QAs se validan y entregan en el orden original de los chunks;
+        # emitted es la primera posición aún no entregada
+        emitted = 0
+
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"qa-{process_code}") as pool:
+            if groups:
+                profile = self.plan.choose(len(missing))
+                next_profile = profile
+                next_questions = pool.submit(
+                    self.generator.generate_questions_batch, process_code,
+                    [contexts[i] for i in groups[0]], **profile.question)
+            last_done = time.monotonic()
+            pending = len(missing)
+
+            for k, group in enumerate(groups):
+                # Los chunks en caché previos a este grupo salen sin esperar al modelo
+                yield from self._emit(process_code, resolved[emitted:group[0]], deduplicator, embeddings)
+                emitted = group[0]
+
+                # Las respuestas usan el mismo perfil que las preguntas del grupo
+                profile = next_profile
+                group_contexts = [contexts[i] for i in group]
+                questions = next_questions.result()
+                answers_future = pool.submit(
+                    self.generator.generate_answers_batch, process_code, questions, group_contexts,
+                    **profile.answer)
+                pending -= len(group)
+                if k + 1 < len(groups):
+                    # Con presupuesto de latencia se revisa el perfil de lo que falta
+                    next_profile = self.plan.choose(pending)
+                    next_questions = pool.submit(
+                        self.generator.generate_questions_batch, process_code,
+                        [contexts[i] for i in groups[k + 1]], **next_profile.question)
+
+                answers = answers_future.result()
+                now = time.monotonic()
+                self.plan.estimator.observe(profile, len(group), now - last_done)
+                last_done = now
+                with resources.track("quality"):
+                    question_embeddings = (
+                        self._encode_questions(questions, embeddings) if quality_scorer.uses_embeddings else None)
+                    scores = quality_scorer.score(questions, answers, question_embeddings)
+                    for i, q, a, quality in zip(group, questions, answers, scores):
+                        resolved[i] = self._resolve_chunk(contexts[i], q, a, quality, profile)
+                if chunk_embeddings:
+                    self._bank_insert([resolved[i] for i in group], [chunk_embeddings[i] for i in group], profile)
+
+                yield from self._emit(process_code, resolved[emitted:group[-1] + 1], deduplicator, embeddings)
+                emitted = group[-1] + 1
+
+        yield from self._emit(process_code, resolved[emitted:], deduplicator, embeddings)
+
+    def _emit(
+        self,
+        process_code: str,
+        candidates: list[GQA | None],
+        deduplicator: IncrementalDeduplicator,
+        embeddings: dict[str, np.ndarray]
+    ) -> Iterator[GQA]:
+        gqas = [gqa for gqa in candidates if gqa is not None and is_valid_answer(gqa.answer)]
+        if not gqas:
+            return
+
+        with resources.track("deduplication"):
+            keep = deduplicator.add(self._encode_questions([gqa.question for gqa in gqas], embeddings))
+
+        for gqa, kept in zip(gqas, keep):
+            if kept:
+                print(f"[✅] [{process_code}] QA: {gqa.quality} ({gqa.question[:20]}) ({gqa.answer[:20]})")
+                yield gqa
+
+    def _bank_insert(self, gqas: list[GQA], embeddings: list[np.ndarray], profile: DecodingProfile):
+        # Solo se reutilizan QAs con respuesta válida
+        entries = [(e, gqa) for e, gqa in zip(embeddings, gqas) if is_valid_answer(gqa.answer)]
+        if not entries:
+            return
+        with resources.track("qa_bank"):
+            self.qa_bank.add(
+                np.stack([e for e, _ in entries]),
+                [{"question": gqa.question, "answer": gqa.answer, "quality": gqa.quality} for _, gqa in entries],
+                self._bank_scope(profile))
+
+    @staticmethod
+    def _encode_questions(questions: list[str], embeddings: dict[str, np.ndarray]) -> np.ndarray:
+        """Embeddings normalizados de las preguntas; solo codifica las que no están en `embeddings`."""
+        missing = [q for q in dict.fromkeys(questions) if q not in embeddings]
+        if missing:
+            encoded = resources.get("embedder").encode(
+                missing, convert_to_numpy=True, normalize_embeddings=True)
+            embeddings.update(zip(missing, encoded))
+        return np.stack([embeddings[q] for q in questions])
@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from resources import resources
+from similarity import normalize
+
+
+# =========================================================
+#                  BANCO SEMÁNTICO DE QAs
+#
+# LA CACHÉ POR CHUNK SOLO ACIERTA CON TEXTO IDÉNTICO. EL
+# BANCO GUARDA EL EMBEDDING DE CADA CHUNK YA GENERADO JUNTO
+# A SU QA, Y UN CHUNK NUEVO CUYO VECINO MÁS CERCANO SUPERA
+# EL UMBRAL DE SIMILITUD REUTILIZA ESA QA EN VEZ DE PASAR
+# POR EL MODELO (MISMO MATERIAL CON OTRA EXTRACCIÓN DEL PDF
+# O UN PÁRRAFO REDACTADO DISTINTO).
+#
+# EL ÍNDICE VIVE EN SQLITE (EMBEDDINGS COMO float32) Y SE
+# CARGA A UNA MATRIZ EN MEMORIA PARA BUSCAR: PRODUCTO PUNTO
+# EXACTO POR BLOQUES. LAS INSERCIONES SE AGREGAN AL FINAL DE
+# AMBOS Y, PASADO EL MÁXIMO DE ENTRADAS, SE DESALOJAN LAS
+# USADAS HACE MÁS TIEMPO.
+# =========================================================
+
+
+class QABank:
+    """
+    Índice vectorial persistente de chunk -> QA.
+
+    Las entradas se separan por `scope` (modelo, perfil de decodificación,
+    forma de puntuar...): una búsqueda solo ve las de su mismo scope. Los
+    valores deben ser serializables a JSON.
+
+    Varias réplicas pueden compartir el archivo de SQLite, pero cada una
+    busca en su propia matriz: las QAs que inserta otra réplica recién se
+    ven al reiniciar (se cargan en _load). Si otra réplica desaloja una
+    entrada, aquí cuenta como fallo hasta entonces.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        disk_dir: str | None,
+        threshold: float = 0.95,
+        max_items: int = 50000,
+        window_words: int = 150,
+        block_size: int = 8192
+    ):
+        self.namespace = namespace
+        self.threshold = threshold
+        self.max_items = max(1, max_items)
+        # Los chunks se embeben por ventanas de palabras y se promedian:
+        # MiniLM trunca su entrada y un chunk entero no entraría
+        self.window_words = max(1, window_words)
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "inserts": 0, "evictions": 0}
+
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._scopes = np.zeros(0, dtype=np.int64)
+        self._last_access = np.zeros(0, dtype=np.float64)
+        self._matrix: np.ndarray | None = None
+        # Filas ocupadas de _matrix (crece por duplicación, como una lista)
+        self._size = 0
+        self._scope_ids: dict[str, int] = {}
+        # Sin disco los ids y los valores se llevan en memoria
+        self._next_id = 1
+        self._memory_values: dict[int, dict] = {}
+
+        self._db: sqlite3.Connection | None = None
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(disk_dir, f"{namespace}.sqlite3"), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, scope TEXT NOT NULL, embedding BLOB NOT NULL, "
+                "value TEXT NOT NULL, hits INTEGER NOT NULL, last_access REAL NOT NULL)")
+            self._db.commit()
+            self._load()
+
+    # ---------------------------
+    # EMBEDDINGS
+    # ---------------------------
+
+    def embed(self, chunks: list[str]) -> np.ndarray:
+        """Embedding normalizado de cada chunk (promedio de sus ventanas, en una sola llamada al modelo)."""
+        windows, owners = [], []
+        for i, chunk in enumerate(chunks):
+            words = chunk.split() or [""]
+            for start in range(0, len(words), self.window_words):
+                windows.append(" ".join(words[start:start + self.window_words]))
+                owners.append(i)
+        encoded = resources.get("embedder").encode(
+            windows, convert_to_numpy=True, normalize_embeddings=True)
+        encoded = np.asarray(encoded, dtype=np.float32)
+        sums = np.zeros((len(chunks), encoded.shape[1]), dtype=np.float32)
+        np.add.at(sums, np.asarray(owners), encoded)
+        return normalize(sums)
+
+    # ---------------------------
+    # BÚSQUEDA E INSERCIÓN
+    # ---------------------------
+
+    def lookup(self, embeddings: np.ndarray, scope: str) -> list[dict | None]:
+        """El valor del vecino más cercano de cada embedding, o None si ninguno supera el umbral."""
+        results: list[dict | None] = [None] * len(embeddings)
+        embeddings = normalize(embeddings) if len(embeddings) else embeddings
+        with self._lock:
+            scope_id = self._scope_ids.get(scope)
+            if scope_id is None or self._size == 0 or not len(embeddings):
+                self.counters["misses"] += len(embeddings)
+                return results
+
+            best_score = np.full(len(embeddings), -np.inf, dtype=np.float32)
+            best_row = np.full(len(embeddings), -1, dtype=np.int64)
+            in_scope = self._scopes[:self._size] == scope_id
+            for start in range(0, self._size, self.block_size):
+                end = min(start + self.block_size, self._size)
+                scores = embeddings @ self._matrix[start:end].T
+                scores[:, ~in_scope[start:end]] = -np.inf
+                rows = scores.argmax(axis=1)
+                block_best = scores[np.arange(len(embeddings)), rows]
+                better = block_best > best_score
+                best_score[better] = block_best[better]
+                best_row[better] = rows[better] + start
+
+            hit_rows = [int(row) for row, score in zip(best_row, best_score) if score >= self.threshold]
+            values = self._read_values([int(self._ids[row]) for row in hit_rows])
+            now = time.time()
+            for i, (row, score) in enumerate(zip(best_row, best_score)):
+                if score < self.threshold:
+                    continue
+                results[i] = values.get(int(self._ids[row]))
+                self._last_access[row] = now
+            hits = sum(value is not None for value in results)
+            self.counters["hits"] += hits
+            self.counters["misses"] += len(embeddings) - hits
+
+            if self._db is not None and hit_rows:
+                self._db.executemany(
+                    "UPDATE entries SET hits = hits + 1, last_access = ? WHERE id = ?",
+                    [(now, int(self._ids[row])) for row in hit_rows])
+                self._db.commit()
+        return results
+
+    def add(self, embeddings: np.ndarray, values: list[dict], scope: str):
+        if not values:
+            return
+        embeddings = normalize(embeddings)
+        with self._lock:
+            now = time.time()
+            scope_id = self._scope_ids.setdefault(scope, len(self._scope_ids))
+            try:
+                if self._db is not None:
+                    # Los ids los asigna SQLite (sin reutilizar los de filas
+                    # borradas): varias réplicas pueden compartir el archivo
+                    ids = np.array([
+                        self._db.execute(
+                            "INSERT INTO entries (scope, embedding, value, hits, last_access) VALUES (?, ?, ?, 0, ?)",
+                            (scope, embedding.tobytes(), json.dumps(value, ensure_ascii=False), now)
+                        ).lastrowid
+                        for embedding, value in zip(embeddings, values)
+                    ], dtype=np.int64)
+                else:
+                    ids = np.arange(self._next_id, self._next_id + len(values), dtype=np.int64)
+                self._append(ids, np.full(len(values), scope_id, dtype=np.int64), np.full(len(values), now), embeddings)
+            except Exception:
+                # Ni memoria ni disco quedan con inserciones a medias
+                if self._db is not None:
+                    self._db.rollback()
+                raise
+
+            if self._db is None:
+                self._next_id += len(values)
+                self._memory_values.update(zip(ids.tolist(), values))
+            self.counters["inserts"] += len(values)
+            self._evict()
+            if self._db is not None:
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+                "items": self._size,
+                "threshold": self.threshold,
+                "max_items": self.max_items,
+                "persistent": self._db is not None,
+            }
+
+    # ---------------------------
+    # INTERNOS
+    # ---------------------------
+
+    def _append(self, ids: np.ndarray, scopes: np.ndarray, last_access: np.ndarray, embeddings: np.ndarray):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        needed = self._size + len(embeddings)
+        if self._matrix is None:
+            self._matrix = np.zeros((max(needed, 1024), embeddings.shape[1]), dtype=np.float32)
+        elif self._matrix.shape[1] != embeddings.shape[1]:
+            raise ValueError(
+                f"Dimensión de embeddings distinta a la del banco: {embeddings.shape[1]} vs {self._matrix.shape[1]}")
+        elif needed > len(self._matrix):
+            grown = np.zeros((max(needed, 2 * len(self._matrix)), self._matrix.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size:needed] = embeddings
+        self._ids = np.concatenate([self._ids, ids])
+        self._scopes = np.concatenate([self._scopes, scopes])
+        self._last_access = np.concatenate([self._last_access, last_access])
+        self._size = needed
+
+    def _evict(self):
+        if self._size <= self.max_items:
+            return
+        # Se libera hasta el 90% del máximo para no desalojar en cada inserción
+        target = int(self.max_items * 0.9)
+        order = np.argsort(self._last_access, kind="stable")
+        evicted = order[:self._size - target]
+        keep = np.ones(self._size, dtype=bool)
+        keep[evicted] = False
+
+        if self._db is not None:
+            self._db.executemany("DELETE FROM entries WHERE id = ?", [(int(i),) for i in self._ids[evicted]])
+        else:
+            for i in self._ids[evicted].tolist():
+                self._memory_values.pop(i, None)
+        kept = int(keep.sum())
+        self._matrix[:kept] = self._matrix[:self._size][keep]
+        self._ids = self._ids[keep]
+        self._scopes = self._scopes[keep]
+        self._last_access = self._last_access[keep]
+        self._size = kept
+        self.counters["evictions"] += len(evicted)
+
+    def _read_values(self, ids: list[int]) -> dict[int, dict]:
+        if not ids:
+            return {}
+        if self._db is None:
+            return {i: self._memory_values[i] for i in ids if i in self._memory_values}
+        placeholders = ",".join("?" * len(ids))
+        rows = self._db.execute(
+            f"SELECT id, value FROM entries WHERE id IN ({placeholders})", ids).fetchall()
+        return {row_id: json.loads(value) for row_id, value in rows}
+
+    def _load(self):
+        rows = self._db.execute(
+            "SELECT id, scope, embedding, last_access FROM entries ORDER BY id").fetchall()
+        if not rows:
+            return
+        # Si cambió el modelo de embeddings quedan vectores de otra dimensión:
+        # se conservan los de la dimensión de la última inserción
+        dim = len(rows[-1][2])
+        stale = [(row[0],) for row in rows if len(row[2]) != dim]
+        if stale:
+            self._db.executemany("DELETE FROM entries WHERE id = ?", stale)
+            self._db.commit()
+            rows = [row for row in rows if len(row[2]) == dim]
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        scopes = np.array([self._scope_ids.setdefault(row[1], len(self._scope_ids)) for row in rows], dtype=np.int64)
+        embeddings = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+        last_access = np.array([row[3] for row in rows], dtype=np.float64)
+        self._append(ids, scopes, last_access, embeddings)
+        print(f"[   QA-BANK] [{self.namespace}] {len(rows)} QAs cargadas del disco")
@@ -0,0 +1,165 @@
+import os
+from itertools import chain
+from typing import Callable
+
+import numpy as np
+
+from resources import resources
+from similarity import normalize
+from validation import is_valid_answer
+
+
+# =========================================================
+#              EVALUACIÓN DE CALIDAD POR LOTES
+#
+# PUNTÚA TODAS LAS QAs DE UNA VEZ: PREGUNTAS Y RESPUESTAS SE
+# TOKENIZAN EN UNA SOLA LLAMADA AL TOKENIZER Y CADA CRITERIO
+# DEVUELVE UN ARREGLO DE BOOLEANOS (UNO POR QA). LA NOTA ES
+# LA FRACCIÓN DE CRITERIOS QUE SE CUMPLEN (0.0 A 1.0) Y UNA
+# RESPUESTA INVÁLIDA VALE 0.
+# =========================================================
+
+
+# Agrega la similitud de embeddings pregunta-respuesta como quinto
+# criterio; reutiliza los embeddings de las preguntas de la deduplicación
+QUALITY_RELEVANCE = os.getenv("QGQA_QUALITY_RELEVANCE", "0").lower() in ("1", "true", "yes")
+# Similitud coseno mínima entre pregunta y respuesta para ese criterio
+QUALITY_RELEVANCE_MIN = float(os.getenv("QGQA_QUALITY_RELEVANCE_MIN", "0.3"))
+
+# Sube cuando cambia cómo se puntúa: las notas en caché dejan de valer
+QUALITY_VERSION = 2
+
+
+class QABatch:
+    """
+    Lo que necesitan los criterios de un lote de QAs, calculado una vez:
+    tokens (una llamada al tokenizer para preguntas y respuestas) y, si
+    algún criterio los pide, embeddings.
+    """
+
+    def __init__(
+        self,
+        questions: list[str],
+        answers: list[str],
+        question_embeddings: np.ndarray | None = None
+    ):
+        self.questions = questions
+        self.answers = answers
+        self.valid = np.array([is_valid_answer(a) for a in answers], dtype=bool)
+
+        encoded = resources.get("tokenizer")(answers + questions, add_special_tokens=False)["input_ids"]
+        # Todos los ids en un arreglo plano, con la QA a la que pertenece cada uno
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self.token_ids = np.fromiter(chain.from_iterable(encoded), dtype=np.int64, count=int(lengths.sum()))
+        self.token_rows = np.repeat(np.arange(len(encoded), dtype=np.int64) % len(answers), lengths)
+        # Los primeros tokens son de las respuestas; el resto, de las preguntas
+        self.answer_token_count = int(lengths[:len(answers)].sum())
+        self.answer_lengths = lengths[:len(answers)]
+        self._embeddings = {"question": question_embeddings}
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def embeddings(self, kind: str) -> np.ndarray:
+        """Embeddings normalizados de "question" o "answer" (se calculan una sola vez)."""
+        if self._embeddings.get(kind) is None:
+            texts = self.questions if kind == "question" else self.answers
+            self._embeddings[kind] = resources.get("embedder").encode(
+                texts, convert_to_numpy=True, normalize_embeddings=True)
+        return normalize(self._embeddings[kind])
+
+
+# ---------------------------
+# CRITERIOS
+# ---------------------------
+
+
+def valid_answer(batch: QABatch) -> np.ndarray:
+    # 1. Validación básica
+    return batch.valid
+
+
+def reasonable_length(batch: QABatch) -> np.ndarray:
+    # 2. Longitud razonable (ni 1 palabra ni 100 tokens)
+    return (batch.answer_lengths >= 3) & (batch.answer_lengths <= 40)
+
+
+def not_repeating_question(batch: QABatch) -> np.ndarray:
+    # 3. La respuesta no se limita a repetir la pregunta: menos de la mitad
+    #    de sus tokens (distintos) aparece en la pregunta
+    vocab = int(batch.token_ids.max(initial=0)) + 1
+    # Cada par (QA, token) como un solo entero: la intersección por QA pasa
+    # a ser una sola intersección de arreglos
+    keys = batch.token_rows * vocab + batch.token_ids
+    split = batch.answer_token_count
+    shared = np.zeros(0, dtype=np.int64)
+    if 0 < split < len(keys):
+        # Pares distintos de las respuestas que también están en su pregunta
+        answer_keys = np.sort(keys[:split])
+        answer_keys = answer_keys[np.concatenate(([True], answer_keys[1:] != answer_keys[:-1]))]
+        question_keys = np.sort(keys[split:])
+        found = question_keys[np.searchsorted(question_keys, answer_keys).clip(max=len(question_keys) - 1)]
+        shared = answer_keys[found == answer_keys] // vocab
+    shared_counts = np.bincount(shared, minlength=len(batch))
+    return shared_counts / np.maximum(1, batch.answer_lengths) < 0.5
+
+
+def coherent_text(batch: QABatch) -> np.ndarray:
+    # 4. Coherencia del texto (heurística con mayúsculas y punto final)
+    return np.array([bool(a) and a[0].isupper() and a[-1] in ".!?" for a in batch.answers], dtype=bool)
+
+
+def embedding_relevance(batch: QABatch) -> np.ndarray:
+    # 5. La respuesta habla de lo mismo que la pregunta (similitud coseno)
+    similarity = np.einsum("ij,ij->i", batch.embeddings("question"), batch.embeddings("answer"))
+    return similarity >= QUALITY_RELEVANCE_MIN
+
+
+HEURISTIC_CRITERIA: dict[str, Callable[[QABatch], np.ndarray]] = {
+    "valid": valid_answer,
+    "length": reasonable_length,
+    "overlap": not_repeating_question,
+    "coherence": coherent_text,
+}
+
+
+class QualityScorer:
+    """
+    Nota de calidad de un lote de QAs a partir de criterios que reciben
+    un QABatch y devuelven un booleano por QA. Para sumar un criterio basta
+    con agregarlo a `criteria`; los que usan embeddings los piden con
+    batch.embeddings().
+    """
+
+    def __init__(self, criteria: dict[str, Callable[[QABatch], np.ndarray]]):
+        self.criteria = criteria
+
+    @property
+    def uses_embeddings(self) -> bool:
+        return "relevance" in self.criteria
+
+    @property
+    def cache_tag(self) -> str:
+        """Identifica la forma de puntuar en las claves de caché."""
+        return f"v{QUALITY_VERSION}:" + "+".join(self.criteria)
+
+    def score(
+        self,
+        questions: list[str],
+        answers: list[str],
+        question_embeddings: np.ndarray | None = None
+    ) -> list[float]:
+        if not answers:
+            return []
+        batch = QABatch(questions, answers, question_embeddings)
+        passed = np.zeros(len(batch), dtype=np.int64)
+        for criterion in self.criteria.values():
+            passed += criterion(batch)
+        scores = np.round(passed / len(self.criteria), 2)
+        scores[~batch.valid] = 0.0
+        return scores.tolist()
+
+
+quality_scorer = QualityScorer(
+    {**HEURISTIC_CRITERIA, "relevance": embedding_relevance} if QUALITY_RELEVANCE else dict(HEURISTIC_CRITERIA)
+)
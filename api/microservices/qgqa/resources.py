@@ -0,0 +1,92 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer
+
+from constants import EMBEDDING_MODEL_NAME, MODEL_NAME
+
+
+class ResourceManager:
+    """
+    Recursos pesados (tokenizers, modelos de embeddings) compartidos por
+    todo el proceso.
+
+    Cada recurso se registra con su función de carga y se carga una sola
+    vez: en el lifespan del microservicio, o en el primer uso si se pide
+    antes. Guarda el tiempo de carga de cada recurso y el tiempo por
+    petición de cada etapa que lo usa.
+    """
+
+    def __init__(self):
+        self._loaders: dict[str, Callable[[], Any]] = {}
+        self._resources: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.load_times: dict[str, float] = {}
+        self.stage_times: dict[str, dict[str, float]] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        self._loaders[name] = loader
+
+    def get(self, name: str) -> Any:
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+
+        with self._lock:
+            if name not in self._resources:
+                if name not in self._loaders:
+                    raise KeyError(f"Recurso no registrado: {name}")
+                start = time.perf_counter()
+                self._resources[name] = self._loaders[name]()
+                self.load_times[name] = time.perf_counter() - start
+                print(f"[RESOURCES] '{name}' cargado en {self.load_times[name]:.2f}s")
+            return self._resources[name]
+
+    def load_all(self):
+        for name in self._loaders:
+            self.get(name)
+
+    def clear(self):
+        with self._lock:
+            self._resources.clear()
+
+    @contextmanager
+    def track(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self.stage_times.setdefault(
+                    stage, {"count": 0, "total_s": 0.0, "last_s": 0.0})
+                stats["count"] += 1
+                stats["total_s"] += elapsed
+                stats["last_s"] = elapsed
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": int(stats["count"]),
+                    "avg_ms": round(stats["total_s"] / stats["count"] * 1000, 3),
+                    "last_ms": round(stats["last_s"] * 1000, 3),
+                }
+                for stage, stats in self.stage_times.items()
+            }
+        return {
+            "loaded": sorted(self._resources),
+            "load_time_s": {k: round(v, 3) for k, v in self.load_times.items()},
+            "per_request": stages,
+        }
+
+
+resources = ResourceManager()
+
+# Todos los flan-t5 comparten el mismo vocabulario SentencePiece, así que el
+# tokenizer del modelo generador sirve también para la evaluación de calidad
+resources.register("tokenizer", lambda: AutoTokenizer.from_pretrained(MODEL_NAME))
+resources.register("embedder", lambda: SentenceTransformer(EMBEDDING_MODEL_NAME))
@@ -0,0 +1,135 @@
+import numpy as np
+
+
+# Por encima de este número de QAs, el modo "auto" usa LSH aproximado
+ANN_MIN_ITEMS = 20000
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def normalize(embeddings) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings[None, :]
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def _greedy_block(block: np.ndarray, kept: np.ndarray | None, threshold: float) -> np.ndarray:
+    """
+    Decide qué filas de block se conservan, en orden, dado lo ya
+    conservado (kept). Una fila se descarta si se parece a algo conservado
+    antes o a una fila previa del bloque que sí se conservó.
+    """
+    if kept is not None and len(kept):
+        dup_before = (block @ kept.T >= threshold).any(axis=1)
+    else:
+        dup_before = np.zeros(len(block), dtype=bool)
+
+    keep = np.zeros(len(block), dtype=bool)
+    dup_inside = block @ block.T >= threshold
+    for i in range(len(block)):
+        if dup_before[i]:
+            continue
+        if dup_inside[i, :i][keep[:i]].any():
+            continue
+        keep[i] = True
+    return keep
+
+
+def greedy_dedup_mask(
+    embeddings: np.ndarray,
+    threshold: float,
+    block_size: int = DEFAULT_BLOCK_SIZE
+) -> np.ndarray:
+    """
+    Pasada greedy exacta: se conserva el elemento i si su similitud coseno
+    con todos los elementos conservados antes que él es menor al umbral.
+
+    La matriz de similitud se calcula por bloques de filas (block_size x n)
+    para no reservar n x n floats con conjuntos grandes. Espera embeddings
+    ya normalizados.
+    """
+    n = len(embeddings)
+    keep = np.zeros(n, dtype=bool)
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        kept_before = embeddings[:start][keep[:start]]
+        keep[start:end] = _greedy_block(embeddings[start:end], kept_before, threshold)
+
+    return keep
+
+
+class IncrementalDeduplicator:
+    """
+    Deduplicación greedy por tandas: cada llamada a add() decide qué
+    elementos nuevos se conservan comparándolos con todo lo conservado en
+    tandas anteriores. Procesar los elementos en tandas da el mismo
+    resultado que greedy_dedup_mask sobre todos juntos y en el mismo orden.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.kept: np.ndarray | None = None
+
+    def add(self, embeddings) -> np.ndarray:
+        embeddings = normalize(embeddings)
+        keep = _greedy_block(embeddings, self.kept, self.threshold)
+        new_kept = embeddings[keep]
+        self.kept = new_kept if self.kept is None else np.concatenate([self.kept, new_kept])
+        return keep
+
+
+def lsh_dedup_mask(
+    embeddings: np.ndarray,
+    threshold: float,
+    n_tables: int = 16,
+    n_bits: int = 10,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Variante aproximada de greedy_dedup_mask con LSH de hiperplanos
+    aleatorios: cada elemento solo se compara con los conservados que
+    comparten cubeta en alguna tabla. Puede dejar pasar algún duplicado,
+    nunca descarta un elemento sin verificar la similitud real.
+    """
+    n, dim = embeddings.shape
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((n_tables, dim, n_bits)).astype(np.float32)
+    weights = 1 << np.arange(n_bits, dtype=np.int64)
+    # (n_tables, n) con el id de cubeta de cada elemento en cada tabla
+    codes = np.stack([((embeddings @ p) > 0) @ weights for p in planes])
+
+    buckets: list[dict[int, list[int]]] = [{} for _ in range(n_tables)]
+    keep = np.zeros(n, dtype=bool)
+
+    for i in range(n):
+        candidates = set()
+        for t in range(n_tables):
+            candidates.update(buckets[t].get(int(codes[t, i]), ()))
+        if candidates:
+            idx = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            if (embeddings[idx] @ embeddings[i] >= threshold).any():
+                continue
+        keep[i] = True
+        for t in range(n_tables):
+            buckets[t].setdefault(int(codes[t, i]), []).append(i)
+
+    return keep
+
+
+def dedup_mask(
+    embeddings,
+    threshold: float,
+    mode: str = "auto",
+    block_size: int = DEFAULT_BLOCK_SIZE
+) -> np.ndarray:
+    """mode: "exact", "ann" o "auto" (ann a partir de ANN_MIN_ITEMS)."""
+    embeddings = normalize(embeddings)
+    if mode == "auto":
+        mode = "ann" if len(embeddings) >= ANN_MIN_ITEMS else "exact"
+    if mode == "ann":
+        return lsh_dedup_mask(embeddings, threshold)
+    if mode == "exact":
+        return greedy_dedup_mask(embeddings, threshold, block_size)
+    raise ValueError(f"Modo de deduplicación desconocido: {mode}")
@@ -1,33 +1,85 @@
 from contextlib import asynccontextmanager
+import asyncio
+import os
 import re
+import threading
 import unicodedata
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import torch
+from transformers import AutoTokenizer
 from ..models.summarizerModel import SummarizerModel
+from ..models.inference_backend import backend_for, cache_model_id
+from ..common.admission import AdmissionLimiter, AdmissionMiddleware
+from ..common.model_manager import MODEL_PRELOAD, model_manager
+from ..common.response_cache import ResponseCache
+
+
+SUMMARIZER_MODEL_NAME = "facebook/bart-large-cnn"
+
+# Chunks por lote en la fase map y procesos extra para repartirla en
+# hosts solo CPU (0 = todo en este proceso)
+SUMMARIZER_BATCH_SIZE = int(os.getenv("SUMMARIZER_BATCH_SIZE", "4"))
+SUMMARIZER_WORKERS = int(os.getenv("SUMMARIZER_WORKERS", "0"))
+# Resúmenes simultáneos; el resto espera en cola (429 si se llena)
+SUMMARIZER_MAX_CONCURRENCY = int(os.getenv("SUMMARIZER_MAX_CONCURRENCY", "1"))
+# torch, torch-int8, onnx u onnx-int8 (SUMMARIZER_BACKEND o INFERENCE_BACKEND)
+SUMMARIZER_BACKEND = backend_for("summarizer")
 
 
 class SummarizerRequest(BaseModel):
     text: str
 
 
-model: dict[str, SummarizerModel | None] = {
-    "summarizer": None
-}
+# BART se carga en el primer resumen y se descarga tras un tiempo sin uso
+# (ver common/model_manager.py); al descargarlo se cierra su pool de procesos
+model_manager.register(
+    "summarizer",
+    lambda: SummarizerModel(
+        model_name=SUMMARIZER_MODEL_NAME,
+        uses_cuda=torch.cuda.is_available(),
+        batch_size=SUMMARIZER_BATCH_SIZE,
+        num_workers=SUMMARIZER_WORKERS,
+        backend=SUMMARIZER_BACKEND
+    ),
+    unloader=lambda summarizer: summarizer.close()
+)
+
+# Resúmenes ya calculados, por texto normalizado + modelo + parámetros
+cache = ResponseCache("summarizer")
+
+limiter = AdmissionLimiter("summarizer", max_concurrency=SUMMARIZER_MAX_CONCURRENCY)
+
+# Se carga con el primer resumen (ver _get_tokenizer)
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Cargar el modelo de resumen al iniciar la aplicación
-    model["summarizer"] = SummarizerModel(
-        model_name="facebook/bart-large-cnn",
-        uses_cuda=torch.cuda.is_available()
-    )
+    model_manager.start()
+    if MODEL_PRELOAD:
+        # En un hilo: en el modo en proceso este lifespan corre en el event
+        # loop del router
+        await asyncio.to_thread(model_manager.preload, "summarizer")
     yield
-    # Limpiar el modelo al cerrar la aplicación
-    model["summarizer"] = None
+    # Liberar el modelo al cerrar la aplicación
+    await asyncio.to_thread(model_manager.unload, "summarizer")
+    model_manager.stop()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware, limiters={"/summarize": limiter})
+
+
+@app.get("/health")
+def health():
+    return {
+        "status": "ok",
+        "backend": SUMMARIZER_BACKEND,
+        "lifecycle": model_manager.stats(),
+        "cache": cache.stats(),
+        "admission": {"summarizer": limiter.stats()}
+    }
 
 
 @app.post("/summarize")
@@ -55,16 +107,37 @@ def summarizer_endpint(data: SummarizerRequest):
     else:
         min_pct, max_pct = 0.3, 0.5
 
-    estimated_tokens = int(word_count * 1.3) 
-    min_len = max(int(estimated_tokens * min_pct), 30)
-    max_len = min(int(estimated_tokens * max_pct), 512)
+    # Cantidad exacta de tokens según el tokenizer del modelo
+    token_count = _count_tokens(text)
+    min_len = max(int(token_count * min_pct), 30)
+    max_len = min(int(token_count * max_pct), 512)
 
-    summarizer = model.get("summarizer")
-    if summarizer is None:
-        raise HTTPException(status_code=500, detail="Modelo no cargado")
-
-    try:
-        summary = summarizer.summarize(text, min_len=min_len, max_len=max_len)
-        return {"resumen": summary}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # La caché se consulta antes de pedir el modelo: un acierto no carga BART
+    key = cache.make_key(
+        text,
+        cache_model_id(SUMMARIZER_MODEL_NAME, SUMMARIZER_BACKEND),
+        {"min_len": min_len, "max_len": max_len}
+    )
+    summary = cache.get(key)
+    if summary is None:
+        with model_manager.use("summarizer") as summarizer:
+            try:
+                summary = summarizer.summarize(text, min_len=min_len, max_len=max_len)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+        cache.set(key, summary)
+    return {"resumen": summary}
+
+
+def _count_tokens(text: str) -> int:
+    return len(_get_tokenizer()(text, add_special_tokens=False)["input_ids"])
+
+
+def _get_tokenizer():
+    # Tokenizer suelto, fuera del model_manager: contar tokens para la
+    # clave de caché no debe cargar (ni mantener) el modelo
+    global _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            _tokenizer = AutoTokenizer.from_pretrained(SUMMARIZER_MODEL_NAME)
+        return _tokenizer
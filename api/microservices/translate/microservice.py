@@ -1,29 +1,99 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from fastapi import FastAPI
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from ..models.translate import TranslateModel
+from ..models.inference_backend import backend_for, cache_model_id
+from ..common.admission import AdmissionLimiter, AdmissionMiddleware
+from ..common.model_manager import MODEL_PRELOAD, model_manager
+from ..common.response_cache import ResponseCache
+import os
 import torch
 
+# Segmentos por lote al traducir textos largos
+TRANSLATE_BATCH_SIZE = int(os.getenv("TRANSLATE_BATCH_SIZE", "8"))
+# Traducciones simultáneas por modelo; el resto espera en cola (429 si se llena)
+TRANSLATE_MAX_CONCURRENCY = int(os.getenv("TRANSLATE_MAX_CONCURRENCY", "2"))
+# torch, torch-int8, onnx u onnx-int8 (TRANSLATE_BACKEND o INFERENCE_BACKEND)
+TRANSLATE_BACKEND = backend_for("translate")
+
 
 class TextRequest(BaseModel):
     text: str
+    # Idioma ya detectado por quien llama (p. ej. el pipeline de resumen del
+    # router, que detecta una vez para todos los chunks)
+    language: str | None = None
+
+
+TRANSLATE_MODELS = {
+    "to_en": "Helsinki-NLP/opus-mt-mul-en",
+    "to_es": "Helsinki-NLP/opus-mt-en-es"
+}
+
+# Cada modelo se carga en su primera traducción y se descarga tras un
+# tiempo sin uso (ver common/model_manager.py)
+for _name, _model_name in TRANSLATE_MODELS.items():
+    model_manager.register(
+        _name,
+        lambda model_name=_model_name: TranslateModel(
+            model_name,
+            uses_cuda=torch.cuda.is_available(),
+            batch_size=TRANSLATE_BATCH_SIZE,
+            backend=TRANSLATE_BACKEND
+        )
+    )
 
+# Traducciones ya calculadas, por texto normalizado + modelo
+cache = ResponseCache("translate")
 
-model_instance: dict[str, dict[str, TranslateModel | None] | None] = {
-    "translator": None
+limiters = {
+    "to_en": AdmissionLimiter("to_en", max_concurrency=TRANSLATE_MAX_CONCURRENCY),
+    "to_es": AdmissionLimiter("to_es", max_concurrency=TRANSLATE_MAX_CONCURRENCY)
 }
 
 
+def _cached_translate(name: str, text: str) -> str:
+    # La caché se consulta antes de pedir el modelo: un acierto no lo carga
+    # ni lo mantiene en memoria
+    key = cache.make_key(text, cache_model_id(TRANSLATE_MODELS[name], TRANSLATE_BACKEND))
+    translation = cache.get(key)
+    if translation is None:
+        with model_manager.use(name) as translator:
+            translation = translator.translate(text)
+        cache.set(key, translation)
+    return translation
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    model_instance["translator"] = {
-        "to_en": TranslateModel("Helsinki-NLP/opus-mt-mul-en", uses_cuda=torch.cuda.is_available()),
-        "to_es": TranslateModel("Helsinki-NLP/opus-mt-en-es", uses_cuda=torch.cuda.is_available())
-    }
+    model_manager.start()
+    if MODEL_PRELOAD:
+        # En un hilo: en el modo en proceso este lifespan corre en el event
+        # loop del router
+        await asyncio.to_thread(model_manager.preload, *TRANSLATE_MODELS)
     yield
-    model_instance["translator"] = None
+    await asyncio.to_thread(model_manager.unload, *TRANSLATE_MODELS)
+    model_manager.stop()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware, limiters={
+    "/traducir_a_ingles": limiters["to_en"],
+    "/traducir_a_espanol": limiters["to_es"],
+})
+
+
+@app.get("/health")
+def health():
+    # Solo los modelos que ya están en memoria (health no carga ninguno)
+    translators = {name: model_manager.peek(name) for name in TRANSLATE_MODELS}
+    return {
+        "status": "ok",
+        "backend": TRANSLATE_BACKEND,
+        "models": {name: t.metrics() for name, t in translators.items() if t is not None},
+        "lifecycle": model_manager.stats(),
+        "cache": cache.stats(),
+        "admission": {name: limiter.stats() for name, limiter in limiters.items()}
+    }
 
 
 @app.post("/detectar_idioma")
@@ -33,32 +103,14 @@ def detect_language(request: TextRequest):
 
 @app.post("/traducir_a_ingles")
 def translate_to_english(request: TextRequest):
-    idioma_texto = TranslateModel.detect_language(request.text)
-    if idioma_texto == "en":
+    idioma_texto = request.language or TranslateModel.detect_language(request.text)
+    # detect_language devuelve el nombre del idioma ("english")
+    if idioma_texto in ("en", "english"):
         return {"translation": request.text}
-    
-    translators = model_instance.get("translator")
-    if (translators is None):
-        raise 
-    english_translator = translators.get("to_en")
-    
-    
-    if english_translator is None:
-        raise HTTPException(status_code=500, detail="Modelo no cargado")
-    
-    else:
-        return {"translation": english_translator.translate(request.text)}
+
+    return {"translation": _cached_translate("to_en", request.text)}
 
 
 @app.post("/traducir_a_espanol")
 def translate_to_spanish(request: TextRequest):
-    translators = model_instance.get("translator")
-    if (translators is None):
-        raise 
-    spanish_translator = translators.get("to_es")
-    
-    
-    if spanish_translator is None:
-        raise HTTPException(status_code=500, detail="Modelo no cargado")
-    
-    return {"translation": spanish_translator.translate(request.text)}
+    return {"translation": _cached_translate("to_es", request.text)}
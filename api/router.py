@@ -1,21 +1,39 @@
 import asyncio
-from fastapi import FastAPI, HTTPException
+import hmac
+import json
+import os
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
+from typing import Literal
 import httpx
 
 # TODO: crear otro archivo de tipos independiente
-from microservices.qgqa.api_types import QAGenerationRequest, QAValidationRequest, GQA
+from microservices.qgqa.api_types import GQA
+from microservices.qgqa.decoding import DECODING_PROFILES
+from microservices.api_gateway import CircuitOpenError, ServiceGateway, load_registry
+from inprocess import InProcessServices
+from jobs import Job, JobQueue, QueueFullError
+from summary_pipeline import PipelineError, summarize_translate
+from upstreams import DEFAULT_LIMITS, DEFAULT_TIMEOUT, JOB_TIMEOUT, UpstreamClients
 
 
-DEFAULT_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+# Perfiles de qgqa, tomados de microservices/qgqa/decoding.py: se validan
+# aquí para responder 422 antes de llegar al microservicio
+DecodingProfileName = Literal[tuple(DECODING_PROFILES)]
 
 
 class GeneratorPromptRequest(BaseModel):
     context: str
+    # Perfil de decodificación de qgqa: "fast", "balanced" o "quality"
+    # (por defecto QGQA_DECODING_PROFILE). Con latency_budget_ms el
+    # microservicio baja a un perfil más barato si no alcanzaría el tiempo
+    profile: DecodingProfileName | None = None
+    latency_budget_ms: float | None = None
 
 
 class SummarizerPromptRequest(BaseModel):
@@ -29,8 +47,23 @@ class TranslatePromptRequest(BaseModel):
     text: str
 
 
-# RUTAS HARDCODEADAS
-# TODO: MOVER A APIGATEWAY PARA GESTIONAR LOADBALANCING
+class JobRequest(BaseModel):
+    # "generator", "summarizer" o "summarizer_traducir"
+    kind: str
+    text: str
+    # "high" solo para llamadores de confianza (ver JOBS_TRUSTED_TOKEN)
+    priority: str = "normal"
+    # Solo se respeta de un llamador de confianza (también como header
+    # X-User-Id); si no, el usuario es la IP del cliente
+    user: str | None = None
+    # Perfil de decodificación y presupuesto de latencia (solo "generator");
+    # el presupuesto corre desde que el trabajo sale de la cola
+    profile: DecodingProfileName | None = None
+    latency_budget_ms: float | None = None
+
+
+# RUTAS POR DEFECTO: SOLO SE USAN SI FALTA EL register.json
+# DEL MICROSERVICIO (VER microservices/api_gateway.py)
 T2T_MODEL_PORT = "8001"
 T2T_MODEL_URL = f"http://localhost:{T2T_MODEL_PORT}"
 
@@ -43,6 +76,50 @@ SUMMARIZER_MODEL_URL = f"http://localhost:{SUMMARIZER_MODEL_PORT}"
 # CLFY_MODEL_PORT = "8002"
 # CLFY_MODEL_URL = f"http://localhost:{CLFY_MODEL_PORT}"
 
+MICROSERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "microservices")
+
+# Upstream del router -> (microservicio en register.json, URL por defecto)
+UPSTREAM_SERVICES = {
+    "text2text": ("qgqa", T2T_MODEL_URL),
+    "translator": ("translate", TRANSLATE_MODEL_URL),
+    "summarizer": ("summarizer", SUMMARIZER_MODEL_URL),
+}
+
+# ROUTER_INPROCESS=1: los modelos corren dentro del router (ver
+# inprocess.py), para despliegues chicos de un solo nodo
+ROUTER_INPROCESS = os.getenv("ROUTER_INPROCESS", "0") == "1"
+
+if ROUTER_INPROCESS:
+    gateway = InProcessServices()
+else:
+    # Réplicas de cada microservicio, con balanceo y chequeo de salud
+    registry = load_registry(MICROSERVICES_DIR)
+    gateway = ServiceGateway({
+        name: registry.get(service, [default_url])
+        for name, (service, default_url) in UPSTREAM_SERVICES.items()
+    })
+
+# Un pool de conexiones por microservicio, compartido por todas las rutas;
+# cada petición va a la réplica con menos peticiones en curso (o directo a
+# la app en modo en proceso)
+upstreams = UpstreamClients(
+    {name: f"http://{name}" for name in UPSTREAM_SERVICES},
+    timeout=DEFAULT_TIMEOUT,
+    transports={
+        name: gateway.transport(name, limits=DEFAULT_LIMITS)
+        for name in UPSTREAM_SERVICES
+    },
+)
+
+# Trabajos largos en segundo plano (ver jobs.py)
+jobs = JobQueue()
+
+# Quien envía este token en X-Jobs-Token (p. ej. el backend que ya
+# autenticó al alumno) puede indicar el usuario de sus trabajos y usar la
+# prioridad "high". Al resto se lo identifica por IP, para que la cuota
+# por usuario y los turnos no se esquiven cambiando el nombre. Vacío: nadie
+JOBS_TRUSTED_TOKEN = os.getenv("JOBS_TRUSTED_TOKEN", "")
+
 # =========================================================
 #                   SERVICIO PRINCIPAL
 #
@@ -77,6 +154,103 @@ SUMMARIZER_MODEL_URL = f"http://localhost:{SUMMARIZER_MODEL_PORT}"
 # ----------------
 
 
+def service_unavailable(detail: str, error: httpx.RequestError) -> HTTPException:
+    # Con el circuito abierto se responde al instante y se indica cuándo reintentar
+    headers = None
+    if isinstance(error, CircuitOpenError):
+        headers = {"Retry-After": str(max(1, round(error.retry_after)))}
+    return HTTPException(status_code=503, detail=detail, headers=headers)
+
+
+def upstream_error(detail: str, error: httpx.HTTPStatusError) -> HTTPException:
+    # Un 429 del limitador de admisión de los microservicios se propaga
+    # como tal (con su Retry-After) para que el cliente reintente después
+    response = error.response
+    if response.status_code == 429:
+        headers = {"Retry-After": response.headers.get("retry-after", "1")}
+        return HTTPException(status_code=429, detail="Servicio saturado, reintentar más tarde", headers=headers)
+    # El resto de los 4xx son errores de la petición: se devuelven al
+    # cliente con el detalle del microservicio en vez de un 500
+    if 400 <= response.status_code < 500:
+        try:
+            body = response.json()
+        except (ValueError, httpx.ResponseNotRead):
+            body = None
+        upstream_detail = body.get("detail", detail) if isinstance(body, dict) else detail
+        return HTTPException(status_code=response.status_code, detail=upstream_detail)
+    return HTTPException(status_code=500, detail=detail)
+
+
+def _trusted_caller(http_request: Request) -> bool:
+    token = http_request.headers.get("x-jobs-token", "")
+    return bool(JOBS_TRUSTED_TOKEN) and hmac.compare_digest(token.encode(), JOBS_TRUSTED_TOKEN.encode())
+
+
+def _request_user(http_request: Request, requested: str | None, trusted: bool) -> str:
+    requested = requested or http_request.headers.get("x-user-id")
+    if requested and trusted:
+        return requested
+    return http_request.client.host if http_request.client else "anonymous"
+
+
+# ---------------------------
+# TRABAJOS EN SEGUNDO PLANO
+# ---------------------------
+
+
+async def _generator_job(job: Job) -> dict:
+    # Igual que /generator/stream, guardando cada QA como progreso
+    qas = []
+    async with upstreams.get("text2text").stream(
+        "POST",
+        "/generate_qa_stream",
+        json={
+            "translated_context": job.payload["text"],
+            "profile": job.payload.get("profile"),
+            "latency_budget_ms": job.payload.get("latency_budget_ms")
+        },
+        timeout=JOB_TIMEOUT
+    ) as resp:
+        if resp.status_code >= 400:
+            body = (await resp.aread()).decode(errors="replace")
+            raise RuntimeError(f"qgqa respondió {resp.status_code}: {body}")
+        async for line in resp.aiter_lines():
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event["type"] == "error":
+                raise RuntimeError(event["detail"])
+            if event["type"] == "qa":
+                qas.append(event["qa"])
+                await job.report(event, qas=len(qas))
+    return {"qas": qas}
+
+
+async def _summarizer_job(job: Job) -> dict:
+    response = await upstreams.get("summarizer").post(
+        "/summarize", json={"text": job.payload["text"]}, timeout=JOB_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+async def _summarize_translate_job(job: Job) -> dict:
+    async def on_progress(done: int, total: int):
+        await job.report({"type": "chunk", "done": done, "total": total}, chunks=done, total_chunks=total)
+
+    return await summarize_translate(
+        upstreams.get("translator"),
+        upstreams.get("summarizer"),
+        job.payload["text"],
+        on_progress=on_progress,
+        timeout=JOB_TIMEOUT
+    )
+
+
+jobs.register("generator", _generator_job)
+jobs.register("summarizer", _summarizer_job)
+jobs.register("summarizer_traducir", _summarize_translate_job)
+
+
 # ---------
 # ENDPOINTS
 # ---------
@@ -84,10 +258,13 @@ SUMMARIZER_MODEL_URL = f"http://localhost:{SUMMARIZER_MODEL_PORT}"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global global_client
-    global_client = httpx.AsyncClient()
+    upstreams.open()
+    await gateway.start()
+    jobs.start()
     yield
-    await global_client.aclose()
+    await jobs.aclose()
+    await gateway.aclose()
+    await upstreams.aclose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -105,89 +282,105 @@ app.add_middleware(
 @app.post("/generator/")
 async def generate(request: GeneratorPromptRequest):
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-
-            # 1. Detectar idioma (simulado)
-            # idioma = detectar_idioma(request.context)
-            context_en = request.context  # Simulación
-
-            # 2. Chunking del texto
-            try:
-                resp = await client.post(
-                    f"{T2T_MODEL_URL}/preprocess-and-chunk",
-                    json={"translated_context": context_en}
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                chunks = data.get("response", [])
-                print(f"Chunks: {str(chunks)[:40]}{'...' if len(str(chunks)) > 40 else ''} | len: {len(chunks)} | is_list: {isinstance(chunks, list)}")
-            except Exception as e:
-                print(f"Error al chunkear: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Chunking error: {e}")
-
-            # 3. Llamada batch al generador de preguntas/respuestas
-            try:
-                req = QAGenerationRequest(context=chunks)
-                resp = await client.post(
-                    f"{T2T_MODEL_URL}/generate_qa",
-                    json=req.model_dump(mode="json")
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                all_qas: list[GQA] = [GQA(**qa) for qa in data.get("response", [])]
-                print(f"[GENERATOR] Se generaron {len(all_qas)} QAs")
-            except Exception as e:
-                print(f"Error al generar QAs: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Generación error: {e}")
-
-            # 4. Validación y deduplicación
-            try:
-                req = QAValidationRequest(gqas=all_qas)
-                resp = await client.post(
-                    f"{T2T_MODEL_URL}/validate_and_deduplicate",
-                    json=req.model_dump(mode="json")
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                validated_gqas: list[GQA] = data.get("response", [])
-                print(f"[VALIDADOR] QAs final: {len(validated_gqas)}")
-            except Exception as e:
-                print(f"Error en validación: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Validación error: {e}")
-
-            # 5. Devolver resultado final (simulando traducción final si aplicara)
-            return {"qas": validated_gqas}
-
-    except httpx.RequestError:
-        raise HTTPException(status_code=503, detail="T2T Model service unavailable")
+        client = upstreams.get("text2text")
+
+        # 1. Detectar idioma (simulado)
+        # idioma = detectar_idioma(request.context)
+        context_en = request.context  # Simulación
+
+        # 2. Chunking, generación, evaluación y deduplicación en una sola
+        #    llamada: el microservicio encadena las etapas por grupos de chunks
+        try:
+            resp = await client.post(
+                "/generate_qa_pipeline",
+                json={
+                    "translated_context": context_en,
+                    "profile": request.profile,
+                    "latency_budget_ms": request.latency_budget_ms
+                }
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            validated_gqas: list[GQA] = data.get("response", [])
+            print(f"[GENERATOR] QAs final: {len(validated_gqas)}")
+        except httpx.HTTPStatusError as e:
+            print(f"Error en el pipeline de QAs: {str(e)}")
+            raise upstream_error(f"Generación error: {e}", e)
+
+        # 3. Devolver resultado final (simulando traducción final si aplicara)
+        return {"qas": validated_gqas, "decoding": data.get("decoding")}
+
+    except httpx.RequestError as e:
+        raise service_unavailable("T2T Model service unavailable", e)
     except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=500, detail=f"Model error: {e}")
+        raise upstream_error(f"Model error: {e}", e)
+
+
+def _stream_event(event: dict | str, sse: bool) -> str:
+    line = event if isinstance(event, str) else json.dumps(event)
+    return f"data: {line}\n\n" if sse else f"{line}\n"
+
+
+@app.post("/generator/stream")
+async def generate_stream(request: GeneratorPromptRequest, http_request: Request):
+    """
+    Variante en streaming de /generator/: reenvía cada QA validada apenas el
+    microservicio la emite. Responde NDJSON, o SSE si el cliente envía
+    "Accept: text/event-stream".
+    """
+    client = upstreams.get("text2text")
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    async def relay():
+        try:
+            async with client.stream(
+                "POST",
+                "/generate_qa_stream",
+                json={
+                    "translated_context": request.context,
+                    "profile": request.profile,
+                    "latency_budget_ms": request.latency_budget_ms
+                }
+            ) as resp:
+                if resp.status_code >= 400:
+                    body = (await resp.aread()).decode(errors="replace")
+                    yield _stream_event({"type": "error", "status_code": resp.status_code, "detail": body}, sse)
+                    return
+                async for line in resp.aiter_lines():
+                    if line.strip():
+                        yield _stream_event(line, sse)
+        except httpx.RequestError as e:
+            print(f"Error de conexión en streaming: {str(e)}")
+            yield _stream_event({"type": "error", "status_code": 503, "detail": "T2T Model service unavailable"}, sse)
+
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream" if sse else "application/x-ndjson"
+    )
 
 
 @app.post("/summarizer/")
 async def summarize(request: SummarizerPromptRequest):
     try:
         # <-- Agregar
-        print(f"Enviando solicitud a {SUMMARIZER_MODEL_URL}/summarize")
+        print(f"Enviando solicitud a {upstreams.url('summarizer')}/summarize")
         # <-- Agregar
         print(f"Datos enviados: {request.model_dump(mode='json')}")
 
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            response = await client.post(
-                f"{SUMMARIZER_MODEL_URL}/summarize",
-                json=request.model_dump(mode="json"),
-                timeout=DEFAULT_TIMEOUT  # <-- Agregar timeout
-            )
-            print(f"Respuesta recibida: {response.status_code}")  # <-- Agregar
-            response.raise_for_status()
-            return response.json()
+        client = upstreams.get("summarizer")
+        response = await client.post(
+            "/summarize",
+            json=request.model_dump(mode="json")
+        )
+        print(f"Respuesta recibida: {response.status_code}")  # <-- Agregar
+        response.raise_for_status()
+        return response.json()
     except httpx.RequestError as e:
         print(f"Error de conexión: {str(e)}")  # <-- Agregar
-        raise HTTPException(
-            status_code=503, detail="Summarizer service unavailable")
+        raise service_unavailable("Summarizer service unavailable", e)
     except httpx.HTTPStatusError as e:
         print(f"Error HTTP: {str(e)}")  # <-- Agregar
-        raise HTTPException(status_code=500, detail=f"Summarizer error: {e}")
+        raise upstream_error(f"Summarizer error: {e}", e)
     except Exception as e:
         print(f"Error inesperado: {str(e)}")  # <-- Agregar
         raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
@@ -196,162 +389,155 @@ async def summarize(request: SummarizerPromptRequest):
 @app.post("/translator/detectar_idioma/")
 async def detect_language(request: TranslatePromptRequest):
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            response = await client.post(
-                f"{TRANSLATE_MODEL_URL}/detectar_idioma",
-                json={"text": request.text},
-                timeout=DEFAULT_TIMEOUT
-            )
-            response.raise_for_status()
-            return response.json()  # ejemplo {"language": "es"}
-    except httpx.RequestError:
-        raise HTTPException(
-            status_code=503, detail="Translator service unavailable")
+        client = upstreams.get("translator")
+        response = await client.post(
+            "/detectar_idioma",
+            json={"text": request.text}
+        )
+        response.raise_for_status()
+        return response.json()  # ejemplo {"language": "es"}
+    except httpx.RequestError as e:
+        raise service_unavailable("Translator service unavailable", e)
     except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=500, detail=f"Translator error: {e}")
+        raise upstream_error(f"Translator error: {e}", e)
 
 
 @app.post("/translator/traducir_a_ingles/")
 async def translate_to_english(request: TranslatePromptRequest):
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            response = await client.post(
-                f"{TRANSLATE_MODEL_URL}/traducir_a_ingles",
-                json={"text": request.text},
-                timeout=DEFAULT_TIMEOUT
-            )
-            response.raise_for_status()
-            # ejemplo {"translated_text": "This is a translation."}
-            return response.json()
-    except httpx.RequestError:
-        raise HTTPException(
-            status_code=503, detail="Translator service unavailable")
+        client = upstreams.get("translator")
+        response = await client.post(
+            "/traducir_a_ingles",
+            json={"text": request.text}
+        )
+        response.raise_for_status()
+        # ejemplo {"translated_text": "This is a translation."}
+        return response.json()
+    except httpx.RequestError as e:
+        raise service_unavailable("Translator service unavailable", e)
     except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=500, detail=f"Translator error: {e}")
+        raise upstream_error(f"Translator error: {e}", e)
 
 
 @app.post("/translator/traducir_a_espanol/")
 async def translate_to_spanish(request: TranslatePromptRequest):
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            response = await client.post(
-                f"{TRANSLATE_MODEL_URL}/traducir_a_espanol",
-                json={"text": request.text},
-                timeout=DEFAULT_TIMEOUT
-            )
-            response.raise_for_status()
-            # ejemplo {"translated_text": "Esta es una traducción."}
-            return response.json()
-    except httpx.RequestError:
-        raise HTTPException(
-            status_code=503, detail="Translator service unavailable")
+        client = upstreams.get("translator")
+        response = await client.post(
+            "/traducir_a_espanol",
+            json={"text": request.text}
+        )
+        response.raise_for_status()
+        # ejemplo {"translated_text": "Esta es una traducción."}
+        return response.json()
+    except httpx.RequestError as e:
+        raise service_unavailable("Translator service unavailable", e)
     except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=500, detail=f"Translator error: {e}")
+        raise upstream_error(f"Translator error: {e}", e)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest, http_request: Request):
+    """
+    Encola un trabajo largo y devuelve su job_id al instante. El estado se
+    consulta en GET /jobs/{job_id} o en vivo en GET /jobs/{job_id}/events.
+    Con la cola llena responde 429 con Retry-After.
+    """
+    trusted = _trusted_caller(http_request)
+    if request.priority == "high" and not trusted:
+        raise HTTPException(status_code=403, detail='La prioridad "high" requiere X-Jobs-Token')
+
+    try:
+        job = await jobs.submit(
+            request.kind,
+            {"text": request.text, "profile": request.profile, "latency_budget_ms": request.latency_budget_ms},
+            user=_request_user(http_request, request.user, trusted),
+            priority=request.priority
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {**job.to_dict(include_result=False), "position": jobs.position(job)}
+
+
+@app.get("/jobs")
+async def jobs_stats():
+    return jobs.stats()
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return {**job.to_dict(), "position": jobs.position(job)}
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, http_request: Request):
+    """
+    Eventos de progreso del trabajo hasta que termina: NDJSON, o SSE si el
+    cliente envía "Accept: text/event-stream".
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    async def relay():
+        async for event in job.subscribe():
+            yield _stream_event(event, sse)
+        if job.status == "done":
+            yield _stream_event({"type": "result", "result": job.result}, sse)
+
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream" if sse else "application/x-ndjson"
+    )
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    if not await jobs.cancel(job):
+        raise HTTPException(status_code=409, detail=f"El trabajo ya terminó ({job.status})")
+    return job.to_dict(include_result=False)
 
 
 @app.get("/health")
 async def health_check():
-    services = {
-        "text2text": T2T_MODEL_URL,
-        "summarizer": SUMMARIZER_MODEL_URL,
-        "translator": TRANSLATE_MODEL_URL
-    }
-
-    results = {}
-    async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-        for name, url in services.items():
-            try:
-                response = await client.get(f"{url}/health", timeout=DEFAULT_TIMEOUT)
-                results[name] = {
-                    "status": "active" if response.status_code == 200 else "inactive",
-                    "status_code": response.status_code
-                }
-            except Exception as e:
-                results[name] = {
-                    "status": "error",
-                    "error": str(e)
-                }
-
-    return results
+    # Estado guardado por el chequeo en segundo plano del gateway (consultas
+    # concurrentes con plazo corto): responde al instante aunque un
+    # microservicio esté colgado. En modo en proceso: qué modelos están cargados
+    return gateway.health()
 
 
 @app.post("/summarizer/traducir/")
 async def summarize_translation(request: SummarizerPromptRequest):
+    """
+    Resumen en el idioma original: detección, traducción a inglés, resumen
+    y traducción de vuelta, solapando traducción y resumen por chunks
+    (ver summary_pipeline.py). Incluye el tiempo de cada etapa.
+    """
     try:
-        original_text = request.text
+        result = await summarize_translate(
+            upstreams.get("translator"),
+            upstreams.get("summarizer"),
+            request.text
+        )
+        print(f"[SUMMARIZE-TRANSLATE] Chunks: {result['chunks']} Tiempos: {result['timings_ms']}")
+        return result
 
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            detection_response = await client.post(
-                f"{TRANSLATE_MODEL_URL}/detectar_idioma",
-                json={"text": original_text}
-            )
-            detection_response.raise_for_status()
-            language_name = detection_response.json().get("language", "en").lower()
-
-            language_map = {
-                "english": "en", "inglés": "en",
-                "español": "es", "spanish": "es",
-                "francés": "fr", "french": "fr",
-                "alemán": "de", "german": "de"
-            }
-            detected_language = language_map.get(language_name, language_name)
-
-            translated_text = original_text
-            was_translated = False
-            if detected_language != "en":
-                translation_response = await client.post(
-                    f"{TRANSLATE_MODEL_URL}/traducir_a_ingles",
-                    json={"text": original_text}
-                )
-                translation_response.raise_for_status()
-                translation_json = translation_response.json()
-
-                translated_text = (
-                    translation_json.get("translated_text") or
-                    translation_json.get("text") or
-                    translation_json.get("translation") or
-                    ""
-                )
-
-                if not translated_text.strip():
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Error al traducira inglés"
-                    )
-
-                was_translated = True
-
-            summarize_response = await client.post(
-                f"{SUMMARIZER_MODEL_URL}/summarize",
-                json={"text": translated_text}
-            )
-            summarize_response.raise_for_status()
-            summary_en = summarize_response.json().get("resumen", translated_text)
-
-            final_summary = summary_en
-            if was_translated:
-                back_translation_response = await client.post(
-                    f"{TRANSLATE_MODEL_URL}/traducir_a_espanol",
-                    json={"text": summary_en}
-                )
-                back_translation_response.raise_for_status()
-                back_translation_json = back_translation_response.json()
-
-                possible_keys = ["translated_text",
-                                 "traducción", "translation"]
-                final_summary = next(
-                    (back_translation_json.get(k)
-                     for k in possible_keys if k in back_translation_json),
-                    summary_en
-                )
-
-            return {"resumen": final_summary}
-
-    except httpx.RequestError:
-        raise HTTPException(
-            status_code=503, detail="Alguno de los servicios no está disponible")
+    except httpx.RequestError as e:
+        raise service_unavailable("Alguno de los servicios no está disponible", e)
     except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=500, detail=f"Service error: {e}")
+        raise upstream_error(f"Service error: {e}", e)
+    except PipelineError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Unexpected error: {str(e)}")
@@ -46,42 +46,52 @@ Get-ChildItem -Path $MICROSERVICES_DIR -Recurse -Filter "register.json" | ForEac
     $json = Get-Content $registerFile | ConvertFrom-Json
     
     $svc = $json.microservice
-    $ip = $json.ip
-    $port = $json.port
 
-    if (-not $svc -or -not $ip -or -not $port) {
-        Write-Host "Faltan datos en $registerFile" -ForegroundColor Yellow
-        return
+    # Una instancia por réplica ("replicas" es opcional; sin ella, ip:port)
+    $replicas = if ($json.PSObject.Properties.Name -contains "replicas") {
+        $json.replicas
+    } else {
+        @([pscustomobject]@{ ip = $json.ip; port = $json.port })
     }
 
-    # Crear nombre de archivo de log
-    $timestamp = Get-Date -Format "yyyyMMdd-HHmmss"
-    $logFile = Join-Path $logDir "${svc}_${port}_${timestamp}.log"
-    
-    Write-Host "Iniciando $svc en ${ip}:$port"
-    Write-Host "  Directorio: $serviceDir"
-    Write-Host "  Log: $logFile"
-    
-    # Comando completo con log
-    $command = "uvicorn microservice:app --host $ip --port $port"
-    Write-Host "  Comando: $command"
-    
-    # Guardar metadatos del servicio
-    @{
-        Service = $svc
-        IP = $ip
-        Port = $port
-        Command = $command
-        LogFile = $logFile
-        StartTime = (Get-Date)
-        Directory = $serviceDir
-    } | Export-Clixml (Join-Path $logDir "${svc}_meta.xml")
-    
-    # Ejecutar en nueva ventana con cambio de directorio y logging
-    $jobs += Start-Process pwsh -ArgumentList @(
-        "-NoExit",
-        "-Command", "Set-Location '$serviceDir'; $command *> '$logFile'"
-    ) -PassThru
+    foreach ($replica in $replicas) {
+        $ip = if ($replica.PSObject.Properties.Name -contains "ip") { $replica.ip } else { $json.ip }
+        $port = $replica.port
+
+        if (-not $svc -or -not $ip -or -not $port) {
+            Write-Host "Faltan datos en $registerFile" -ForegroundColor Yellow
+            continue
+        }
+
+        # Crear nombre de archivo de log
+        $timestamp = Get-Date -Format "yyyyMMdd-HHmmss"
+        $logFile = Join-Path $logDir "${svc}_${port}_${timestamp}.log"
+
+        Write-Host "Iniciando $svc en ${ip}:$port"
+        Write-Host "  Directorio: $serviceDir"
+        Write-Host "  Log: $logFile"
+
+        # Comando completo con log
+        $command = "uvicorn microservice:app --host $ip --port $port"
+        Write-Host "  Comando: $command"
+
+        # Guardar metadatos del servicio
+        @{
+            Service = $svc
+            IP = $ip
+            Port = $port
+            Command = $command
+            LogFile = $logFile
+            StartTime = (Get-Date)
+            Directory = $serviceDir
+        } | Export-Clixml (Join-Path $logDir "${svc}_${port}_meta.xml")
+
+        # Ejecutar en nueva ventana con cambio de directorio y logging
+        $jobs += Start-Process pwsh -ArgumentList @(
+            "-NoExit",
+            "-Command", "Set-Location '$serviceDir'; $command *> '$logFile'"
+        ) -PassThru
+    }
 }
 
 # Generar resumen
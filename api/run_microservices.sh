@@ -24,15 +24,18 @@ for dir in "$MICROSERVICES_DIR"/*/; do
     register="$dir/register.json"
     if [ -f "$register" ]; then
         svc=$(jq -r '.microservice' "$register")
-        ip=$(jq -r '.ip' "$register")
-        port=$(jq -r '.port' "$register")
-
-        if [ -n "$svc" ] && [ -n "$ip" ] && [ -n "$port" ]; then
-            echo "Iniciando $svc en $ip:$port"
-            uvicorn "$svc.microservice:app" --host "$ip" --port "$port" &
-        else
-            echo "Faltan datos en $register"
-        fi
+
+        # Una instancia por réplica ("replicas" es opcional; sin ella, ip:port)
+        replicas=$(jq -r '.ip as $ip | (.replicas // [{ip: .ip, port: .port}])[] | "\(.ip // $ip) \(.port)"' "$register")
+
+        while read -r ip port; do
+            if [ -n "$svc" ] && [ -n "$ip" ] && [ -n "$port" ]; then
+                echo "Iniciando $svc en $ip:$port"
+                uvicorn "$svc.microservice:app" --host "$ip" --port "$port" &
+            else
+                echo "Faltan datos en $register"
+            fi
+        done <<< "$replicas"
     fi
 done
 
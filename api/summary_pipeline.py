@@ -0,0 +1,197 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+import httpx
+
+from microservices.models.text_splitting import group_by_token_budget, split_into_sentences
+
+
+# =========================================================
+#            PIPELINE RESUMEN + TRADUCCIÓN
+#
+# DETECTA EL IDIOMA UNA SOLA VEZ. UN TEXTO EN INGLÉS VA
+# ENTERO A /summarize; LOS DEMÁS PASAN POR CHUNKS: MIENTRAS
+# SE RESUME EL CHUNK k YA SE ESTÁ TRADUCIENDO EL k+1. EL
+# RESUMEN FINAL SE TRADUCE DE VUELTA EN LOTES DE ORACIONES
+# EN PARALELO.
+# =========================================================
+
+
+# Palabras por chunk (texto original); ~400 palabras traducidas entran
+# holgadas en la ventana de BART
+SUMMARY_CHUNK_WORDS = int(os.getenv("SUMMARY_CHUNK_WORDS", "400"))
+# /summarize rechaza textos de menos de 30 palabras: un último chunk más
+# corto que esto se une al anterior (con margen por la traducción)
+SUMMARY_MIN_CHUNK_WORDS = 40
+
+# Oraciones por petición al traducir el resumen de vuelta, y peticiones
+# simultáneas
+BACK_TRANSLATE_SENTENCES = int(os.getenv("BACK_TRANSLATE_SENTENCES", "8"))
+BACK_TRANSLATE_CONCURRENCY = int(os.getenv("BACK_TRANSLATE_CONCURRENCY", "4"))
+
+LANGUAGE_MAP = {
+    "english": "en", "inglés": "en",
+    "español": "es", "spanish": "es",
+    "francés": "fr", "french": "fr",
+    "alemán": "de", "german": "de"
+}
+
+
+class PipelineError(Exception):
+    pass
+
+
+def chunk_by_words(text: str, max_words: int, min_words: int = SUMMARY_MIN_CHUNK_WORDS) -> list[str]:
+    """Chunks de oraciones completas con a lo sumo max_words palabras."""
+    sentences = split_into_sentences(text)
+    if not sentences:
+        return []
+    lengths = [len(s.split()) for s in sentences]
+    groups = group_by_token_budget(lengths, max_words)
+    chunks = [" ".join(sentences[start:end]) for start, end in groups]
+    if len(chunks) > 1 and sum(lengths[groups[-1][0]:]) < min_words:
+        last = chunks.pop()
+        chunks[-1] += " " + last
+    return chunks
+
+
+def _translation_of(data: dict) -> str:
+    for key in ("translation", "translated_text", "traducción", "text"):
+        if data.get(key):
+            return data[key]
+    return ""
+
+
+class StageTimings:
+    """Milisegundos acumulados por etapa (las etapas pueden solaparse)."""
+
+    def __init__(self):
+        self.ms: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ms[name] = self.ms.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def report(self, total_ms: float) -> dict[str, float]:
+        report = {name: round(ms, 1) for name, ms in self.ms.items()}
+        report["total"] = round(total_ms, 1)
+        return report
+
+
+async def _post(client: httpx.AsyncClient, path: str, body: dict, timeout=httpx.USE_CLIENT_DEFAULT) -> dict:
+    response = await client.post(path, json=body, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+async def summarize_translate(
+    translator: httpx.AsyncClient,
+    summarizer: httpx.AsyncClient,
+    text: str,
+    chunk_words: int = SUMMARY_CHUNK_WORDS,
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+    timeout: httpx.Timeout | float | None = None
+) -> dict:
+    """
+    Resume un texto en cualquier idioma y devuelve el resumen en español
+    (o en inglés si el texto ya estaba en inglés), con el tiempo de cada
+    etapa en ms. Los errores de los servicios se propagan como excepciones
+    de httpx. on_progress(chunks_resumidos, total) se llama tras cada chunk.
+    timeout se aplica a cada llamada a los servicios (si no, el del cliente).
+    """
+    request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+    timings = StageTimings()
+    start = time.perf_counter()
+
+    # 1. Una sola detección para todo el texto; los chunks la reciben como
+    #    pista y /traducir_a_ingles no vuelve a detectar
+    with timings.stage("detect"):
+        language_name = (await _post(translator, "/detectar_idioma", {"text": text}, request_timeout)).get("language", "en")
+    language = LANGUAGE_MAP.get(language_name.lower(), language_name.lower())
+    translate = language != "en"
+
+    if not text.strip():
+        raise PipelineError("Texto vacío")
+
+    async def summarize(english: str) -> str:
+        with timings.stage("summarize"):
+            data = await _post(summarizer, "/summarize", {"text": english}, request_timeout)
+        return data.get("resumen", english)
+
+    # Sin traducción no hay nada que solapar: el texto va entero a
+    # /summarize, que hace su propio map-reduce por tokens
+    if not translate:
+        summary = await summarize(text)
+        if on_progress is not None:
+            await on_progress(1, 1)
+        return {
+            "resumen": summary,
+            "idioma": language,
+            "chunks": 1,
+            "timings_ms": timings.report((time.perf_counter() - start) * 1000)
+        }
+
+    chunks = chunk_by_words(text, chunk_words)
+    if not chunks:
+        raise PipelineError("Texto vacío")
+
+    async def to_english(chunk: str) -> str:
+        with timings.stage("translate"):
+            data = await _post(translator, "/traducir_a_ingles", {"text": chunk, "language": language_name}, request_timeout)
+        translated = _translation_of(data)
+        if not translated.strip():
+            raise PipelineError("Error al traducir a inglés")
+        return translated
+
+    # 2. Traducción y resumen solapados: el chunk k+1 se traduce mientras
+    #    se resume el k
+    summaries = []
+    next_english = asyncio.create_task(to_english(chunks[0]))
+    try:
+        for k in range(len(chunks)):
+            english = await next_english
+            if k + 1 < len(chunks):
+                next_english = asyncio.create_task(to_english(chunks[k + 1]))
+            summaries.append(await summarize(english))
+            if on_progress is not None:
+                await on_progress(k + 1, len(chunks))
+    except BaseException:
+        next_english.cancel()
+        raise
+
+    # Los resúmenes parciales se vuelven a resumir siempre, igual que en el
+    # map-reduce de /summarize (que se encarga de los que no entran en BART)
+    summary_en = " ".join(summaries)
+    if len(summaries) > 1:
+        with timings.stage("reduce"):
+            summary_en = (await _post(summarizer, "/summarize", {"text": summary_en}, request_timeout)).get("resumen", summary_en)
+
+    # 3. Vuelta al español en lotes de oraciones traducidos en paralelo
+    sentences = split_into_sentences(summary_en)
+    batches = [
+        " ".join(sentences[i:i + BACK_TRANSLATE_SENTENCES])
+        for i in range(0, len(sentences), BACK_TRANSLATE_SENTENCES)
+    ]
+    slots = asyncio.Semaphore(BACK_TRANSLATE_CONCURRENCY)
+
+    async def to_spanish(batch: str) -> str:
+        async with slots:
+            data = await _post(translator, "/traducir_a_espanol", {"text": batch}, request_timeout)
+        return _translation_of(data) or batch
+
+    with timings.stage("back_translate"):
+        final_summary = " ".join(await asyncio.gather(*(to_spanish(b) for b in batches)))
+
+    return {
+        "resumen": final_summary,
+        "idioma": language,
+        "chunks": len(chunks),
+        "timings_ms": timings.report((time.perf_counter() - start) * 1000)
+    }
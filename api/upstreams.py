@@ -0,0 +1,97 @@
+import httpx
+
+
+# =========================================================
+#              CLIENTES HTTP HACIA MICROSERVICIOS
+#
+# UN httpx.AsyncClient POR MICROSERVICIO, CREADO UNA SOLA
+# VEZ EN EL lifespan DEL ROUTER Y COMPARTIDO POR TODAS LAS
+# RUTAS. ASÍ SE REUTILIZAN LAS CONEXIONES (keep-alive) EN
+# VEZ DE PAGAR UN HANDSHAKE TCP POR CADA SALTO.
+# =========================================================
+
+
+DEFAULT_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+# Para los trabajos en segundo plano (jobs.py): nadie espera con la
+# conexión abierta, así que pueden tardar más
+JOB_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+# Límites por defecto del pool de cada microservicio
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=60.0,
+)
+
+
+def http2_available() -> bool:
+    # httpx solo habla HTTP/2 si el paquete opcional "h2" está instalado
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class UpstreamClients:
+    """
+    Pool de clientes httpx, uno por microservicio (upstream).
+
+    Cada upstream tiene su propio pool de conexiones con límites
+    configurables, de modo que un servicio lento no agote las
+    conexiones de los demás.
+    """
+
+    def __init__(
+        self,
+        upstreams: dict[str, str],
+        limits: dict[str, httpx.Limits] | None = None,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        http2: bool = False,
+        transports: dict[str, httpx.AsyncBaseTransport] | None = None,
+    ):
+        self.upstreams = dict(upstreams)
+        self.limits = limits or {}
+        self.timeout = timeout
+        # HTTP/2 solo se negocia sobre TLS (ALPN); uvicorn no lo soporta,
+        # por lo que solo tiene efecto con upstreams https detrás de un proxy
+        self.http2 = http2 and http2_available()
+        # Transports propios por upstream (p. ej. el balanceo entre réplicas
+        # del api_gateway); en ese caso los límites los fija el transport
+        self.transports = transports or {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def open(self):
+        for name, base_url in self.upstreams.items():
+            if name in self._clients:
+                continue
+            transport = self.transports.get(name)
+            if transport is not None:
+                self._clients[name] = httpx.AsyncClient(
+                    base_url=base_url,
+                    timeout=self.timeout,
+                    transport=transport,
+                )
+                continue
+            self._clients[name] = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=self.timeout,
+                limits=self.limits.get(name, DEFAULT_LIMITS),
+                http2=self.http2,
+            )
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None:
+            raise RuntimeError(
+                f"Cliente '{name}' no inicializado (¿se ejecutó el lifespan?)")
+        return client
+
+    def url(self, name: str) -> str:
+        return self.upstreams[name]